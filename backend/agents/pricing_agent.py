@@ -1,14 +1,56 @@
+import json
+import hashlib
 import logging
+import math
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 
+from backend.utils.validation import check_integer, check_number
+
 logger = logging.getLogger(__name__)
 
+PARAMETER_NAMES = ("tax_rate", "transport_rate", "testing_charge",
+                   "discount_tiers", "bulk_item_threshold", "bulk_discount_rate")
+# Shares of an amount; transport_rate and the tier thresholds are only bounded below
+RATE_NAMES = ("tax_rate", "testing_charge", "bulk_discount_rate")
+
+
 class PricingAgent:
-    def __init__(self):
+    def __init__(self, parameters: Dict[str, Any] = None):
         self.tax_rate = 0.18
         self.transport_rate = 0.15
         self.testing_charge = 0.02
+        # (subtotal above, discount rate), checked in order
+        self.discount_tiers = [(100000, 0.10), (50000, 0.07)]
+        self.bulk_item_threshold = 5
+        self.bulk_discount_rate = 0.05
+        
+        for name, value in (parameters or {}).items():
+            if name not in PARAMETER_NAMES:
+                raise ValueError(f"Unknown pricing parameter: {name}")
+            setattr(self, name, self._validate(name, value))
+    
+    def _validate(self, name: str, value: Any) -> Any:
+        if name == "discount_tiers":
+            if not isinstance(value, (list, tuple)) or \
+                    not all(isinstance(tier, (list, tuple)) and len(tier) == 2 for tier in value):
+                raise ValueError("discount_tiers must be a list of [subtotal above, rate] pairs")
+            return [(check_number("discount_tiers threshold", threshold),
+                     check_number("discount_tiers rate", rate, upper=1))
+                    for threshold, rate in value]
+        if name == "bulk_item_threshold":
+            return check_integer(name, value)
+        return check_number(name, value, upper=1 if name in RATE_NAMES else math.inf)
+    
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in PARAMETER_NAMES}
+    
+    @property
+    def parameters_version(self) -> str:
+        """Changes whenever any rate that affects a quotation changes"""
+        parameters = json.dumps([getattr(self, name) for name in PARAMETER_NAMES])
+        return hashlib.sha256(parameters.encode()).hexdigest()[:16]
     
     async def generate_quotation(self, company_info: Dict, matched_items: List[Dict]) -> Dict[str, Any]:
         try:
@@ -46,7 +88,7 @@ class PricingAgent:
             final_amount = taxable_amount + tax_amount
             
             quotation = {
-                "quotation_id": f"QT{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                "quotation_id": self._new_quotation_id(),
                 "company_info": company_info,
                 "line_items": line_items,
                 "pricing_summary": {
@@ -57,7 +99,7 @@ class PricingAgent:
                     "tax_amount": round(tax_amount, 2),
                     "final_amount": round(final_amount, 2)
                 },
-                "validity": (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d"),
+                "validity": self._validity_date(),
                 "terms_conditions": [
                     "Prices valid for 30 days",
                     "Delivery: 4-6 weeks from order confirmation",
@@ -73,8 +115,18 @@ class PricingAgent:
             logger.error(f"Pricing error: {e}")
             raise
     
+    def restamp(self, quotation: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a previously generated quotation with a fresh id and validity"""
+        return {**quotation, "quotation_id": self._new_quotation_id(), "validity": self._validity_date()}
+    
+    def _new_quotation_id(self) -> str:
+        return f"QT{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    
+    def _validity_date(self) -> str:
+        return (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
+    
     def _calculate_discount(self, subtotal: float, item_count: int) -> float:
-        if subtotal > 100000: return subtotal * 0.10
-        if subtotal > 50000: return subtotal * 0.07
-        if item_count > 5: return subtotal * 0.05
+        for threshold, rate in self.discount_tiers:
+            if subtotal > threshold: return subtotal * rate
+        if item_count > self.bulk_item_threshold: return subtotal * self.bulk_discount_rate
         return 0.0
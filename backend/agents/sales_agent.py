@@ -1,99 +1,298 @@
+import io
 import json
 import logging
 import re
-from typing import Dict, Any, List
+from collections import deque
+from typing import Dict, Any, BinaryIO, List, Iterable, Iterator, AsyncIterable, AsyncIterator, Optional, Tuple, Union
+
+from backend.services.revisions import HASH_SIZE, RevisionLines, line_hash, line_mapping, split_hashes
 
 logger = logging.getLogger(__name__)
 
+COMPANY_KEYWORDS = ["COMPANY:", "Company:", "Vendor:", "Supplier:"]
+ITEM_KEYWORDS = ['cable', 'transformer', 'switchgear', 'light', 'led']
+SPEC_WINDOW = 3
+QUANTITY_PATTERN = re.compile(r'\d+')
+
+# Words that contain "led" without being LED items: "Oil cooled" in a transformer's
+# spec line must not start an item of its own. Keywords otherwise match anywhere
+# in a word, so "Streetlight" and "Highmast-light fittings" stay items.
+ITEM_STOP_WORDS = [
+    "assembled", "bundled", "called", "cancelled", "canceled", "compiled", "controlled", "cooled",
+    "coupled", "detailed", "disabled", "drilled", "enabled", "failed", "filed", "filled", "fulfilled",
+    "handled", "installed", "labelled", "labeled", "modelled", "oiled", "pulled", "rolled", "sampled",
+    "scaled", "scheduled", "sealed", "settled", "styled", "tiled", "titled", "totalled", "travelled"
+]
+
+# One alternation for every marker the agent looks for, so each line is scanned once.
+# A stop word is tried before the item keywords and consumes its "led".
+SCAN_PATTERN = re.compile(
+    "(?P<company>" + "|".join(re.escape(k) for k in COMPANY_KEYWORDS) + ")"
+    "|(?P<project>PROJECT:)"
+    "|(?P<week>(?i:week))"
+    "|(?P<stop>(?i:" + "|".join(sorted(ITEM_STOP_WORDS, key=len, reverse=True)) + "))"
+    "|(?P<item>(?i:" + "|".join(ITEM_KEYWORDS) + "))"
+)
+
+DEFAULT_ITEM = {
+    "item_name": "Electrical Cable",
+    "quantity": 100,
+    "unit": "meter",
+    "specifications": "Standard electrical cable",
+    "delivery_requirements": "2 weeks"
+}
+
+
+class RFPScanner:
+    """Incremental, line-at-a-time state for SalesAgent.
+
+    Only the items still collecting their specification window are kept, plus
+    the line numbers of items and headers. With a hash_sink, each line's digest
+    is written there for diffing a later revision, not kept in memory.
+    """
+
+    def __init__(self, agent: "SalesAgent", hash_sink: BinaryIO = None):
+        self.agent = agent
+        self.company_hits: Dict[str, str] = {}
+        self.project: Optional[str] = None
+        self.mentions_weeks = False
+        self.item_count = 0
+        self._pending: deque = deque()
+        self.line_number = 0
+        self.hash_sink = hash_sink
+        self.item_lines: List[int] = []
+        self.header_lines: List[int] = []
+
+    def feed(self, line: str) -> Iterator[Dict]:
+        line = line.rstrip("\r\n")
+        if self.hash_sink is not None:
+            self.hash_sink.write(line_hash(line))
+        is_item, is_header = self.scan(line)
+        if is_header:
+            self.header_lines.append(self.line_number)
+        if is_item:
+            self.item_lines.append(self.line_number)
+            # [item, spec lines, lines left in window]
+            self._pending.append([self.agent._new_item(line), [], SPEC_WINDOW])
+        self.line_number += 1
+
+        stripped = line.strip()
+        for entry in self._pending:
+            if stripped and not stripped.isdigit():
+                entry[1].append(stripped)
+            entry[2] -= 1
+
+        while self._pending and self._pending[0][2] == 0:
+            yield self._complete(self._pending.popleft())
+
+    def scan(self, line: str) -> Tuple[bool, bool]:
+        """Record the line's company/project/week markers; returns (starts an item, has a marker)"""
+        is_item = is_header = False
+        for match in SCAN_PATTERN.finditer(line):
+            kind = match.lastgroup
+            if kind == "item":
+                is_item = True
+                continue
+            if kind == "stop":
+                continue
+            is_header = True
+            if kind == "company":
+                self.company_hits.setdefault(match.group(), line[match.end():].strip())
+            elif kind == "project" and self.project is None:
+                self.project = line[match.end():].strip()
+            elif kind == "week":
+                self.mentions_weeks = True
+        return is_item, is_header
+
+    def line_index(self) -> Dict[str, Any]:
+        return {
+            "item_lines": list(self.item_lines),
+            "header_lines": list(self.header_lines)
+        }
+
+    def finish(self) -> Iterator[Dict]:
+        while self._pending:
+            yield self._complete(self._pending.popleft())
+
+    def _complete(self, entry: List) -> Dict:
+        item, specs, _ = entry
+        item["specifications"] = ' | '.join(specs) if specs else "Standard specifications"
+        self.item_count += 1
+        return item
+
+    def company_name(self) -> str:
+        for keyword in COMPANY_KEYWORDS:
+            if keyword in self.company_hits:
+                return self.company_hits[keyword]
+        return "Unknown Company"
+
+
 class SalesAgent:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-    
+
     async def extract_rfp_data(self, text_content: str) -> Dict[str, Any]:
         """Extract structured data from RFP text"""
+        return await self.extract_rfp_data_stream(io.StringIO(text_content))
+
+    async def extract_rfp_data_stream(self, lines: Union[Iterable[str], AsyncIterable[str]],
+                                      scanner: RFPScanner = None) -> Dict[str, Any]:
+        """Extract structured data from an iterable or async iterable of RFP lines"""
         try:
-            extracted_data = {
-                "company_info": {
-                    "name": self._extract_company_name(text_content),
-                    "project": self._extract_project_name(text_content),
-                    "contact": self._extract_contact_info(text_content)
-                },
-                "items": self._extract_items(text_content),
-                "project_details": {
-                    "delivery_timeline": self._extract_timeline(text_content),
-                    "payment_terms": self._extract_payment_terms(text_content),
-                    "warranty_requirements": self._extract_warranty(text_content)
-                }
-            }
-            return extracted_data
+            scanner = scanner or RFPScanner(self)
+            items = [item async for item in self.stream_items(lines, scanner)]
+            return self._build_result(scanner, items)
         except Exception as e:
             self.logger.error(f"Sales Agent error: {e}")
             raise
-    
-    def _extract_company_name(self, text: str) -> str:
-        keywords = ["COMPANY:", "Company:", "Vendor:", "Supplier:"]
-        for keyword in keywords:
-            if keyword in text:
-                return text.split(keyword)[1].split('\n')[0].strip()
-        return "Unknown Company"
-    
-    def _extract_items(self, text: str) -> List[Dict]:
-        items = []
-        lines = text.split('\n')
-        
-        for i, line in enumerate(lines):
-            line_lower = line.lower()
-            if any(keyword in line_lower for keyword in ['cable', 'transformer', 'switchgear', 'light', 'led']):
-                item = {
-                    "item_name": line.strip(),
-                    "quantity": self._extract_quantity(line),
-                    "unit": self._extract_unit(line),
-                    "specifications": self._extract_specs(lines, i),
-                    "delivery_requirements": "Standard"
-                }
-                items.append(item)
-        
-        return items[:3] if items else [
-            {
-                "item_name": "Electrical Cable",
-                "quantity": 100,
-                "unit": "meter", 
-                "specifications": "Standard electrical cable",
-                "delivery_requirements": "2 weeks"
+
+    def extract_revision(self, lines: Iterable[str], base: Dict[str, Any],
+                         hash_sink: BinaryIO = None) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[int, int], List[int]]:
+        """Extract a revised document, re-reading only the item blocks that changed lines touch.
+
+        `base` is the prior document's line digests and index plus its extracted
+        data. Returns the extracted data, the new line index, new item -> prior
+        item pairs and the new items copied unchanged from the prior extraction;
+        the new line digests go to hash_sink.
+        """
+        with RevisionLines(hash_sink) as revision:
+            for line in lines:
+                revision.append(line)
+            return self._revise(revision, base)
+
+    async def extract_revision_stream(self, lines: AsyncIterable[str], base: Dict[str, Any],
+                                      hash_sink: BinaryIO = None) -> Tuple[Dict[str, Any], Dict[str, Any],
+                                                                           Dict[int, int], List[int]]:
+        """extract_revision for an async iterable of lines"""
+        with RevisionLines(hash_sink) as revision:
+            async for line in lines:
+                revision.append(line)
+            return self._revise(revision, base)
+
+    def _revise(self, revision: RevisionLines,
+                base: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[int, int], List[int]]:
+        line_count = len(revision)
+        old_count = len(base["line_hashes"]) // HASH_SIZE
+        new_to_old, old_to_new, changes = line_mapping(split_hashes(base["line_hashes"]),
+                                                       split_hashes(bytes(revision.hashes)))
+
+        # Only changed runs and the SPEC_WINDOW - 1 lines either side are ever looked at:
+        # those hold every item whose window a change reaches
+        lines: Dict[int, str] = {}
+        for _, _, j1, j2 in changes:
+            start = max(j1 - (SPEC_WINDOW - 1), 0)
+            lines.update(enumerate(revision.read(start, j2 + SPEC_WINDOW - 1), start))
+
+        scanner = RFPScanner(self)
+        markers = {k: scanner.scan(lines[k]) for _, _, j1, j2 in changes for k in range(j1, j2)}
+        old_item_at = {line: index for index, line in enumerate(base["item_lines"])}
+        # An item is a pure function of its line and the SPEC_WINDOW - 1 after it
+        item_lines = sorted([old_to_new[line] for line in base["item_lines"] if old_to_new[line] is not None]
+                            + [k for k, (is_item, _) in markers.items() if is_item])
+        new_item_at = {line: index for index, line in enumerate(item_lines)}
+
+        def window_unchanged(k: int, o: int) -> bool:
+            for offset in range(SPEC_WINDOW):
+                if (k + offset < line_count) != (o + offset < old_count):
+                    return False
+                if k + offset < line_count and new_to_old[k + offset] != o + offset:
+                    return False
+            return True
+
+        items, reused, pairs = [], [], {}
+        for index, k in enumerate(item_lines):
+            o = new_to_old[k]
+            if o is not None:
+                pairs[index] = old_item_at[o]
+                if window_unchanged(k, o):
+                    items.append(dict(base["items"][old_item_at[o]]))
+                    reused.append(index)
+                    continue
+            items.append(next(self.iter_items(lines[j] for j in range(k, min(k + SPEC_WINDOW, line_count)))))
+
+        # Rewritten item lines pair with the prior items of the same changed run, in order
+        for i1, i2, j1, j2 in changes:
+            old_items = [old_item_at[o] for o in range(i1, i2) if o in old_item_at]
+            new_items = [new_item_at[k] for k in range(j1, j2) if k in new_item_at]
+            pairs.update(zip(new_items, old_items))
+
+        old_headers = base["header_lines"]
+        if any(is_header for _, is_header in markers.values()) or \
+                any(i1 <= line < i2 for line in old_headers for i1, i2, _, _ in changes):
+            header_scanner = RFPScanner(self)
+            header_lines = [k for k, line in enumerate(revision) if header_scanner.scan(line)[1]]
+            extracted = self._build_result(header_scanner, items)
+        else:
+            header_lines = [old_to_new[line] for line in old_headers]
+            extracted = {
+                "company_info": dict(base["company_info"]),
+                "items": items or [dict(DEFAULT_ITEM)],
+                "project_details": dict(base["project_details"])
+            }
+
+        index = {"item_lines": item_lines, "header_lines": header_lines}
+        return extracted, index, pairs, reused
+
+    def iter_items(self, lines: Iterable[str], scanner: RFPScanner = None) -> Iterator[Dict]:
+        """Yield items as soon as their specification window is complete"""
+        scanner = scanner or RFPScanner(self)
+        for line in lines:
+            yield from scanner.feed(line)
+        yield from scanner.finish()
+
+    async def stream_items(self, lines: Union[Iterable[str], AsyncIterable[str]],
+                           scanner: RFPScanner = None) -> AsyncIterator[Dict]:
+        scanner = scanner or RFPScanner(self)
+        if not hasattr(lines, "__aiter__"):
+            for item in self.iter_items(lines, scanner):
+                yield item
+            return
+
+        async for line in lines:
+            for item in scanner.feed(line):
+                yield item
+        for item in scanner.finish():
+            yield item
+
+    def _build_result(self, scanner: RFPScanner, items: List[Dict]) -> Dict[str, Any]:
+        return {
+            "company_info": {
+                "name": scanner.company_name(),
+                "project": scanner.project if scanner.project is not None else "Electrical Project",
+                "contact": self._extract_contact_info()
+            },
+            "items": items or [dict(DEFAULT_ITEM)],
+            "project_details": {
+                "delivery_timeline": "4-6 weeks" if scanner.mentions_weeks else "Standard delivery",
+                "payment_terms": self._extract_payment_terms(),
+                "warranty_requirements": self._extract_warranty()
             }
-        ]
-    
+        }
+
+    def _new_item(self, line: str) -> Dict:
+        return {
+            "item_name": line.strip(),
+            "quantity": self._extract_quantity(line),
+            "unit": self._extract_unit(line),
+            "specifications": "",
+            "delivery_requirements": "Standard"
+        }
+
     def _extract_quantity(self, text: str) -> int:
-        numbers = re.findall(r'\d+', text)
-        return int(numbers[0]) if numbers else 1
-    
+        number = QUANTITY_PATTERN.search(text)
+        return int(number.group()) if number else 1
+
     def _extract_unit(self, text: str) -> str:
-        if 'meter' in text.lower(): return 'meter'
-        if 'unit' in text.lower(): return 'unit'
+        text_lower = text.lower()
+        if 'meter' in text_lower: return 'meter'
+        if 'unit' in text_lower: return 'unit'
         return 'piece'
-    
-    def _extract_specs(self, lines: list, index: int) -> str:
-        specs = []
-        for i in range(index, min(index+3, len(lines))):
-            if lines[i].strip() and not lines[i].strip().isdigit():
-                specs.append(lines[i].strip())
-        return ' | '.join(specs) if specs else "Standard specifications"
-    
-    def _extract_project_name(self, text: str) -> str:
-        if "PROJECT:" in text:
-            return text.split("PROJECT:")[1].split('\n')[0].strip()
-        return "Electrical Project"
-    
-    def _extract_contact_info(self, text: str) -> str:
+
+    def _extract_contact_info(self) -> str:
         return "contact@company.com"
-    
-    def _extract_timeline(self, text: str) -> str:
-        if "week" in text.lower():
-            return "4-6 weeks"
-        return "Standard delivery"
-    
-    def _extract_payment_terms(self, text: str) -> str:
+
+    def _extract_payment_terms(self) -> str:
         return "50% advance, 50% on delivery"
-    
-    def _extract_warranty(self, text: str) -> str:
+
+    def _extract_warranty(self) -> str:
         return "1 year warranty"
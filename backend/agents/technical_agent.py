@@ -1,83 +1,115 @@
+import asyncio
 import logging
-from typing import Dict, List, Any
+import threading
+from typing import Dict, List, Any, Optional
+
+from backend.config import settings
+from backend.database.match_cache import MatchCache
+from backend.services import metrics
+from backend.services.product_catalog import ProductCatalog, tokenize
 
 logger = logging.getLogger(__name__)
 
+def match_key(item_description: str, specifications: str) -> str:
+    """Canonical form of a line item; matching only ever sees these tokens, so equal keys match equally"""
+    return f"{' '.join(tokenize(item_description))}|{' '.join(tokenize(specifications))}"
+
 class TechnicalAgent:
-    def __init__(self):
-        self.product_database = self._load_product_database()
+    def __init__(self, catalog: ProductCatalog = None, match_cache: MatchCache = None):
+        self._catalog: Optional[ProductCatalog] = catalog
+        self._catalog_lock = threading.Lock()
+        self.match_cache = match_cache or MatchCache(
+            settings.MATCH_CACHE_PATH,
+            max_entries=settings.MATCH_CACHE_ENTRIES,
+            ttl_seconds=settings.MATCH_CACHE_TTL_SECONDS
+        )
+    
+    @property
+    def catalog(self) -> ProductCatalog:
+        """The product catalog, loaded on first use (or by warm-up) rather than at construction"""
+        if self._catalog is None:
+            with self._catalog_lock:
+                if self._catalog is None:
+                    self._catalog = self._load_product_database()
+        return self._catalog
+    
+    @catalog.setter
+    def catalog(self, catalog: ProductCatalog):
+        self._catalog = catalog
+    
+    @property
+    def catalog_loaded(self) -> bool:
+        return self._catalog is not None
+    
+    def _load_product_database(self) -> ProductCatalog:
+        return ProductCatalog(settings.PRODUCT_CATALOG_PATH, settings.CATALOG_RELOAD_CHECK_SECONDS,
+                              settings.MATCH_STRATEGY, settings.VECTOR_INDEX_DIR, settings.SEMANTIC_MIN_SCORE,
+                              settings.CATALOG_SNAPSHOT_DIR)
+    
+    def reload_catalog(self) -> bool:
+        return self.catalog.reload()
     
-    def _load_product_database(self) -> Dict[str, Any]:
-        return {
-            "cables": [
-                {
-                    "product_id": "CABLE-XLPE-1.5",
-                    "name": "XLPE Insulated Copper Cable 1.5 sqmm",
-                    "category": "Cables",
-                    "specifications": {"voltage": "1100V", "current": "20A", "material": "Copper"},
-                    "unit_price": 45.50,
-                    "unit": "meter"
-                },
-                {
-                    "product_id": "CABLE-PVC-2.5", 
-                    "name": "PVC Insulated Copper Cable 2.5 sqmm",
-                    "category": "Cables",
-                    "specifications": {"voltage": "1100V", "current": "27A", "material": "Copper"},
-                    "unit_price": 68.75,
-                    "unit": "meter"
-                }
-            ],
-            "transformers": [
-                {
-                    "product_id": "TRANSFORMER-11KV-500",
-                    "name": "11KV/433V Distribution Transformer 500KVA",
-                    "category": "Transformers", 
-                    "specifications": {"primary": "11KV", "secondary": "433V", "capacity": "500KVA"},
-                    "unit_price": 450000.00,
-                    "unit": "unit"
-                }
-            ],
-            "lighting": [
-                {
-                    "product_id": "LED-STREET-50W",
-                    "name": "LED Street Light 50W",
-                    "category": "Lighting",
-                    "specifications": {"power": "50W", "lumen": "6000lm", "ip_rating": "IP65"},
-                    "unit_price": 3200.00,
-                    "unit": "unit"
-                }
-            ]
-        }
+    async def current_catalog_version(self) -> str:
+        """Catalog version after a throttled reload check; a rebuild runs off the event loop"""
+        if self.catalog.reload_check_due:
+            await asyncio.to_thread(self.catalog.maybe_reload)
+        return self.catalog.version
     
     async def find_product_matches(self, item_description: str, specifications: str) -> List[Dict[str, Any]]:
+        version = await self.current_catalog_version()
+        key = match_key(item_description, specifications)
+        found = self.match_cache.get(version, key)
+        metrics.MATCH_CACHE_LOOKUPS.labels(outcome="miss" if found is None else "hit").inc()
+        if found is None:
+            found = [(record.to_dict(), score)
+                     for record, score in self.catalog.find_matches(item_description, specifications)]
+            self.match_cache.put(version, key, found)
         matches = []
         
-        for category, products in self.product_database.items():
-            for product in products:
-                score = self._calculate_match_score(item_description, specifications, product)
-                if score > 60:
-                    matches.append({
-                        "product": product,
-                        "match_score": score,
-                        "reasoning": self._generate_reasoning(score),
-                        "compatibility_notes": self._check_compatibility(specifications, product)
-                    })
+        for product, score in found:
+            matches.append({
+                "product": product,
+                "match_score": score,
+                "reasoning": self._generate_reasoning(score),
+                "compatibility_notes": self._check_compatibility(specifications, product)
+            })
         
-        return sorted(matches, key=lambda x: x['match_score'], reverse=True)[:3]
+        return matches
     
-    def _calculate_match_score(self, description: str, specs: str, product: Dict) -> float:
-        score = 0
-        description_lower = description.lower()
-        product_name_lower = product['name'].lower()
+    async def find_product_matches_batch(self, items: List[Dict]) -> List[List[Dict[str, Any]]]:
+        """Match every extracted item in one vectorized pass over the catalog"""
+        version = await self.current_catalog_version()
+        keys = [match_key(item['item_name'], item['specifications']) for item in items]
+        distinct = list(dict.fromkeys(keys))
+        found = self.match_cache.get_many(version, distinct)
         
-        if any(word in product_name_lower for word in description_lower.split()):
-            score += 40
+        # Only distinct lines the cache does not know go through the catalog
+        missing = [key for key in distinct if key not in found]
+        metrics.MATCH_CACHE_LOOKUPS.labels(outcome="hit").inc(len(found))
+        metrics.MATCH_CACHE_LOOKUPS.labels(outcome="miss").inc(len(missing))
+        if missing:
+            first_item = {}
+            for key, item in zip(keys, items):
+                first_item.setdefault(key, item)
+            queries = [(first_item[key]['item_name'], first_item[key]['specifications']) for key in missing]
+            computed = {key: [(record.to_dict(), score) for record, score in row]
+                        for key, row in zip(missing, self.catalog.find_matches_batch(queries))}
+            self.match_cache.put_many(version, computed)
+            found.update(computed)
         
-        spec_matches = sum(1 for spec in product['specifications'].values() 
-                          if str(spec).lower() in specs.lower())
-        score += spec_matches * 20
+        results = []
+        for item, key in zip(items, keys):
+            matches = []
+            for product, score in found[key]:
+                matches.append({
+                    "product": product,
+                    "match_score": score,
+                    "reasoning": self._generate_reasoning(score),
+                    "compatibility_notes": self._check_compatibility(item['specifications'], product)
+                })
+            results.append(matches)
         
-        return min(score, 100)
+        return results
     
     def _generate_reasoning(self, score: float) -> str:
         if score >= 80: return "Excellent technical match"
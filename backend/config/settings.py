@@ -0,0 +1,96 @@
+import os
+
+# Product catalog (CSV or SQLite). Empty means the built-in demo catalog.
+PRODUCT_CATALOG_PATH = os.getenv("PRODUCT_CATALOG_PATH", "")
+CATALOG_RELOAD_CHECK_SECONDS = float(os.getenv("CATALOG_RELOAD_CHECK_SECONDS", "5"))
+# "keyword" (name/spec token overlap) or "semantic" (TF-IDF similarity over a memory-mapped index)
+MATCH_STRATEGY = os.getenv("MATCH_STRATEGY", "keyword")
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "data/vector_index")
+SEMANTIC_MIN_SCORE = float(os.getenv("SEMANTIC_MIN_SCORE", "35"))
+# Prebuilt, memory-mapped index per catalog file version (empty disables snapshots)
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", "data/catalog_snapshots")
+
+# Startup: subsystems loaded before serving ("matching", "pdf", "scraping", "all" or empty for fully lazy)
+WARM_UP = os.getenv("WARM_UP", "matching")
+
+# Line-item match cache (empty path keeps it per process)
+MATCH_CACHE_PATH = os.getenv("MATCH_CACHE_PATH", "data/match_cache.db")
+MATCH_CACHE_ENTRIES = int(os.getenv("MATCH_CACHE_ENTRIES", "10000"))
+MATCH_CACHE_TTL_SECONDS = float(os.getenv("MATCH_CACHE_TTL_SECONDS", "3600"))
+
+# Document extraction
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 2)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+# Uploads
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(256 * 1024 * 1024)))
+
+# Result cache
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "data/result_cache.db")
+RESULT_CACHE_MEMORY_BYTES = int(os.getenv("RESULT_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Job store ("sqlite:///path" shares jobs across workers, "memory://" is per process)
+JOB_STORE_URL = os.getenv("JOB_STORE_URL", "sqlite:///data/jobs.db")
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", str(24 * 3600)))
+JOB_STORE_MEMORY_BYTES = int(os.getenv("JOB_STORE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+JOB_STORE_MAX_MEMORY_JOBS = int(os.getenv("JOB_STORE_MAX_MEMORY_JOBS", "1000"))
+
+# Line indexes of processed documents, kept JOB_TTL_SECONDS for uploads that revise them
+REVISION_STORE_PATH = os.getenv("REVISION_STORE_PATH", "data/revisions.db")
+
+# Job scheduler ("thread" or "process" executor)
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "4"))
+SCHEDULER_EXECUTOR = os.getenv("SCHEDULER_EXECUTOR", "thread")
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "100"))
+SCHEDULER_TENANT_LIMIT = int(os.getenv("SCHEDULER_TENANT_LIMIT", "2"))
+
+# Batch uploads
+BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", "500"))
+
+# Web scraping
+SCRAPE_TIMEOUT_SECONDS = float(os.getenv("SCRAPE_TIMEOUT_SECONDS", "10"))
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(5 * 1024 * 1024)))
+SCRAPE_MAX_PAGES = int(os.getenv("SCRAPE_MAX_PAGES", "25"))
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "8"))
+SCRAPE_HOST_REQUESTS_PER_SECOND = float(os.getenv("SCRAPE_HOST_REQUESTS_PER_SECOND", "4"))
+SCRAPE_POOL_SIZE = int(os.getenv("SCRAPE_POOL_SIZE", "100"))
+SCRAPE_POOL_SIZE_PER_HOST = int(os.getenv("SCRAPE_POOL_SIZE_PER_HOST", "8"))
+# Pages above this size are parsed in the extraction process pool
+SCRAPE_INLINE_PARSE_BYTES = int(os.getenv("SCRAPE_INLINE_PARSE_BYTES", str(32 * 1024)))
+SCRAPE_CACHE_PATH = os.getenv("SCRAPE_CACHE_PATH", "data/scrape_cache.db")
+SCRAPE_CACHE_TTL_SECONDS = float(os.getenv("SCRAPE_CACHE_TTL_SECONDS", "3600"))
+SCRAPE_CACHE_MAX_BYTES = int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Rendered PDFs (scraped pages and quotations)
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "data/pdf_cache")
+PDF_CACHE_MAX_FILES = int(os.getenv("PDF_CACHE_MAX_FILES", "500"))
+
+# Per-request profiling (cProfile, stack samples, tracemalloc), run one at a time in a separate process.
+# Explicit requests need PROFILING_ENABLED (and X-Profile-Token when PROFILING_TOKEN is set);
+# PROFILE_SAMPLE_RATE profiles that share of ordinary uploads regardless.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+PROFILE_TOP_ENTRIES = int(os.getenv("PROFILE_TOP_ENTRIES", "15"))
+PROFILE_STACK_INTERVAL_SECONDS = float(os.getenv("PROFILE_STACK_INTERVAL_SECONDS", "0.001"))
+
+# Responses: br/gzip above this size, and page sizes of the paginated item endpoints
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+
+# Event-loop lag sampled into /metrics at this interval (0 disables)
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.1"))
+
+# Job progress events (SSE / WebSocket / long-poll)
+PROGRESS_RETENTION_SECONDS = float(os.getenv("PROGRESS_RETENTION_SECONDS", "300"))
+# How often idle streams send keep-alives and re-check the job store for jobs finished by other workers
+PROGRESS_POLL_SECONDS = float(os.getenv("PROGRESS_POLL_SECONDS", "2"))
+LONG_POLL_MAX_SECONDS = float(os.getenv("LONG_POLL_MAX_SECONDS", "60"))
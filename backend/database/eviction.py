@@ -0,0 +1,26 @@
+from typing import List
+
+import aiosqlite
+
+
+async def evict_to_size(db: aiosqlite.Connection, table: str, key_column: str, max_bytes: int) -> List[str]:
+    """Delete the least recently accessed rows of `table` until its `size` column sums to at most max_bytes.
+
+    The table needs `size` and `last_access` columns; `table` and `key_column`
+    come from the caller's own schema. Returns the keys of the deleted rows.
+    """
+    async with db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}") as cursor:
+        total = (await cursor.fetchone())[0]
+    if total <= max_bytes:
+        return []
+
+    evicted = []
+    async with db.execute(f"SELECT {key_column}, size FROM {table} ORDER BY last_access") as cursor:
+        async for key, size in cursor:
+            if total <= max_bytes:
+                break
+            evicted.append(key)
+            total -= size
+    await db.executemany(f"DELETE FROM {table} WHERE {key_column} = ?", [(key,) for key in evicted])
+    await db.commit()
+    return evicted
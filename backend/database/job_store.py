@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    request_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    message TEXT,
+    payload TEXT,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs(expires_at);
+"""
+
+
+class JobStore(ABC):
+    """Where RFP processing jobs and their results live between upload and retrieval.
+
+    get() returns only the lightweight status fields; get_result() loads the
+    full record, so polling does not pay for deserializing large quotations.
+    """
+
+    @abstractmethod
+    async def put(self, request_id: str, job: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    async def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_result(self, request_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def delete(self, request_id: str):
+        ...
+
+    @abstractmethod
+    def iter_results(self, status: str = "success", limit: int = 10000) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """(request_id, full record) for unexpired jobs with `status`, newest first"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        ...
+
+    async def close(self):
+        pass
+
+
+class MemoryJobStore(JobStore):
+    """Single-process store for development; bounded by job count and TTL."""
+
+    def __init__(self, ttl_seconds: float = 86400, max_jobs: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    async def put(self, request_id: str, job: Dict[str, Any]):
+        self._jobs[request_id] = (time.time() + self.ttl_seconds, job)
+        self._jobs.move_to_end(request_id)
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+    async def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        job = await self.get_result(request_id)
+        if job is None:
+            return None
+        return {"status": job["status"], "message": job.get("message")}
+
+    async def get_result(self, request_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._jobs.get(request_id)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            del self._jobs[request_id]
+            return None
+        return entry[1]
+
+    async def delete(self, request_id: str):
+        self._jobs.pop(request_id, None)
+
+    async def iter_results(self, status: str = "success", limit: int = 10000) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        now = time.time()
+        for request_id, (expires_at, job) in reversed(list(self._jobs.items())):
+            if limit <= 0:
+                break
+            if expires_at >= now and job["status"] == status:
+                limit -= 1
+                yield request_id, job
+
+    async def count(self) -> int:
+        return len(self._jobs)
+
+    async def purge_expired(self) -> int:
+        now = time.time()
+        expired = [request_id for request_id, (expires_at, _) in self._jobs.items() if expires_at < now]
+        for request_id in expired:
+            del self._jobs[request_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """Store shared by every worker process on the host through one SQLite file.
+
+    Each process keeps its own connection; WAL mode lets pollers read while
+    another worker writes. Recently used result payloads are kept in a small
+    per-process LRU bounded by serialized size, each with its job's expiry.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 86400, memory_bytes: int = 32 * 1024 * 1024,
+                 purge_interval: float = 60):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_bytes = memory_bytes
+        self.purge_interval = purge_interval
+        self._db: Optional[aiosqlite.Connection] = None
+        # request_id -> (serialized size, expires_at, job)
+        self._results: "OrderedDict[str, Tuple[int, float, Dict[str, Any]]]" = OrderedDict()
+        self._results_size = 0
+        self._last_purge = time.monotonic()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._db is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._db = await aiosqlite.connect(self.db_path, timeout=30)
+            await self._db.execute("PRAGMA journal_mode=WAL")
+            await self._db.execute("PRAGMA synchronous=NORMAL")
+            await self._db.executescript(SCHEMA)
+            await self._db.commit()
+        return self._db
+
+    async def put(self, request_id: str, job: Dict[str, Any]):
+        payload = json.dumps(job)
+        now = time.time()
+        db = await self._connection()
+        await db.execute(
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)",
+            (request_id, job["status"], job.get("message"), payload, now, now + self.ttl_seconds)
+        )
+        await db.commit()
+        self._forget(request_id)
+
+        if time.monotonic() - self._last_purge > self.purge_interval:
+            await self.purge_expired()
+
+    async def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        db = await self._connection()
+        async with db.execute(
+            "SELECT status, message FROM jobs WHERE request_id = ? AND expires_at >= ?",
+            (request_id, time.time())
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "message": row[1]}
+
+    async def get_result(self, request_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._results.get(request_id)
+        if entry is not None:
+            if entry[1] < time.time():
+                self._forget(request_id)
+                return None
+            self._results.move_to_end(request_id)
+            return entry[2]
+
+        db = await self._connection()
+        async with db.execute(
+            "SELECT payload, expires_at FROM jobs WHERE request_id = ? AND expires_at >= ?",
+            (request_id, time.time())
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+
+        job = json.loads(row[0])
+        if job["status"] != "processing":
+            self._remember(request_id, len(row[0]), row[1], job)
+        return job
+
+    async def delete(self, request_id: str):
+        db = await self._connection()
+        await db.execute("DELETE FROM jobs WHERE request_id = ?", (request_id,))
+        await db.commit()
+        self._forget(request_id)
+
+    def _remember(self, request_id: str, size: int, expires_at: float, job: Dict[str, Any]):
+        if size > self.memory_bytes:
+            return
+        self._forget(request_id)
+        self._results[request_id] = (size, expires_at, job)
+        self._results_size += size
+        while self._results_size > self.memory_bytes:
+            _, (evicted_size, _, _) = self._results.popitem(last=False)
+            self._results_size -= evicted_size
+
+    def _forget(self, request_id: str):
+        entry = self._results.pop(request_id, None)
+        if entry is not None:
+            self._results_size -= entry[0]
+
+    async def iter_results(self, status: str = "success", limit: int = 10000) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        db = await self._connection()
+        async with db.execute(
+            "SELECT request_id, payload FROM jobs WHERE status = ? AND expires_at >= ? ORDER BY updated_at DESC LIMIT ?",
+            (status, time.time(), limit)
+        ) as cursor:
+            async for request_id, payload in cursor:
+                yield request_id, json.loads(payload)
+
+    async def count(self) -> int:
+        db = await self._connection()
+        async with db.execute("SELECT COUNT(*) FROM jobs WHERE expires_at >= ?", (time.time(),)) as cursor:
+            return (await cursor.fetchone())[0]
+
+    async def purge_expired(self) -> int:
+        self._last_purge = time.monotonic()
+        db = await self._connection()
+        cursor = await db.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+        await db.commit()
+        if cursor.rowcount:
+            logger.info(f"Job store purged {cursor.rowcount} expired jobs")
+        return cursor.rowcount
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+def create_job_store(url: str, ttl_seconds: float, memory_bytes: int, max_memory_jobs: int) -> JobStore:
+    """Build a store from a URL such as 'sqlite:///data/jobs.db' or 'memory://'."""
+    if url.startswith("memory:"):
+        return MemoryJobStore(ttl_seconds=ttl_seconds, max_jobs=max_memory_jobs)
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):], ttl_seconds=ttl_seconds, memory_bytes=memory_bytes)
+    raise ValueError(f"Unsupported job store URL: {url}")
@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS match_cache (
+    cache_key TEXT PRIMARY KEY,
+    catalog_version TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_match_cache_created ON match_cache(created);
+"""
+
+# (product dict, score) pairs as returned by ProductCatalog matching
+Matches = List[Tuple[Dict[str, Any], float]]
+
+
+class MatchCache:
+    """Memo of catalog matches per canonical line item: bounded LRU with TTL, optionally over SQLite.
+
+    Matching runs inside executor threads and worker processes, so this cache is
+    synchronous and thread-safe. The SQLite tier lets every worker reuse matches
+    another one computed. Entries belong to one catalog version; seeing a new
+    version drops everything computed against the old one.
+    """
+
+    def __init__(self, db_path: str = "", max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, Matches]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._version: Optional[str] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.db_path:
+            return None
+        if self._db is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            self._db.commit()
+        return self._db
+
+    def _use_version(self, version: str):
+        if version == self._version:
+            return
+        if self._version is not None:
+            self.invalidations += 1
+            logger.info(f"Match cache invalidated: catalog {self._version} -> {version}")
+        self._memory.clear()
+        self._version = version
+        db = self._connection()
+        if db is not None:
+            db.execute("DELETE FROM match_cache WHERE catalog_version != ? OR created < ?",
+                       (version, time.time() - self.ttl_seconds))
+            db.commit()
+
+    def get_many(self, version: str, keys: List[str]) -> Dict[str, Matches]:
+        """Cached matches for those of `keys` that have a live entry"""
+        found: Dict[str, Matches] = {}
+        now = time.time()
+        with self._lock:
+            self._use_version(version)
+            missing = []
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and now - entry[0] > self.ttl_seconds:
+                    del self._memory[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    missing.append(key)
+                    continue
+                self._memory.move_to_end(key)
+                found[key] = entry[1]
+                self.memory_hits += 1
+
+            db = self._connection()
+            if db is not None and missing:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = db.execute(
+                        f"SELECT cache_key, payload, created FROM match_cache "
+                        f"WHERE catalog_version = ? AND created >= ? AND cache_key IN ({','.join('?' * len(chunk))})",
+                        (version, now - self.ttl_seconds, *chunk)
+                    ).fetchall()
+                    for key, payload, created in rows:
+                        matches = [(product, score) for product, score in json.loads(payload)]
+                        self._remember(key, created, matches)
+                        found[key] = matches
+                        self.disk_hits += 1
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, version: str, key: str) -> Optional[Matches]:
+        return self.get_many(version, [key]).get(key)
+
+    def put_many(self, version: str, entries: Dict[str, Matches]):
+        now = time.time()
+        with self._lock:
+            self._use_version(version)
+            for key, matches in entries.items():
+                self._remember(key, now, matches)
+            db = self._connection()
+            if db is not None and entries:
+                db.executemany(
+                    "INSERT OR REPLACE INTO match_cache VALUES (?, ?, ?, ?)",
+                    [(key, version, json.dumps(matches), now) for key, matches in entries.items()]
+                )
+                db.execute("DELETE FROM match_cache WHERE created < ?", (now - self.ttl_seconds,))
+                db.commit()
+
+    def put(self, version: str, key: str, matches: Matches):
+        self.put_many(version, {key: matches})
+
+    def _remember(self, key: str, created: float, matches: Matches):
+        self._memory[key] = (created, matches)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_entries = 0
+            db = self._connection()
+            if db is not None:
+                disk_entries = db.execute("SELECT COUNT(*) FROM match_cache").fetchone()[0]
+            return {
+                "catalog_version": self._version,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
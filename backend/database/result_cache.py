@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import aiosqlite
+
+from backend.database.eviction import evict_to_size
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS result_cache (
+    cache_key TEXT PRIMARY KEY,
+    catalog_version TEXT NOT NULL,
+    pricing_version TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_result_cache_access ON result_cache(last_access);
+-- Order in which catalog and pricing versions were first used, shared by every worker
+CREATE TABLE IF NOT EXISTS cache_versions (
+    kind TEXT NOT NULL,
+    version TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    PRIMARY KEY (kind, version)
+);
+"""
+
+
+def make_cache_key(document_hash: str, catalog_version: str, pricing_version: str) -> str:
+    return f"{document_hash}:{catalog_version}:{pricing_version}"
+
+
+class ResultCache:
+    """Two-tier cache of processed RFP results: in-process LRU in front of SQLite.
+
+    Both tiers are bounded by serialized size.
+    """
+
+    def __init__(self, db_path: str, memory_bytes: int = 64 * 1024 * 1024, max_db_bytes: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.memory_bytes = memory_bytes
+        self.max_db_bytes = max_db_bytes
+        # cache_key -> (serialized size, value)
+        self._memory: "OrderedDict[str, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._memory_size = 0
+        self._db: Optional[aiosqlite.Connection] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._db is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._db = await aiosqlite.connect(self.db_path)
+            await self._db.execute("PRAGMA journal_mode=WAL")
+            await self._db.executescript(SCHEMA)
+            await self._db.commit()
+        return self._db
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key][1]
+
+        db = await self._connection()
+        async with db.execute("SELECT payload FROM result_cache WHERE cache_key = ?", (key,)) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        await db.execute("UPDATE result_cache SET last_access = ? WHERE cache_key = ?", (time.time(), key))
+        await db.commit()
+        value = json.loads(row[0])
+        self._remember(key, len(row[0]), value)
+        self.disk_hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], catalog_version: str, pricing_version: str):
+        payload = json.dumps(value)
+        db = await self._connection()
+        await db.execute(
+            "INSERT OR REPLACE INTO result_cache VALUES (?, ?, ?, ?, ?, ?)",
+            (key, catalog_version, pricing_version, payload, len(payload), time.time())
+        )
+        await db.commit()
+        self._remember(key, len(payload), value)
+        await self._evict_to_size(db)
+
+    def _remember(self, key: str, size: int, value: Dict[str, Any]):
+        self._forget(key)
+        if size > self.memory_bytes:
+            return
+        self._memory[key] = (size, value)
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            _, (evicted_size, _) = self._memory.popitem(last=False)
+            self._memory_size -= evicted_size
+
+    def _forget(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_size -= entry[0]
+
+    async def _evict_to_size(self, db: aiosqlite.Connection):
+        evicted = await evict_to_size(db, "result_cache", "cache_key", self.max_db_bytes)
+        for key in evicted:
+            self._forget(key)
+        self.evictions += len(evicted)
+
+    async def purge_stale(self, catalog_version: str, pricing_version: str) -> int:
+        """Drop entries computed against a catalog or pricing parameter set older than these.
+
+        Workers pick up a new catalog at slightly different times, so "older"
+        means first used earlier, not merely different: a worker still on the
+        previous version must not purge entries of the one that replaces it.
+        """
+        db = await self._connection()
+        catalog_generation = await self._generation(db, "catalog", catalog_version)
+        pricing_generation = await self._generation(db, "pricing", pricing_version)
+        cursor = await db.execute(
+            "DELETE FROM result_cache WHERE catalog_version IN "
+            "(SELECT version FROM cache_versions WHERE kind = 'catalog' AND generation < ?) "
+            "OR pricing_version IN "
+            "(SELECT version FROM cache_versions WHERE kind = 'pricing' AND generation < ?)",
+            (catalog_generation, pricing_generation)
+        )
+        await db.commit()
+        suffix = f":{catalog_version}:{pricing_version}"
+        for key in [k for k in self._memory if not k.endswith(suffix)]:
+            self._forget(key)
+        if cursor.rowcount:
+            logger.info(f"Result cache purged {cursor.rowcount} stale entries")
+        return cursor.rowcount
+
+    async def _generation(self, db: aiosqlite.Connection, kind: str, version: str) -> int:
+        """Generation of a version, registering it as the newest if no worker has used it yet"""
+        await db.execute(
+            "INSERT OR IGNORE INTO cache_versions "
+            "SELECT ?, ?, COALESCE(MAX(generation), 0) + 1 FROM cache_versions WHERE kind = ?",
+            (kind, version, kind)
+        )
+        async with db.execute("SELECT generation FROM cache_versions WHERE kind = ? AND version = ?",
+                              (kind, version)) as cursor:
+            return (await cursor.fetchone())[0]
+
+    async def stats(self) -> Dict[str, Any]:
+        db = await self._connection()
+        async with db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM result_cache") as cursor:
+            entries, size = await cursor.fetchone()
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "disk_entries": entries,
+            "disk_bytes": size
+        }
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the tables change; older tables are dropped, they only hold short-lived bases
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revision_bases (
+    document_hash TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revision_links (
+    request_id TEXT PRIMARY KEY,
+    document_hash TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_revision_bases_expires ON revision_bases(expires_at);
+CREATE INDEX IF NOT EXISTS idx_revision_links_expires ON revision_links(expires_at);
+"""
+
+
+class RevisionStore:
+    """Line index and per-item results of processed documents, for processing later uploads as revisions.
+
+    Bases are stored per document hash and request ids link to them, so a
+    request answered from the result cache can be revised like any other.
+    Line digests (8 bytes per line) live in one file per document next to the
+    database; extraction streams them there instead of holding them in memory.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 86400, purge_interval: float = 600):
+        self.db_path = db_path
+        self.lines_dir = os.path.splitext(db_path)[0] + "_lines"
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self._db: Optional[aiosqlite.Connection] = None
+        self._last_purge = time.monotonic()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._db is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._db = await aiosqlite.connect(self.db_path)
+            await self._db.execute("PRAGMA journal_mode=WAL")
+            async with self._db.execute("PRAGMA user_version") as cursor:
+                version = (await cursor.fetchone())[0]
+            if version != SCHEMA_VERSION:
+                await self._db.executescript(
+                    f"DROP TABLE IF EXISTS revision_bases; DROP TABLE IF EXISTS revision_links; "
+                    f"PRAGMA user_version = {SCHEMA_VERSION};"
+                )
+            await self._db.executescript(SCHEMA)
+            await self._db.commit()
+        return self._db
+
+    def new_lines_path(self) -> str:
+        """A fresh path for extraction to write line digests to; put() moves the file into the store"""
+        os.makedirs(self.lines_dir, exist_ok=True)
+        return os.path.join(self.lines_dir, f"{uuid.uuid4().hex}.tmp")
+
+    def _lines_path(self, document_hash: str) -> str:
+        return os.path.join(self.lines_dir, f"{document_hash}.lines")
+
+    async def put(self, document_hash: str, base: Dict[str, Any], lines_path: str):
+        """Store a base; lines_path (from new_lines_path) holds the document's line digests"""
+        payload = json.dumps(base)
+        os.replace(lines_path, self._lines_path(document_hash))
+        db = await self._connection()
+        await db.execute(
+            "INSERT OR REPLACE INTO revision_bases VALUES (?, ?, ?)",
+            (document_hash, payload, time.time() + self.ttl_seconds)
+        )
+        await db.commit()
+
+        if time.monotonic() - self._last_purge > self.purge_interval:
+            await self.purge_expired()
+
+    async def link(self, request_id: str, document_hash: str):
+        db = await self._connection()
+        await db.execute(
+            "INSERT OR REPLACE INTO revision_links VALUES (?, ?, ?)",
+            (request_id, document_hash, time.time() + self.ttl_seconds)
+        )
+        # The base has to live as long as the newest request linking to it
+        await db.execute("UPDATE revision_bases SET expires_at = ? WHERE document_hash = ?",
+                         (time.time() + self.ttl_seconds, document_hash))
+        await db.commit()
+
+    async def has(self, request_id: str) -> bool:
+        db = await self._connection()
+        async with db.execute(
+            "SELECT 1 FROM revision_links l JOIN revision_bases b ON b.document_hash = l.document_hash "
+            "WHERE l.request_id = ? AND l.expires_at >= ? AND b.expires_at >= ?",
+            (request_id, time.time(), time.time())
+        ) as cursor:
+            return await cursor.fetchone() is not None
+
+    async def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Base of the document a request processed, if it is still kept"""
+        db = await self._connection()
+        async with db.execute(
+            "SELECT b.document_hash, b.payload FROM revision_links l "
+            "JOIN revision_bases b ON b.document_hash = l.document_hash "
+            "WHERE l.request_id = ? AND l.expires_at >= ? AND b.expires_at >= ?",
+            (request_id, time.time(), time.time())
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._lines_path(row[0]), "rb") as f:
+                line_hashes = f.read()
+        except FileNotFoundError:
+            return None
+        return {**json.loads(row[1]), "line_hashes": line_hashes}
+
+    async def purge_expired(self) -> int:
+        db = await self._connection()
+        now = time.time()
+        async with db.execute("SELECT document_hash FROM revision_bases WHERE expires_at < ?", (now,)) as cursor:
+            expired = [row[0] for row in await cursor.fetchall()]
+        bases = await db.execute("DELETE FROM revision_bases WHERE expires_at < ?", (now,))
+        links = await db.execute("DELETE FROM revision_links WHERE expires_at < ?", (now,))
+        await db.commit()
+        for document_hash in expired:
+            self.discard(self._lines_path(document_hash))
+        self._last_purge = time.monotonic()
+        return bases.rowcount + links.rowcount
+
+    def discard(self, lines_path: str):
+        try:
+            os.remove(lines_path)
+        except FileNotFoundError:
+            pass
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Dict, Any, Optional
+
+import aiosqlite
+
+from backend.database.eviction import evict_to_size
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrape_cache (
+    url_key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB NOT NULL,
+    page TEXT NOT NULL,
+    extractor_version INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scrape_cache_access ON scrape_cache(last_access);
+"""
+
+
+class ScrapeCache:
+    """On-disk cache of fetched pages: raw body (zlib), extracted page and validators."""
+
+    def __init__(self, db_path: str, ttl_seconds: float = 3600, max_bytes: int = 512 * 1024 * 1024):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._db: Optional[aiosqlite.Connection] = None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._db is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._db = await aiosqlite.connect(self.db_path)
+            await self._db.execute("PRAGMA journal_mode=WAL")
+            await self._db.executescript(SCHEMA)
+            await self._db.commit()
+        return self._db
+
+    async def get(self, url_key: str) -> Optional[Dict[str, Any]]:
+        """Entry with 'page', 'etag', 'last_modified', 'fresh' and 'extractor_version'; body loaded lazily"""
+        db = await self._connection()
+        async with db.execute(
+            "SELECT etag, last_modified, page, extractor_version, fetched_at FROM scrape_cache WHERE url_key = ?",
+            (url_key,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+
+        await db.execute("UPDATE scrape_cache SET last_access = ? WHERE url_key = ?", (time.time(), url_key))
+        await db.commit()
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "page": json.loads(row[2]),
+            "extractor_version": row[3],
+            "fresh": time.time() - row[4] < self.ttl_seconds
+        }
+
+    async def get_body(self, url_key: str) -> Optional[str]:
+        db = await self._connection()
+        async with db.execute("SELECT body FROM scrape_cache WHERE url_key = ?", (url_key,)) as cursor:
+            row = await cursor.fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    async def put(self, url_key: str, html: str, page: Dict[str, Any], etag: Optional[str],
+                  last_modified: Optional[str], extractor_version: int):
+        body = zlib.compress(html.encode("utf-8"), 6)
+        payload = json.dumps(page)
+        now = time.time()
+        db = await self._connection()
+        await db.execute(
+            "INSERT OR REPLACE INTO scrape_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url_key, etag, last_modified, body, payload, extractor_version,
+             len(body) + len(payload), now, now)
+        )
+        await db.commit()
+        await self._evict_to_size(db)
+
+    async def update_page(self, url_key: str, page: Dict[str, Any], extractor_version: int):
+        db = await self._connection()
+        await db.execute(
+            "UPDATE scrape_cache SET page = ?, extractor_version = ? WHERE url_key = ?",
+            (json.dumps(page), extractor_version, url_key)
+        )
+        await db.commit()
+
+    async def touch(self, url_key: str):
+        """Mark an entry fresh again after a 304 Not Modified"""
+        db = await self._connection()
+        await db.execute("UPDATE scrape_cache SET fetched_at = ? WHERE url_key = ?", (time.time(), url_key))
+        await db.commit()
+
+    async def _evict_to_size(self, db: aiosqlite.Connection):
+        evicted = await evict_to_size(db, "scrape_cache", "url_key", self.max_bytes)
+        self.evictions += len(evicted)
+
+    async def stats(self) -> Dict[str, Any]:
+        db = await self._connection()
+        async with db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scrape_cache") as cursor:
+            entries, size = await cursor.fetchone()
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size
+        }
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
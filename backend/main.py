@@ -1,25 +1,40 @@
 from datetime import datetime
-from io import BytesIO
-from fastapi import Response
-from fastapi.responses import JSONResponse
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import uvicorn
+import asyncio
+import json
 import uuid
+import zipfile
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
+from backend.agents.pricing_agent import PricingAgent
+from backend.config import settings
+from backend.database.job_store import create_job_store
+from backend.services.batch_processor import BatchProcessor
+from backend.services import metrics
+from backend.services.compression import CompressionMiddleware
 from backend.services.orchestrator import Orchestrator
-from backend.services.file_processor import FileProcessor
+from backend.services.profiling import Profiler
+from backend.services.progress import ProgressHub
+from backend.services.responses import FastJSONResponse, ndjson_chunks, paginate, parse_fields, select_fields
+from backend.services import subsystems
+from backend.services.file_processor import FileProcessor, UploadTooLargeError, shutdown_extraction_pool
+from backend.services.job_scheduler import JobScheduler, QueueFullError
+from backend.utils.validation import check_integer
 
 app = FastAPI(
     title="RFP Agentic AI System",
     version="2.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=FastJSONResponse
 )
 
 app.add_middleware(
@@ -28,164 +43,645 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_BYTES,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY
+)
+app.add_middleware(metrics.MetricsMiddleware)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="backend/templates")
 
-processing_results = {}
+ALLOWED_EXTENSIONS = ['.pdf', '.doc', '.docx', '.txt']
+
+job_store = create_job_store(
+    settings.JOB_STORE_URL,
+    ttl_seconds=settings.JOB_TTL_SECONDS,
+    memory_bytes=settings.JOB_STORE_MEMORY_BYTES,
+    max_memory_jobs=settings.JOB_STORE_MAX_MEMORY_JOBS
+)
 file_processor = FileProcessor()
 orchestrator = Orchestrator()
+progress_hub = ProgressHub(retention_seconds=settings.PROGRESS_RETENTION_SECONDS)
+profiler = Profiler()
+batch_processor = BatchProcessor(orchestrator, job_store, progress_hub)
+scheduler = JobScheduler(
+    workers=settings.SCHEDULER_WORKERS,
+    max_queue=settings.SCHEDULER_MAX_QUEUE,
+    tenant_limit=settings.SCHEDULER_TENANT_LIMIT,
+    executor_kind=settings.SCHEDULER_EXECUTOR
+)
+loop_lag = metrics.LoopLagMonitor(settings.LOOP_LAG_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+async def startup():
+    await scheduler.start()
+    loop_lag.start()
+    # Subsystems not named in WARM_UP load on their first request instead
+    await subsystems.warm_up(orchestrator, subsystems.parse_warm_up(settings.WARM_UP))
+
+@app.on_event("shutdown")
+async def shutdown():
+    await loop_lag.stop()
+    await scheduler.stop()
+    shutdown_extraction_pool()
+    profiler.shutdown()
+    await orchestrator.result_cache.close()
+    orchestrator.technical_agent.match_cache.close()
+    await orchestrator.revision_store.close()
+    await job_store.close()
+    await subsystems.close()
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
     return templates.TemplateResponse("index.html", {"request": {}})
 
 @app.post("/api/v1/upload-rfp")
-async def upload_rfp(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def upload_rfp(
+    file: UploadFile = File(...),
+    priority: int = 0,
+    revision_of: Optional[str] = None,
+    profile: bool = False,
+    x_tenant_id: str = Header("default"),
+    x_profile_token: Optional[str] = Header(None)
+):
+    """Upload an RFP; with revision_of (an earlier request id) it is processed as a revision of that
+    document, and the result carries a line-item delta against it. With profile=true (when profiling
+    is enabled) it is processed under the profiler; see /api/v1/profile/{request_id}"""
     try:
         if not file.filename:
             raise HTTPException(400, "No file provided")
+        if profile:
+            try:
+                profiler.check_request(x_profile_token)
+            except PermissionError as e:
+                raise HTTPException(403, str(e))
+        if revision_of is not None and not await orchestrator.revision_store.has(revision_of):
+            raise HTTPException(404, f"No revision data for request {revision_of} (unknown or expired)")
         
-        allowed_extensions = ['.pdf', '.doc', '.docx', '.txt']
         file_ext = os.path.splitext(file.filename)[1].lower()
-        if file_ext not in allowed_extensions:
-            raise HTTPException(400, f"Unsupported file type. Allowed: {allowed_extensions}")
+        if file_ext not in ALLOWED_EXTENSIONS:
+            raise HTTPException(400, f"Unsupported file type. Allowed: {ALLOWED_EXTENSIONS}")
         
         file_path = await file_processor.save_uploaded_file(file)
         request_id = str(uuid.uuid4())
         
-        processing_results[request_id] = {"status": "processing", "file_path": file_path}
+        cached = None
+        # A cached answer has nothing to profile
+        if revision_of is None and not profile:
+            cached = await orchestrator.get_cached_result(file_path, request_id=request_id)
+        if cached is not None:
+            await job_store.put(request_id, cached)
+            publish_result(request_id, cached)
+            return {
+                "request_id": request_id,
+                "status": "completed",
+                "message": "RFP already processed, cached result returned",
+                "filename": file.filename,
+                "cached": True
+            }
         
-        background_tasks.add_task(process_rfp_background, request_id, file_path)
+        await job_store.put(request_id, {"status": "processing", "file_path": file_path})
+        profile = profile or profiler.sampled()
+        
+        try:
+            position = scheduler.submit(
+                request_id,
+                lambda: process_rfp_background(request_id, file_path, revision_of, profile),
+                tenant=x_tenant_id,
+                priority=priority
+            )
+        except QueueFullError as e:
+            # The 429 carries no request id, so nothing may be left under it
+            await job_store.delete(request_id)
+            raise HTTPException(429, str(e), headers={"Retry-After": str(e.retry_after)})
+        progress_hub.publish(request_id, "queued", position=position)
         
         return {
             "request_id": request_id,
             "status": "processing",
             "message": "RFP uploaded and processing started",
-            "filename": file.filename
+            "filename": file.filename,
+            "profile": f"/api/v1/profile/{request_id}" if profile else None
         }
         
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(413, str(e))
     except Exception as e:
         raise HTTPException(500, f"Upload failed: {str(e)}")
 
+@app.post("/api/v1/upload-rfp-batch")
+async def upload_rfp_batch(
+    files: List[UploadFile] = File(...),
+    priority: int = 0,
+    x_tenant_id: str = Header("default")
+):
+    try:
+        documents = []
+        for file in files:
+            file_ext = os.path.splitext(file.filename or "")[1].lower()
+            if file_ext == ".zip":
+                zip_path = await file_processor.save_uploaded_file(file)
+                documents += await asyncio.to_thread(
+                    file_processor.unpack_zip, zip_path, ALLOWED_EXTENSIONS,
+                    settings.BATCH_MAX_DOCUMENTS - len(documents)
+                )
+            elif file_ext in ALLOWED_EXTENSIONS:
+                documents.append((file.filename, await file_processor.save_uploaded_file(file)))
+            else:
+                raise HTTPException(400, f"Unsupported file type: {file.filename}. Allowed: {ALLOWED_EXTENSIONS + ['.zip']}")
+            
+            if len(documents) > settings.BATCH_MAX_DOCUMENTS:
+                raise HTTPException(413, f"Batch exceeds {settings.BATCH_MAX_DOCUMENTS} documents")
+        
+        if not documents:
+            raise HTTPException(400, "No supported documents in batch")
+        
+        batch = await batch_processor.create_batch(documents)
+        try:
+            position = scheduler.submit(
+                batch["batch_id"],
+                lambda: batch_processor.run_batch(batch, executor=scheduler.executor),
+                tenant=x_tenant_id,
+                priority=priority
+            )
+        except QueueFullError as e:
+            # The 429 carries no batch id, so nothing may be left under it
+            await batch_processor.discard_batch(batch)
+            raise HTTPException(429, str(e), headers={"Retry-After": str(e.retry_after)})
+        progress_hub.publish(batch["batch_id"], "queued", position=position, documents=len(documents))
+        
+        return {
+            "batch_id": batch["batch_id"],
+            "status": "processing",
+            "documents": [
+                {"request_id": document["request_id"], "filename": document["filename"]}
+                for document in batch["documents"]
+            ]
+        }
+        
+    except HTTPException:
+        raise
+    except (UploadTooLargeError, zipfile.BadZipFile) as e:
+        raise HTTPException(413 if isinstance(e, UploadTooLargeError) else 400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"Batch upload failed: {str(e)}")
+
+@app.get("/api/v1/batch/{batch_id}")
+async def get_batch(batch_id: str):
+    batch = await job_store.get_result(batch_id)
+    if batch is None or "documents" not in batch:
+        raise HTTPException(404, "Batch not found")
+    return batch
+
 @app.get("/api/v1/quotation/{request_id}")
-async def get_quotation(request_id: str):
-    if request_id not in processing_results:
+async def get_quotation(request_id: str, wait: float = 0, fields: Optional[str] = None, format: str = "json"):
+    """With ?wait=N, hold the request up to N seconds for processing to finish instead of answering 425.
+    
+    ?fields=quotation.pricing_summary,quotation.line_items.product_id returns only those fields;
+    format=ndjson streams the quotation first and then one line per line item.
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(400, "Invalid format. Allowed: ['json', 'ndjson']")
+    response = quotation_response(request_id, await load_result(request_id, wait))
+    if format == "ndjson":
+        return StreamingResponse(ndjson_chunks(quotation_records(response, parse_fields(fields))),
+                                 media_type="application/x-ndjson")
+    return FastJSONResponse(select_fields(response, parse_fields(fields)))
+
+def quotation_records(response: Dict[str, Any], fields: Optional[Dict[str, Any]]):
+    """NDJSON records of a quotation: a header without line items, then each line item"""
+    quotation = response["quotation"]
+    header = {**response, "quotation": {key: value for key, value in quotation.items() if key != "line_items"}}
+    yield {"type": "quotation", **select_fields(header, fields)}
+    
+    item_fields = None
+    if fields is not None:
+        # Line items follow only if the selection includes them
+        quotation_fields = fields.get("quotation")
+        if quotation_fields is None or (quotation_fields and "line_items" not in quotation_fields):
+            return
+        item_fields = quotation_fields.get("line_items")
+    for index, line_item in enumerate(quotation.get("line_items", [])):
+        yield {"type": "line_item", "index": index, **select_fields(line_item, item_fields)}
+
+@app.get("/api/v1/quotation/{request_id}/line-items")
+async def get_quotation_line_items(request_id: str, cursor: Optional[str] = None, limit: int = None,
+                                   fields: Optional[str] = None):
+    """Quotation line items a page at a time; pass next_cursor back as ?cursor= for the next page"""
+    quotation = (await load_result(request_id))["quotation"]
+    return page_response(quotation.get("line_items", []), cursor, limit, fields)
+
+@app.get("/api/v1/quotation/{request_id}/items")
+async def get_extracted_items(request_id: str, cursor: Optional[str] = None, limit: int = None,
+                              fields: Optional[str] = None):
+    """Line items extracted from the RFP, paginated like /line-items"""
+    result = await load_result(request_id)
+    return page_response(result["extracted_data"].get("items", []), cursor, limit, fields)
+
+def body_integer(data: Dict[str, Any], name: str, default: int, upper: int = None) -> int:
+    """Positive integer field of a JSON body; missing gives default, larger than upper is capped, bad input a 400"""
+    value = data.get(name)
+    if value is None:
+        return default
+    try:
+        value = check_integer(name, value, lower=1)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return value if upper is None else min(value, upper)
+
+def page_response(records: List[Any], cursor: Optional[str], limit: Optional[int],
+                  fields: Optional[str]) -> FastJSONResponse:
+    limit = min(max(limit or settings.PAGE_SIZE_DEFAULT, 1), settings.PAGE_SIZE_MAX)
+    try:
+        return FastJSONResponse(paginate(records, cursor, limit, parse_fields(fields)))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+async def load_result(request_id: str, wait: float = 0) -> Dict[str, Any]:
+    """The stored result of a finished request; HTTP errors for unknown, pending and failed ones"""
+    job = await job_store.get(request_id)
+    if job is None:
         raise HTTPException(404, "Request not found")
     
-    result = processing_results[request_id]
+    if job["status"] == "processing" and wait > 0:
+        async for _ in follow_progress(request_id, timeout=min(wait, settings.LONG_POLL_MAX_SECONDS)):
+            pass
+        job = await job_store.get(request_id) or job
     
-    if result["status"] == "processing":
+    if job["status"] == "processing":
         raise HTTPException(425, "Processing not completed yet")
     
-    if result["status"] == "error":
-        raise HTTPException(500, f"Processing failed: {result.get('message', 'Unknown error')}")
+    if job["status"] == "error":
+        raise HTTPException(500, f"Processing failed: {job.get('message') or 'Unknown error'}")
     
-    return {
+    return await job_store.get_result(request_id)
+
+def quotation_response(request_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    response = {
         "request_id": request_id,
         "status": "completed",
         "quotation": result["quotation"]
     }
+    if "revision" in result:
+        response["revision"] = result["revision"]
+    return response
+
+@app.get("/api/v1/quotation/{request_id}/pdf")
+async def get_quotation_pdf(request_id: str):
+    quotation = (await load_result(request_id))["quotation"]
+    renderer = subsystems.get_pdf_renderer()
+    return await pdf_response(lambda: renderer.render_quotation(quotation), f"{quotation['quotation_id']}.pdf")
+
+async def pdf_response(render, filename: str) -> StreamingResponse:
+    renderer = subsystems.get_pdf_renderer()
+    try:
+        # Size and body come from the same open handle, so a concurrent eviction cannot split them
+        pdf, size = await renderer.open(render)
+    except Exception as e:
+        raise HTTPException(500, f"PDF generation failed: {str(e)}")
+    return StreamingResponse(
+        renderer.stream(pdf),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(size)
+        }
+    )
 
 @app.get("/api/v1/health")
 async def health_check():
     return {
         "status": "healthy",
         "service": "RFP Agentic AI System",
-        "version": "2.0.0"
+        "version": "2.0.0",
+        "subsystems": subsystems.status(orchestrator)
     }
 
-async def process_rfp_background(request_id: str, file_path: str):
+@app.post("/api/v1/warm-up")
+async def warm_up(subsystem: Optional[str] = None):
+    """Load subsystems ahead of traffic (all of them unless `subsystem` names some, comma separated)"""
     try:
-        result = await orchestrator.process_rfp(file_path)
-        processing_results[request_id] = result
-    except Exception as e:
-        processing_results[request_id] = {
-            "status": "error", 
-            "message": str(e)
-        }
+        names = subsystems.parse_warm_up(subsystem or "all")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {"warmed": await subsystems.warm_up(orchestrator, names)}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    metrics.JOB_STORE_JOBS.set(await job_store.count())
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/api/v1/scheduler/stats")
+async def scheduler_stats():
+    return scheduler.stats()
+
+@app.get("/api/v1/cache/stats")
+async def cache_stats():
+    return await orchestrator.result_cache.stats()
+
+@app.get("/api/v1/match-cache/stats")
+async def match_cache_stats():
+    """Line-item match cache hit rates of this process (workers in process mode keep their own)"""
+    return await asyncio.to_thread(orchestrator.technical_agent.match_cache.stats)
+
+@app.post("/api/v1/pricing/what-if")
+async def pricing_what_if(data: dict):
+    """Re-price stored quotations under alternative pricing parameters and report the deltas.
+
+    Body: {"parameters": {...}, "request_ids": [...] (default: every stored quotation),
+    "limit": n, "include_lines": bool}
+    """
+    from backend.services.pricing_engine import reprice
+
+    try:
+        agent = PricingAgent({**orchestrator.pricing_agent.parameters, **(data.get('parameters') or {})})
+    except (ValueError, TypeError) as e:
+        raise HTTPException(400, f"Invalid pricing parameters: {str(e)}")
+    
+    limit = body_integer(data, 'limit', 10000)
+    request_ids, quotations = [], []
+    if data.get('request_ids'):
+        for request_id in data['request_ids']:
+            result = await job_store.get_result(request_id)
+            if result is not None and result["status"] == "success":
+                request_ids.append(request_id)
+                quotations.append(result["quotation"])
+    else:
+        async for request_id, result in job_store.iter_results("success", limit):
+            request_ids.append(request_id)
+            quotations.append(result["quotation"])
+    
+    repriced = await asyncio.to_thread(reprice, agent, quotations, bool(data.get('include_lines')))
+    for request_id, entry in zip(request_ids, repriced):
+        entry["request_id"] = request_id
+    
+    previous_total = round(sum(entry["previous_final_amount"] for entry in repriced), 2)
+    repriced_total = round(sum(entry["final_amount"] for entry in repriced), 2)
+    return {
+        "parameters": agent.parameters,
+        "parameters_version": agent.parameters_version,
+        "quotations": len(repriced),
+        "previous_total": previous_total,
+        "repriced_total": repriced_total,
+        "delta": round(repriced_total - previous_total, 2),
+        "results": repriced
+    }
+
+@app.post("/api/v1/catalog/reload")
+async def reload_catalog():
+    catalog = orchestrator.technical_agent.catalog
+    if not await asyncio.to_thread(catalog.reload):
+        raise HTTPException(500, f"Catalog reload failed, still serving version {catalog.version}")
+    return {"status": "reloaded", "version": catalog.version, "products": len(catalog.index)}
+
+@app.get("/api/v1/profile/{request_id}")
+async def get_profile(request_id: str, format: str = "json"):
+    """Profile of a profiled upload: per-stage timings and allocation sites (json), or the
+    collapsed stacks for flamegraph.pl / speedscope (format=collapsed)"""
+    if format not in ("json", "collapsed"):
+        raise HTTPException(400, "Invalid format. Allowed: ['json', 'collapsed']")
+    if format == "collapsed":
+        path = profiler.collapsed_path(request_id)
+        if path is None:
+            raise HTTPException(404, "Profile not found (unknown, still running or expired)")
+        return FileResponse(path, media_type="text/plain", filename=f"{request_id}.folded")
+    report = await asyncio.to_thread(profiler.report, request_id)
+    if report is None:
+        raise HTTPException(404, "Profile not found (unknown, still running or expired)")
+    return report
+
+@app.get("/api/v1/progress/{job_id}")
+async def progress_events(job_id: str):
+    """Server-Sent Events for an RFP request or batch: queued, started, extracted, matched, priced, done/error"""
+    if await job_store.get(job_id) is None:
+        raise HTTPException(404, "Request not found")
+    
+    async def event_stream():
+        async for event in follow_progress(job_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
+@app.websocket("/api/v1/progress/{job_id}/ws")
+async def progress_socket(websocket: WebSocket, job_id: str):
+    """Same events as the SSE stream, as JSON messages; closed after the terminal event"""
+    await websocket.accept()
+    try:
+        async for event in follow_progress(job_id):
+            if event is not None:
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+def follow_progress(job_id: str, timeout: float = None):
+    return progress_hub.follow(
+        job_id,
+        fallback=lambda: job_outcome(job_id),
+        timeout=timeout,
+        poll_interval=settings.PROGRESS_POLL_SECONDS
+    )
+
+async def job_outcome(job_id: str) -> Optional[Dict[str, Any]]:
+    """Terminal event for a job that finished without this process seeing it (another worker, expired history)"""
+    job = await job_store.get(job_id)
+    if job is None:
+        return {"id": job_id, "stage": "error", "message": "Request not found"}
+    if job["status"] == "processing":
+        return None
+    if job["status"] == "error":
+        return {"id": job_id, "stage": "error", "message": job.get("message")}
+    return {"id": job_id, "stage": "done", "status": "completed"}
+
+def publish_result(request_id: str, result: Dict[str, Any]):
+    if result["status"] == "success":
+        progress_hub.publish(request_id, "done", status="completed", cached=bool(result.get("cached")),
+                             final_amount=result["quotation"]["pricing_summary"]["final_amount"])
+    else:
+        progress_hub.publish(request_id, "error", message=result.get("message"))
+
+async def process_rfp_background(request_id: str, file_path: str, revision_of: str = None,
+                                 profile: bool = False):
+    progress_hub.publish(request_id, "started", profiled=profile)
+    try:
+        if profile:
+            result = await profiler.process_rfp(file_path, request_id, revision_of)
+        else:
+            result = await orchestrator.process_rfp(file_path, check_cache=False, executor=scheduler.executor,
+                                                    progress=progress_hub.publisher(request_id),
+                                                    request_id=request_id, revision_of=revision_of)
+    except Exception as e:
+        result = {"status": "error", "message": str(e)}
+    await job_store.put(request_id, result)
+    publish_result(request_id, result)
 
-from fastapi import HTTPException
-import aiohttp
-from bs4 import BeautifulSoup
-import html2text
 
 @app.post("/api/v1/scrape-web")
 async def scrape_website(data: dict):
-    """Scrape website content"""
+    """Scrape website content, optionally following links up to `depth` hops.
+    
+    "fields": "title,wordCount,crawled" in the body returns only those fields.
+    """
+    from backend.services.web_scraper import CACHE_MODES, ScrapeCacheMiss, parse_depth
+    
+    web_scraper = subsystems.get_web_scraper()
+    url = data.get('url')
+    if not url:
+        raise HTTPException(400, "No URL provided")
+    cache_mode = data.get('cache', 'prefer')
+    if cache_mode not in CACHE_MODES:
+        raise HTTPException(400, f"Invalid cache mode. Allowed: {list(CACHE_MODES)}")
+    depth = parse_depth(data.get('depth', 0))
+    max_pages = body_integer(data, 'maxPages', settings.SCRAPE_MAX_PAGES, settings.SCRAPE_MAX_PAGES)
+    pages = web_scraper.crawl(url, depth=depth, max_pages=max_pages, cache_mode=cache_mode)
+    
+    if data.get('stream'):
+        async def page_lines():
+            try:
+                async for page in pages:
+                    yield json.dumps({key: value for key, value in page.items() if key != "link_urls"}) + "\n"
+            except Exception as e:
+                yield json.dumps({"url": url, "error": f"Scraping failed: {str(e)}"}) + "\n"
+        return StreamingResponse(page_lines(), media_type="application/x-ndjson")
+    
     try:
-        url = data.get('url')
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=10) as response:
-                html = await response.text()
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        
-       
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        text_maker = html2text.HTML2Text()
-        text_maker.ignore_links = False
-        text_maker.ignore_images = False
-        content = text_maker.handle(str(soup))
-        
+        scraped = [page async for page in pages]
+    except ScrapeCacheMiss as e:
+        raise HTTPException(504, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"Scraping failed: {str(e)}")
+    
+    first, others = scraped[0], [page for page in scraped[1:] if "error" not in page]
+    content = first["content"] + "".join(
+        f"\n\n---\n\n# {page['title']}\n{page['url']}\n\n{page['content']}" for page in others
+    )
+    return FastJSONResponse(select_fields({
+        "success": True,
+        "url": url,
+        "title": first["title"],
+        "content": content,
+        "wordCount": len(content.split()),
+        "links": first["links"],
+        "linkMap": first["link_map"],
+        "headings": first["headings"],
+        "pages": 1 + len(others),
+        "cache": first["cache"],
+        "crawled": [
+            {key: page.get(key) for key in ("url", "title", "wordCount", "cache", "error")}
+            for page in scraped
+        ],
+        "timestamp": datetime.now().isoformat()
+    }, parse_fields(data.get('fields'))))
+
+@app.post("/api/v1/scrape-rfp")
+async def scrape_rfp(
+    data: dict,
+    priority: int = 0,
+    x_tenant_id: str = Header("default")
+):
+    """Scrape tender pages and process their text as an RFP, without the PDF round-trip"""
+    from backend.services.web_scraper import CACHE_MODES, ScrapeCacheMiss, parse_depth
+    
+    web_scraper = subsystems.get_web_scraper()
+    urls = data.get('urls') or ([data['url']] if data.get('url') else [])
+    if not urls:
+        raise HTTPException(400, "No URL provided")
+    cache_mode = data.get('cache', 'prefer')
+    if cache_mode not in CACHE_MODES:
+        raise HTTPException(400, f"Invalid cache mode. Allowed: {list(CACHE_MODES)}")
+    depth = parse_depth(data.get('depth', 0))
+    max_pages = body_integer(data, 'maxPages', settings.SCRAPE_MAX_PAGES, settings.SCRAPE_MAX_PAGES)
+    
+    async def scrape(url: str) -> List[Dict[str, Any]]:
+        try:
+            return [page async for page in web_scraper.crawl(url, depth=depth, max_pages=max_pages,
+                                                             cache_mode=cache_mode)]
+        except ScrapeCacheMiss:
+            raise
+        except Exception as e:
+            # One unreachable start page should not sink the others
+            return [{"url": url, "error": str(e)}]
+    
+    try:
+        crawls = await asyncio.gather(*(scrape(url) for url in urls))
+    except ScrapeCacheMiss as e:
+        raise HTTPException(504, str(e))
+    except Exception as e:
+        raise HTTPException(502, f"Scraping failed: {str(e)}")
+    
+    pages = [page for crawl in crawls for page in crawl if "error" not in page]
+    if not pages:
+        # Nothing to quote from; an empty RFP would only price the default item
+        raise HTTPException(502, {
+            "message": "Scraping failed: no page could be fetched",
+            "errors": [{"url": page["url"], "error": page["error"]} for crawl in crawls for page in crawl]
+        })
+    text = "\n\n".join(f"# {page['title']}\n{page['url']}\n\n{page['content']}" for page in pages)
+    sources = [{"url": page["url"], "title": page["title"], "cache": page["cache"]} for page in pages]
+    request_id = str(uuid.uuid4())
+    
+    cached = await orchestrator.get_cached_result(text, is_text=True)
+    if cached is not None:
+        await job_store.put(request_id, cached)
+        publish_result(request_id, cached)
         return {
-            "success": True,
-            "url": url,
-            "title": soup.title.string if soup.title else "Scraped Document",
-            "content": content,
-            "wordCount": len(content.split()),
-            "links": len(soup.find_all('a')),
-            "timestamp": datetime.now().isoformat()
+            "request_id": request_id,
+            "status": "completed",
+            "message": "RFP already processed, cached result returned",
+            "sources": sources,
+            "cached": True
         }
-        
+    
+    await job_store.put(request_id, {"status": "processing", "sources": sources})
+    try:
+        position = scheduler.submit(
+            request_id,
+            lambda: process_rfp_text_background(request_id, text),
+            tenant=x_tenant_id,
+            priority=priority
+        )
+    except QueueFullError as e:
+        # The 429 carries no request id, so nothing may be left under it
+        await job_store.delete(request_id)
+        raise HTTPException(429, str(e), headers={"Retry-After": str(e.retry_after)})
+    progress_hub.publish(request_id, "queued", position=position)
+    
+    return {
+        "request_id": request_id,
+        "status": "processing",
+        "message": "Scraped RFP processing started",
+        "sources": sources
+    }
+
+async def process_rfp_text_background(request_id: str, text: str):
+    progress_hub.publish(request_id, "started")
+    try:
+        result = await orchestrator.process_rfp_text(text, check_cache=False, executor=scheduler.executor,
+                                                     progress=progress_hub.publisher(request_id))
     except Exception as e:
-        raise HTTPException(500, f"Scraping failed: {str(e)}")
+        result = {"status": "error", "message": str(e)}
+    await job_store.put(request_id, result)
+    publish_result(request_id, result)
+
+@app.get("/api/v1/scrape-web/cache/stats")
+async def scrape_cache_stats():
+    return await subsystems.get_web_scraper().cache.stats()
 
 @app.post("/api/v1/generate-pdf")
 async def generate_pdf(data: dict):
     """Generate PDF from scraped content"""
-    try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib.units import inch
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        
-        
-        styles = getSampleStyleSheet()
-        story = []
-        
-        
-        title = Paragraph(data.get('title', 'Scraped Content'), styles['Title'])
-        story.append(title)
-        story.append(Spacer(1, 0.2*inch))
-        
-        
-        content = Paragraph(data.get('content', ''), styles['Normal'])
-        story.append(content)
-        
-        
-        doc.build(story)
-        
-        
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
-        
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=scraped-{datetime.now().timestamp()}.pdf"
-            }
-        )
-        
-    except Exception as e:
-        raise HTTPException(500, f"PDF generation failed: {str(e)}")
+    renderer = subsystems.get_pdf_renderer()
+    return await pdf_response(lambda: renderer.render_content(data.get('title') or 'Scraped Content',
+                                                              data.get('content', '')),
+                              f"scraped-{datetime.now().timestamp()}.pdf")
+
 if __name__ == "__main__":
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
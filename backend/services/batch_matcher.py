@@ -0,0 +1,87 @@
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from backend.services.product_catalog import CatalogIndex, tokenize
+
+logger = logging.getLogger(__name__)
+
+NAME_POINTS = 40
+SPEC_POINTS = 20
+MAX_SCORE = 100
+
+
+def _postings(index: Dict[str, object], key: str) -> np.ndarray:
+    # array('I') exposes the buffer protocol, so this is a zero-copy view
+    return np.frombuffer(index[key], dtype=np.uint32)
+
+
+def match_batch(index: CatalogIndex, queries: List[Tuple[str, str]], min_score: float = 60,
+                limit: int = 3, block_size: int = 64) -> List[List[Tuple[int, int]]]:
+    """Score many (description, specifications) pairs against the catalog at once.
+
+    Returns, per query, up to `limit` (record index, score) pairs ordered exactly
+    as ProductCatalog.find_matches orders them.
+    """
+    results: List[List[Tuple[int, int]]] = []
+    for start in range(0, len(queries), block_size):
+        results.extend(_match_block(index, queries[start:start + block_size], min_score, limit))
+    return results
+
+
+def _match_block(index: CatalogIndex, queries: List[Tuple[str, str]], min_score: float,
+                 limit: int) -> List[List[Tuple[int, int]]]:
+    # token/spec key -> query rows containing it
+    name_rows: Dict[str, List[int]] = {}
+    spec_rows: Dict[str, List[int]] = {}
+    for row, (description, specs) in enumerate(queries):
+        for token in set(tokenize(description)):
+            if token in index.name_index:
+                name_rows.setdefault(token, []).append(row)
+        for key in index.spec_keys_in(tokenize(specs)):
+            spec_rows.setdefault(key, []).append(row)
+
+    # A name hit alone is worth NAME_POINTS, so below that threshold only spec
+    # hits can produce a match and the candidate set is the spec postings.
+    sources = [_postings(index.spec_index, key) for key in spec_rows]
+    if min_score < NAME_POINTS:
+        sources += [_postings(index.name_index, token) for token in name_rows]
+    if not sources:
+        return [[] for _ in queries]
+
+    candidates = np.unique(np.concatenate(sources))
+    column_of = np.full(len(index), -1, dtype=np.int64)
+    column_of[candidates] = np.arange(len(candidates))
+
+    name_hit = np.zeros((len(queries), len(candidates)), dtype=bool)
+    for token, rows in name_rows.items():
+        columns = column_of[_postings(index.name_index, token)]
+        columns = columns[columns >= 0]
+        if len(columns):
+            name_hit[np.ix_(rows, columns)] = True
+
+    spec_count = np.zeros((len(queries), len(candidates)), dtype=np.int16)
+    for key, rows in spec_rows.items():
+        columns = column_of[_postings(index.spec_index, key)]
+        # A product listing the same value twice counts twice, hence add.at
+        np.add.at(spec_count, (np.asarray(rows)[:, None], columns[None, :]), 1)
+
+    scores = np.minimum(name_hit * NAME_POINTS + spec_count * SPEC_POINTS, MAX_SCORE)
+
+    # Break score ties towards catalog order (candidates are sorted ascending)
+    width = len(candidates)
+    rank = scores.astype(np.int64) * width + (width - 1 - np.arange(width))
+
+    k = min(limit, width)
+    if k < width:
+        top = np.argpartition(-rank, k - 1, axis=1)[:, :k]
+    else:
+        top = np.broadcast_to(np.arange(width), (len(queries), k))
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(rank, top, axis=1), axis=1), axis=1)
+
+    results = []
+    for row in range(len(queries)):
+        results.append([(int(candidates[col]), int(scores[row, col])) for col in top[row]
+                        if scores[row, col] > min_score])
+    return results
@@ -0,0 +1,107 @@
+import logging
+import uuid
+from concurrent.futures import Executor
+from typing import Dict, Any, List, Tuple
+
+from backend.database.job_store import JobStore
+from backend.services.orchestrator import Orchestrator
+from backend.services.progress import ProgressHub
+
+logger = logging.getLogger(__name__)
+
+
+class BatchProcessor:
+    """Runs a bundle of RFP documents through the orchestrator as one job.
+
+    The batch record lives in the job store under the batch id; every
+    document also gets its own request id so its quotation can be fetched
+    through the regular quotation endpoint.
+    """
+
+    def __init__(self, orchestrator: Orchestrator, job_store: JobStore, progress_hub: ProgressHub = None):
+        self.orchestrator = orchestrator
+        self.job_store = job_store
+        self.progress_hub = progress_hub
+
+    async def create_batch(self, documents: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """documents: (filename, stored file path) pairs"""
+        batch_id = str(uuid.uuid4())
+        batch = {
+            "status": "processing",
+            "batch_id": batch_id,
+            "documents": [
+                {
+                    "request_id": str(uuid.uuid4()),
+                    "filename": filename,
+                    "file_path": file_path,
+                    "status": "queued"
+                }
+                for filename, file_path in documents
+            ],
+            "summary": self._summarize([])
+        }
+
+        await self.job_store.put(batch_id, batch)
+        for document in batch["documents"]:
+            await self.job_store.put(document["request_id"], {"status": "processing", "batch_id": batch_id})
+        return batch
+
+    async def discard_batch(self, batch: Dict[str, Any]):
+        """Remove the records create_batch wrote, for a batch that was never scheduled"""
+        await self.job_store.delete(batch["batch_id"])
+        for document in batch["documents"]:
+            await self.job_store.delete(document["request_id"])
+
+    async def run_batch(self, batch: Dict[str, Any], executor: Executor = None):
+        documents = batch["documents"]
+        results: List[Dict[str, Any]] = []
+
+        async def on_result(index: int, result: Dict[str, Any]):
+            document = documents[index]
+            document["status"] = "completed" if result["status"] == "success" else "error"
+            if result["status"] != "success":
+                document["message"] = result.get("message")
+            document["cached"] = bool(result.get("cached"))
+            results.append(result)
+
+            await self.job_store.put(document["request_id"], result)
+            batch["summary"] = self._summarize(results)
+            await self.job_store.put(batch["batch_id"], batch)
+            
+            if self.progress_hub is not None:
+                if result["status"] == "success":
+                    self.progress_hub.publish(document["request_id"], "done", status="completed")
+                else:
+                    self.progress_hub.publish(document["request_id"], "error", message=result.get("message"))
+                self.progress_hub.publish(batch["batch_id"], "document", request_id=document["request_id"],
+                                          status=document["status"], processed=len(results),
+                                          documents=len(documents))
+
+        try:
+            await self.orchestrator.process_batch(
+                [document["file_path"] for document in documents], on_result, executor=executor
+            )
+            batch["status"] = "completed"
+        except Exception as e:
+            logger.error(f"Batch {batch['batch_id']} failed: {e}")
+            batch["status"] = "error"
+            batch["message"] = str(e)
+        await self.job_store.put(batch["batch_id"], batch)
+        
+        if self.progress_hub is not None:
+            if batch["status"] == "completed":
+                self.progress_hub.publish(batch["batch_id"], "done", status="completed", summary=batch["summary"])
+            else:
+                self.progress_hub.publish(batch["batch_id"], "error", message=batch.get("message"))
+
+    def _summarize(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        succeeded = [result for result in results if result["status"] == "success"]
+        return {
+            "processed": len(results),
+            "succeeded": len(succeeded),
+            "failed": len(results) - len(succeeded),
+            "cached": sum(1 for result in succeeded if result.get("cached")),
+            "line_items": sum(len(result["quotation"]["line_items"]) for result in succeeded),
+            "total_amount": round(sum(result["quotation"]["pricing_summary"]["final_amount"]
+                                      for result in succeeded), 2)
+        }
@@ -0,0 +1,127 @@
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# PDFs and images are compressed already; text/event-stream is left alone so no event is held back
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/plain", "text/html", "text/css",
+                      "application/javascript", "text/javascript")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Preferred of br/gzip the client accepts (honouring q-values), br only if brotli is installed"""
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+    candidates = [name for name in (("br", "gzip") if brotli is not None else ("gzip",))
+                  if offered.get(name, offered.get("*", 0)) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda name: offered.get(name, offered.get("*", 0)))
+
+
+class _Encoder:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush, so each streamed chunk reaches the client without waiting for the next"""
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing JSON, NDJSON and text responses with br or gzip.
+
+    Whole bodies under `minimum_size` go out as they are. Streamed bodies are
+    compressed chunk by chunk with a flush after each, so NDJSON clients still
+    see lines as they are produced.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+        encoding = negotiate(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip()
+                passthrough = b"content-encoding" in headers or content_type not in COMPRESSIBLE_TYPES
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held until the first body chunk shows whether the response is streamed
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                if not more_body and len(body) < self.minimum_size:
+                    await send(start)
+                    start = None
+                    passthrough = True
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers = [(name, value) for name, value in start.get("headers", [])
+                           if name.lower() not in (b"content-length", b"vary")]
+                vary = {name.lower(): value for name, value in start.get("headers", [])}.get(b"vary")
+                headers += [(b"content-encoding", encoding.encode()),
+                            (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding")]
+                body = encoder.chunk(body) if more_body else encoder.finish(body)
+                if not more_body:
+                    headers.append((b"content-length", str(len(body)).encode()))
+                await send({**start, "headers": headers})
+                start = None
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+            body = encoder.chunk(body) if more_body else encoder.finish(body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,68 @@
+import logging
+import zipfile
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0"
+
+
+def detect_format(file_path: str) -> str:
+    """Sniff the document type from its leading bytes; stored uploads have no extension."""
+    with open(file_path, "rb") as f:
+        head = f.read(8)
+
+    if head.startswith(PDF_MAGIC):
+        return "pdf"
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+        return "binary"
+    if head.startswith(OLE_MAGIC):
+        return "doc"
+    return "text"
+
+
+# The functions below run inside worker processes, so they must stay
+# module-level and only take/return picklable values.
+
+def pdf_page_count(file_path: str) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    """Text of pages [start, end), one string per page."""
+    import pdfplumber
+
+    pages = []
+    with pdfplumber.open(file_path, pages=list(range(start + 1, end + 1))) as pdf:
+        for page in pdf.pages:
+            pages.append(page.extract_text() or "")
+            page.close()
+    return pages
+
+
+def extract_docx_lines(file_path: str) -> List[str]:
+    import docx
+
+    from docx.table import Table
+
+    document = docx.Document(file_path)
+    lines = []
+    # Body order, so an item table stays under the heading and spec lines that introduce it
+    for block in document.iter_inner_content():
+        if isinstance(block, Table):
+            for row in block.rows:
+                lines.append(" | ".join(cell.text.strip() for cell in row.cells))
+        else:
+            lines.append(block.text)
+    return lines
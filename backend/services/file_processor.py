@@ -1,26 +1,208 @@
 import os
+import re
+import uuid
+import asyncio
+import hashlib
 import aiofiles
 import logging
+import zipfile
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from fastapi import UploadFile
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services import document_extractors
 
 logger = logging.getLogger(__name__)
 
+SHA256_NAME = re.compile(r"[0-9a-f]{64}")
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+# Set in scheduler and profiling workers, which extract inline instead of each starting a pool
+_extract_inline = False
+
+def use_inline_extraction():
+    global _extract_inline
+    _extract_inline = True
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    global _extraction_pool
+    if _extraction_pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _extraction_pool = ProcessPoolExecutor(
+            max_workers=settings.EXTRACTION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _extraction_pool
+
+def shutdown_extraction_pool():
+    global _extraction_pool
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown(cancel_futures=True)
+        _extraction_pool = None
+
+class UploadTooLargeError(ValueError):
+    pass
+
 class FileProcessor:
-    def __init__(self):
-        self.upload_dir = "uploads"
-        os.makedirs(self.upload_dir, exist_ok=True)
+    def __init__(self, upload_dir: str = None, max_upload_bytes: int = None):
+        self.upload_dir = upload_dir or settings.UPLOAD_DIR
+        self.max_upload_bytes = max_upload_bytes or settings.MAX_UPLOAD_BYTES
+        self.tmp_dir = os.path.join(self.upload_dir, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
     
     async def save_uploaded_file(self, file: UploadFile) -> str:
-        file_path = os.path.join(self.upload_dir, file.filename)
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+        """Stream the upload to disk and store it under uploads/ab/cd/<sha256>"""
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_upload_bytes:
+                        raise UploadTooLargeError(f"File exceeds the {self.max_upload_bytes} byte upload limit")
+                    digest.update(chunk)
+                    await f.write(chunk)
+            
+            return self._commit(tmp_path, digest.hexdigest())
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def store_stream(self, stream: BinaryIO) -> str:
+        """Blocking counterpart of save_uploaded_file for file-like sources"""
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        
+        try:
+            with open(tmp_path, 'wb') as f:
+                while chunk := stream.read(settings.UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_upload_bytes:
+                        raise UploadTooLargeError(f"File exceeds the {self.max_upload_bytes} byte upload limit")
+                    digest.update(chunk)
+                    f.write(chunk)
+            return self._commit(tmp_path, digest.hexdigest())
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def unpack_zip(self, zip_path: str, allowed_extensions: List[str], max_members: int) -> List[Tuple[str, str]]:
+        """Store each allowed archive member; returns (member name, stored path) pairs"""
+        documents = []
+        with zipfile.ZipFile(zip_path) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or os.path.splitext(member.filename)[1].lower() not in allowed_extensions:
+                    continue
+                if len(documents) >= max_members:
+                    raise UploadTooLargeError(f"Archive has more than {max_members} documents")
+                # Members are decompressed chunk by chunk, never whole
+                with archive.open(member) as stream:
+                    documents.append((member.filename, self.store_stream(stream)))
+        return documents
+    
+    def _commit(self, tmp_path: str, content_hash: str) -> str:
+        file_path = self.storage_path(content_hash)
+        if os.path.exists(file_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.replace(tmp_path, file_path)
         return file_path
     
+    def storage_path(self, content_hash: str) -> str:
+        return os.path.join(self.upload_dir, content_hash[:2], content_hash[2:4], content_hash)
+    
+    @staticmethod
+    def content_hash(file_path: str) -> str:
+        name = os.path.basename(file_path)
+        if SHA256_NAME.fullmatch(name):
+            return name
+        # Not stored by save_uploaded_file; hash the contents
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
     async def extract_text(self, file_path: str) -> str:
+        return "".join([line async for line in self.iter_lines(file_path)])
+    
+    async def iter_lines(self, file_path: str) -> AsyncIterator[str]:
+        """Stream decoded lines in document order, whatever the file format"""
+        file_format = await asyncio.to_thread(document_extractors.detect_format, file_path)
+        
+        if file_format == "pdf":
+            lines = self._iter_pdf_lines(file_path)
+        elif file_format == "docx":
+            lines = self._iter_docx_lines(file_path)
+        else:
+            if file_format in ("doc", "binary"):
+                logger.warning(f"No extractor for {file_format} file {file_path}, reading as text")
+            lines = self._iter_text_lines(file_path)
+        
+        async for line in lines:
+            yield line
+    
+    async def _iter_text_lines(self, file_path: str) -> AsyncIterator[str]:
+        # Read in chunks: iterating the file itself costs a thread hop per line
+        async with aiofiles.open(file_path, 'rb') as f:
+            pending = b""
+            while chunk := await f.read(settings.UPLOAD_CHUNK_SIZE):
+                raw_lines = (pending + chunk).split(b"\n")
+                pending = raw_lines.pop()
+                for raw_line in raw_lines:
+                    yield self._decode_line(raw_line + b"\n")
+            if pending:
+                yield self._decode_line(pending)
+    
+    def _decode_line(self, raw_line: bytes) -> str:
         try:
-            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                return await f.read()
-        except:
-            async with aiofiles.open(file_path, 'r', encoding='latin-1') as f:
-                return await f.read()
+            return raw_line.decode('utf-8')
+        except UnicodeDecodeError:
+            return raw_line.decode('latin-1')
+    
+    async def _iter_pdf_lines(self, file_path: str) -> AsyncIterator[str]:
+        step = settings.PDF_PAGES_PER_TASK
+        if _extract_inline:
+            # Already in a worker process; a pool per worker would start workers x cpu_count processes
+            page_count = document_extractors.pdf_page_count(file_path)
+            for start in range(0, page_count, step):
+                for page_text in document_extractors.extract_pdf_pages(file_path, start, min(start + step, page_count)):
+                    for line in page_text.splitlines():
+                        yield line + "\n"
+            return
+        
+        loop = asyncio.get_running_loop()
+        pool = get_extraction_pool()
+        page_count = await loop.run_in_executor(pool, document_extractors.pdf_page_count, file_path)
+        
+        ranges = deque((start, min(start + step, page_count)) for start in range(0, page_count, step))
+        
+        # Keep a bounded number of page ranges in flight and yield them in order
+        in_flight = deque()
+        max_in_flight = settings.EXTRACTION_WORKERS * 2
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < max_in_flight:
+                    start, end = ranges.popleft()
+                    in_flight.append(loop.run_in_executor(
+                        pool, document_extractors.extract_pdf_pages, file_path, start, end
+                    ))
+                for page_text in await in_flight.popleft():
+                    for line in page_text.splitlines():
+                        yield line + "\n"
+        finally:
+            for future in in_flight:
+                future.cancel()
+    
+    async def _iter_docx_lines(self, file_path: str) -> AsyncIterator[str]:
+        for line in await asyncio.to_thread(document_extractors.extract_docx_lines, file_path):
+            yield line + "\n"
@@ -0,0 +1,154 @@
+import re
+from typing import Dict, Any, List, Optional
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml import etree
+
+# Bump when extract_page output changes so cached pages are re-extracted from their stored body
+EXTRACTOR_VERSION = 1
+
+WHITESPACE = re.compile(r"\s+")
+
+DROP_TAGS = ("script", "style", "noscript", "template", "svg", "iframe")
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "header", "footer", "main", "aside", "nav", "form",
+    "ul", "ol", "li", "dl", "dt", "dd", "table", "thead", "tbody", "tfoot", "tr",
+    "blockquote", "figure", "figcaption", "address", "hr", "pre", "body"
+} | set(HEADING_TAGS)
+
+
+class _MarkdownBuilder:
+    """Accumulates inline text into markdown blocks during a single tree walk"""
+
+    def __init__(self):
+        self.blocks: List[str] = []
+        self.inline: List[str] = []
+        self.prefix = ""
+        self.cells: Optional[List[str]] = None
+        self.table_block: Optional[int] = None
+
+    def text(self, value: Optional[str], preformatted: bool = False):
+        if not value:
+            return
+        self.inline.append(value if preformatted else WHITESPACE.sub(" ", value))
+
+    def take_inline(self) -> str:
+        value = "".join(self.inline).strip()
+        self.inline = []
+        return value
+
+    def flush(self):
+        value = self.take_inline()
+        if value:
+            self.blocks.append(self.prefix + value)
+        self.prefix = ""
+
+    def markdown(self) -> str:
+        self.flush()
+        return "\n\n".join(self.blocks) + "\n"
+
+
+def extract_page(html: str, url: str) -> Dict[str, Any]:
+    """Parse once and derive title, markdown content, link map, heading map and word count.
+
+    Module-level and picklable so it can run in a process pool.
+    """
+    if not html.strip():
+        html = "<html></html>"
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        # lxml rejects str input carrying an XML encoding declaration
+        root = lxml.html.document_fromstring(html.encode("utf-8", errors="replace"))
+
+    for element in list(root.iter(*DROP_TAGS)):
+        element.drop_tree()
+
+    title_element = root.find(".//title")
+    title = WHITESPACE.sub(" ", title_element.text_content()).strip() if title_element is not None else ""
+    body = root.find("body")
+    if body is None:
+        body = root
+
+    builder = _MarkdownBuilder()
+    links: List[Dict[str, str]] = []
+    headings: List[Dict[str, Any]] = []
+    anchor_starts: List[int] = []
+    pre_depth = 0
+
+    for event, element in etree.iterwalk(body, events=("start", "end")):
+        tag = element.tag if isinstance(element.tag, str) else None
+
+        if event == "start":
+            if tag is None:
+                # Comments and processing instructions: only their tail is content
+                continue
+            if tag in BLOCK_TAGS:
+                builder.flush()
+            if tag == "pre":
+                pre_depth += 1
+            elif tag == "li":
+                builder.prefix = "* "
+            elif tag in HEADING_TAGS:
+                builder.prefix = "#" * HEADING_TAGS[tag] + " "
+            elif tag == "table":
+                builder.table_block = None
+            elif tag == "tr":
+                builder.cells = []
+            elif tag == "a":
+                anchor_starts.append(len(builder.inline))
+            elif tag == "br":
+                builder.inline.append("\n")
+            elif tag == "img" and element.get("alt"):
+                builder.text(f"![{element.get('alt')}]({urljoin(url, element.get('src', ''))})")
+            builder.text(element.text, pre_depth > 0)
+            continue
+
+        # end event
+        if tag in HEADING_TAGS:
+            text = "".join(builder.inline).strip()
+            if text:
+                headings.append({"level": HEADING_TAGS[tag], "text": text})
+            builder.flush()
+        elif tag == "a" and anchor_starts:
+            start = anchor_starts.pop()
+            text = "".join(builder.inline[start:]).strip()
+            href = element.get("href")
+            if href and not href.startswith(("javascript:", "mailto:", "#")):
+                absolute = urljoin(url, href)
+                links.append({"text": text, "url": absolute})
+                builder.inline[start:] = [f"[{text}]({absolute})" if text else ""]
+        elif tag in ("td", "th") and builder.cells is not None:
+            builder.cells.append(builder.take_inline())
+        elif tag == "tr" and builder.cells is not None:
+            if any(builder.cells):
+                row = "| " + " | ".join(builder.cells) + " |"
+                # Rows of one table stay on consecutive lines
+                if builder.table_block is None:
+                    builder.table_block = len(builder.blocks)
+                    builder.blocks.append(row)
+                else:
+                    builder.blocks[builder.table_block] += "\n" + row
+            builder.cells = None
+        elif tag == "pre":
+            pre_depth -= 1
+            builder.blocks.append("```\n" + "".join(builder.inline).strip("\n") + "\n```")
+            builder.inline = []
+        elif tag in BLOCK_TAGS:
+            builder.flush()
+
+        builder.text(element.tail, pre_depth > 0)
+
+    content = builder.markdown()
+    return {
+        "url": url,
+        "title": title or "Scraped Document",
+        "content": content,
+        "wordCount": len(content.split()),
+        "links": len(root.findall(".//a")),
+        "link_urls": [link["url"] for link in links],
+        "link_map": links,
+        "headings": headings
+    }
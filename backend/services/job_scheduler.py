@@ -0,0 +1,162 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import math
+import multiprocessing
+import time
+from collections import deque, defaultdict
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Callable, Awaitable, List, Optional, Set
+
+from backend.services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _QueuedJob:
+    __slots__ = ("sort_key", "job_id", "tenant", "run", "submitted_at")
+
+    def __init__(self, sort_key: tuple, job_id: str, tenant: str, run: Callable[[], Awaitable[Any]]):
+        self.sort_key = sort_key
+        self.job_id = job_id
+        self.tenant = tenant
+        self.run = run
+        self.submitted_at = time.monotonic()
+
+    def __lt__(self, other: "_QueuedJob") -> bool:
+        return self.sort_key < other.sort_key
+
+
+class JobScheduler:
+    """Bounded, priority-ordered job queue drained by a fixed number of workers.
+
+    Jobs are coroutines started on the event loop; their CPU-bound work is
+    expected to run on `self.executor`, which the scheduler owns and sizes to
+    the worker count. A tenant never has more than `tenant_limit` jobs running,
+    so one tenant's burst cannot starve the others.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 100, tenant_limit: int = 2,
+                 executor_kind: str = "thread"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.tenant_limit = tenant_limit
+        self.executor_kind = executor_kind
+        self.executor: Optional[Executor] = None
+
+        self._queue: List[_QueuedJob] = []
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        self._tasks: List[asyncio.Task] = []
+        # The loop only keeps weak references to tasks; these must not be collected before they run
+        self._notifications: Set[asyncio.Task] = set()
+        self._running: Dict[str, int] = defaultdict(int)
+
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def start(self):
+        if self._tasks:
+            return
+        if self.executor_kind == "process":
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rfp-job")
+        self._condition = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        logger.info(f"Job scheduler started: {self.workers} {self.executor_kind} workers, queue {self.max_queue}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def submit(self, job_id: str, run: Callable[[], Awaitable[Any]], tenant: str = "default",
+               priority: int = 0) -> int:
+        """Queue a job; higher priority runs first. Returns the queue position."""
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+
+        job = _QueuedJob((-priority, next(self._sequence)), job_id, tenant, run)
+        position = bisect.bisect(self._queue, job)
+        self._queue.insert(position, job)
+        metrics.JOBS_QUEUED.set(len(self._queue))
+        task = asyncio.get_running_loop().create_task(self._notify())
+        self._notifications.add(task)
+        task.add_done_callback(self._notifications.discard)
+        return position
+
+    async def _notify(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    def _pop_runnable(self) -> Optional[_QueuedJob]:
+        for position, job in enumerate(self._queue):
+            if self._running[job.tenant] < self.tenant_limit:
+                return self._queue.pop(position)
+        return None
+
+    async def _worker(self, number: int):
+        while True:
+            async with self._condition:
+                job = self._pop_runnable()
+                while job is None:
+                    await self._condition.wait()
+                    job = self._pop_runnable()
+                self._running[job.tenant] += 1
+            metrics.JOBS_QUEUED.set(len(self._queue))
+            metrics.JOBS_RUNNING.inc()
+
+            started = time.monotonic()
+            self._wait_times.append(started - job.submitted_at)
+            metrics.JOB_WAIT_SECONDS.observe(started - job.submitted_at)
+            try:
+                await job.run()
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Job {job.job_id} failed: {e}")
+            finally:
+                self._run_times.append(time.monotonic() - started)
+                self._running[job.tenant] -= 1
+                metrics.JOBS_RUNNING.dec()
+                # A finished job may unblock a tenant-limited job further down the queue
+                await self._notify()
+
+    def retry_after(self) -> int:
+        average_run = sum(self._run_times) / len(self._run_times) if self._run_times else 1.0
+        return max(1, math.ceil(average_run * (len(self._queue) + 1) / self.workers))
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_times)
+        return {
+            "workers": self.workers,
+            "executor": self.executor_kind,
+            "queue_depth": len(self._queue),
+            "queue_capacity": self.max_queue,
+            "running": sum(self._running.values()),
+            "running_by_tenant": {tenant: count for tenant, count in self._running.items() if count},
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_seconds_avg": round(sum(waits) / len(waits), 4) if waits else 0.0,
+            "wait_seconds_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else 0.0
+        }
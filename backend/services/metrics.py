@@ -0,0 +1,119 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Any, Deque, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Stage latencies span sub-millisecond matching to multi-second PDF extraction
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "rfp_stage_seconds", "Orchestrator stage latency, including the executor hop",
+    ["stage"], buckets=LATENCY_BUCKETS
+)
+ITEMS = Counter("rfp_items_total", "RFP line items by outcome", ["outcome"])
+MATCH_CACHE_LOOKUPS = Counter("match_cache_lookups_total", "Line-item match cache lookups by outcome", ["outcome"])
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status",
+                        ["method", "route", "status"])
+
+JOBS_RUNNING = Gauge("rfp_jobs_in_flight", "Jobs currently running on the scheduler")
+JOBS_QUEUED = Gauge("rfp_jobs_queued", "Jobs waiting in the scheduler queue")
+JOB_WAIT_SECONDS = Histogram("rfp_job_queue_wait_seconds", "Time jobs spend queued before starting",
+                             buckets=LATENCY_BUCKETS)
+JOB_STORE_JOBS = Gauge("rfp_job_store_jobs", "Unexpired jobs and results in the job store")
+
+SCRAPE_BYTES = Counter("scrape_bytes_fetched_total", "Response body bytes read by the web scraper")
+SCRAPE_PAGES = Counter("scrape_pages_total", "Scraped pages by scrape cache outcome", ["cache"])
+
+PDF_RENDER_SECONDS = Histogram("pdf_render_seconds", "PDF render time in the worker pool", ["kind"],
+                               buckets=LATENCY_BUCKETS)
+PDF_REQUESTS = Counter("pdf_requests_total", "PDF requests by kind and whether the cached file was reused",
+                       ["kind", "outcome"])
+
+EVENT_LOOP_LAG_SECONDS = Histogram("event_loop_lag_seconds", "How much later than scheduled the event loop "
+                                   "woke a sleeping monitor task", buckets=LATENCY_BUCKETS)
+
+
+def record_result(result: Dict[str, Any]):
+    """Count extracted/matched/unmatched items of a successful pipeline result"""
+    extracted = len(result["extracted_data"]["items"])
+    matched = len(result["quotation"]["line_items"])
+    ITEMS.labels(outcome="extracted").inc(extracted)
+    ITEMS.labels(outcome="matched").inc(matched)
+    ITEMS.labels(outcome="unmatched").inc(extracted - matched)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request, labelled by route template.
+
+    The route template (not the raw path) keeps label cardinality bounded.
+    Streaming responses are timed until their last body chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Mounted apps (static files) have no route object, only their mount path
+            template = getattr(route, "path", None) or scope.get("root_path") or "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_SECONDS.labels(method=method, route=template).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method=method, route=template, status=str(status[0])).inc()
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how late a task sleeping `interval` at a time gets to run again.
+
+    Every request on the loop waits that long on top of its own work, so a
+    blocking call in one handler shows up here for all of them. The last
+    `history` samples are kept as (perf_counter, lag) pairs.
+    """
+
+    def __init__(self, interval: float, history: int = 0):
+        self.interval = interval
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=history)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(now - expected, 0.0)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            self.samples.append((now, lag))
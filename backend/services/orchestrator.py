@@ -1,48 +1,347 @@
+import asyncio
+import hashlib
 import logging
-from backend.agents.sales_agent import SalesAgent
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from backend.agents.sales_agent import RFPScanner, SalesAgent
 from backend.agents.technical_agent import TechnicalAgent  
 from backend.agents.pricing_agent import PricingAgent
-from backend.services.file_processor import FileProcessor
+from backend.config import settings
+from backend.database.result_cache import ResultCache, make_cache_key
+from backend.database.revision_store import RevisionStore
+from backend.services import metrics
+from backend.services.file_processor import FileProcessor, use_inline_extraction
+from backend.services.profiling import active_profile
+from backend.services.revisions import line_item_delta, priced_items
 
 logger = logging.getLogger(__name__)
 
+ProgressCallback = Optional[Callable[[str, Dict[str, Any]], None]]
+
 class Orchestrator:
-    def __init__(self):
+    def __init__(self, result_cache: ResultCache = None, revision_store: RevisionStore = None):
         self.sales_agent = SalesAgent()
         self.technical_agent = TechnicalAgent()
         self.pricing_agent = PricingAgent()
         self.file_processor = FileProcessor()
+        self.result_cache = result_cache or ResultCache(
+            settings.RESULT_CACHE_PATH,
+            memory_bytes=settings.RESULT_CACHE_MEMORY_BYTES,
+            max_db_bytes=settings.RESULT_CACHE_MAX_BYTES
+        )
+        self.revision_store = revision_store or RevisionStore(settings.REVISION_STORE_PATH, settings.JOB_TTL_SECONDS)
+        self._cache_versions: Optional[Tuple[str, str]] = None
+    
+    async def _document_hash(self, source: str, is_text: bool = False) -> str:
+        """sha256 of the document; text is hashed as UTF-8 so it shares keys with an identical uploaded .txt"""
+        if is_text:
+            return hashlib.sha256(source.encode("utf-8")).hexdigest()
+        return await asyncio.to_thread(self.file_processor.content_hash, source)
+    
+    async def _cache_key(self, document_hash: str) -> Tuple[str, str, str]:
+        """Key results by document, catalog version and pricing parameters"""
+        versions = (await self.technical_agent.current_catalog_version(), self.pricing_agent.parameters_version)
+        
+        if versions != self._cache_versions:
+            await self.result_cache.purge_stale(*versions)
+            self._cache_versions = versions
+        
+        return make_cache_key(document_hash, *versions), versions[0], versions[1]
     
-    async def process_rfp(self, file_path: str) -> dict:
+    async def get_cached_result(self, source: str, is_text: bool = False, request_id: str = None) -> Optional[dict]:
+        """Cached result for a stored file, or for raw text when is_text is set.
+        
+        On a hit, request_id is linked to the document so it can be revised later.
+        """
         try:
-            text_content = await self.file_processor.extract_text(file_path)
-            
-            extracted_data = await self.sales_agent.extract_rfp_data(text_content)
+            document_hash = await self._document_hash(source, is_text)
+            key, _, _ = await self._cache_key(document_hash)
+            cached = await self.result_cache.get(key)
+            if cached is not None and request_id is not None:
+                await self.revision_store.link(request_id, document_hash)
+        except Exception as e:
+            logger.warning(f"Result cache lookup failed: {e}")
+            return None
+        
+        if cached is None:
+            return None
+        return {**cached, "quotation": self.pricing_agent.restamp(cached["quotation"]), "cached": True}
+    
+    async def process_rfp(self, file_path: str, check_cache: bool = True, executor: Executor = None,
+                          progress: ProgressCallback = None, request_id: str = None,
+                          revision_of: str = None) -> dict:
+        """Run the agent pipeline; with an executor the CPU-bound stages run there.
+        
+        progress(stage, data) is called after each stage: extracted, matched, priced.
+        The document's line index is kept under request_id; revision_of names an
+        earlier request whose document this one revises, and only what changed
+        is re-extracted and re-matched.
+        """
+        try:
+            base = None
+            if revision_of is not None:
+                base = await self.revision_store.get(revision_of)
+                if base is None:
+                    raise ValueError(f"No revision data for request {revision_of}")
+            elif check_cache:
+                cached = await self.get_cached_result(file_path, request_id=request_id)
+                if cached is not None:
+                    return cached
             
-            matched_items = []
-            for item in extracted_data['items']:
-                matches = await self.technical_agent.find_product_matches(
-                    item['item_name'], item['specifications']
-                )
-                if matches:
-                    best_match = matches[0]
-                    matched_items.append({
-                        **item,
-                        "matched_product": best_match['product'],
-                        "match_score": best_match['match_score'],
-                        "reasoning": best_match['reasoning']
-                    })
+            lines_path = self.revision_store.new_lines_path()
+            try:
+                if base is None:
+                    extracted_data, index = await self._run(executor, "extract_tracked_stage", file_path, lines_path)
+                    result, entries = await self._match_and_price(executor, extracted_data, progress)
+                else:
+                    result, index, entries = await self._run_revision(executor, file_path, base, revision_of,
+                                                                      lines_path, progress)
+                
+                document_hash = await self._document_hash(file_path)
+                # The delta is against revision_of only; a later plain upload of this document must not get it
+                plain = {key: value for key, value in result.items() if key != "revision"}
+                await self._store_result(file_path, plain, document_hash=document_hash)
+                await self._store_revision_base(document_hash, request_id, result, index, entries, lines_path)
+            finally:
+                # Already moved into the store unless something failed
+                self.revision_store.discard(lines_path)
+            return result
             
-            quotation = await self.pricing_agent.generate_quotation(
-                extracted_data['company_info'], matched_items
-            )
+        except Exception as e:
+            logger.error(f"Processing failed: {e}")
+            return {"status": "error", "message": str(e)}
+    
+    async def process_rfp_text(self, text: str, check_cache: bool = True, executor: Executor = None,
+                               progress: ProgressCallback = None) -> dict:
+        """Same as process_rfp for text already in memory (e.g. scraped pages); nothing touches disk"""
+        try:
+            if check_cache:
+                cached = await self.get_cached_result(text, is_text=True)
+                if cached is not None:
+                    return cached
             
-            return {
-                "status": "success",
-                "extracted_data": extracted_data,
-                "quotation": quotation
-            }
+            result = await self._run_stages(executor, "extract_text_stage", text, progress)
+            await self._store_result(text, result, is_text=True)
+            return result
             
         except Exception as e:
             logger.error(f"Processing failed: {e}")
             return {"status": "error", "message": str(e)}
+    
+    async def _run_stages(self, executor: Optional[Executor], extract_method: str, source: str,
+                          progress: ProgressCallback) -> dict:
+        # One executor call per stage so progress is reported between them
+        extracted_data = await self._run(executor, extract_method, source)
+        result, _ = await self._match_and_price(executor, extracted_data, progress)
+        return result
+    
+    async def _match_and_price(self, executor: Optional[Executor], extracted_data: dict,
+                               progress: ProgressCallback) -> Tuple[dict, List[Optional[dict]]]:
+        self._emit(progress, "extracted", items=len(extracted_data['items']),
+                   company=extracted_data['company_info']['name'])
+        entries = await self._run(executor, "match_stage", extracted_data['items'])
+        return await self._price(executor, extracted_data, entries, progress), entries
+    
+    async def _price(self, executor: Optional[Executor], extracted_data: dict, entries: List[Optional[dict]],
+                     progress: ProgressCallback) -> dict:
+        matched_items = [entry for entry in entries if entry is not None]
+        self._emit(progress, "matched", matched=len(matched_items), items=len(entries))
+        
+        result = await self._run(executor, "quote_stage", extracted_data, matched_items)
+        metrics.record_result(result)
+        quotation = result["quotation"]
+        self._emit(progress, "priced", quotation_id=quotation["quotation_id"],
+                   final_amount=quotation["pricing_summary"]["final_amount"])
+        return result
+    
+    async def _run_revision(self, executor: Optional[Executor], file_path: str, base: dict, revision_of: str,
+                            lines_path: str, progress: ProgressCallback) -> Tuple[dict, dict, List[Optional[dict]]]:
+        extracted_data, index, pairs, reused = await self._run(executor, "extract_revision_stage", file_path, base,
+                                                               lines_path)
+        items = extracted_data['items']
+        self._emit(progress, "extracted", items=len(items), company=extracted_data['company_info']['name'],
+                   reused=len(reused))
+        
+        # Prior matches stand only if the catalog they came from is still the one in use
+        catalog_version = await self.technical_agent.current_catalog_version()
+        reusable = set(reused) if base["catalog_version"] == catalog_version else set()
+        entries = [base["entries"][pairs[i]] if i in reusable else None for i in range(len(items))]
+        pending = [i for i in range(len(items)) if i not in reusable]
+        if pending:
+            matched = await self._run(executor, "match_stage", [items[i] for i in pending])
+            for i, entry in zip(pending, matched):
+                entries[i] = entry
+        
+        result = await self._price(executor, extracted_data, entries, progress)
+        before = priced_items(base["items"], base["entries"], base["line_items"])
+        after = priced_items(items, entries, result["quotation"]["line_items"])
+        final_before = base["final_amount"]
+        final_after = result["quotation"]["pricing_summary"]["final_amount"]
+        result["revision"] = {
+            "revision_of": revision_of,
+            "items_reused": len(reused),
+            "items_reextracted": len(items) - len(reused),
+            "items_rematched": len(pending),
+            "final_amount": {"before": final_before, "after": final_after,
+                             "change": round(final_after - final_before, 2)},
+            **line_item_delta(before, after, pairs)
+        }
+        return result, index, entries
+    
+    def _emit(self, progress: ProgressCallback, stage: str, **data):
+        if progress is None:
+            return
+        try:
+            progress(stage, data)
+        except Exception as e:
+            logger.warning(f"Progress callback failed at {stage}: {e}")
+    
+    async def process_batch(self, file_paths: List[str], on_result: Callable[[int, dict], Awaitable[None]],
+                            executor: Executor = None, depth: int = 2):
+        """Pipeline many documents: extraction of the next document overlaps
+        matching and pricing of the previous one. on_result(index, result)
+        is awaited as each document finishes, in input order."""
+        extracted_queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        
+        async def extract_all():
+            for index, file_path in enumerate(file_paths):
+                cached = await self.get_cached_result(file_path)
+                if cached is not None:
+                    await extracted_queue.put((index, file_path, None, cached))
+                    continue
+                try:
+                    extracted_data = await self._run(executor, "extract_stage", file_path)
+                    await extracted_queue.put((index, file_path, extracted_data, None))
+                except Exception as e:
+                    logger.error(f"Extraction failed for {file_path}: {e}")
+                    await extracted_queue.put((index, file_path, None, {"status": "error", "message": str(e)}))
+            await extracted_queue.put(None)
+        
+        async def price_all():
+            while (entry := await extracted_queue.get()) is not None:
+                index, file_path, extracted_data, result = entry
+                if result is None:
+                    try:
+                        result = await self._run(executor, "price_stage", extracted_data)
+                        metrics.record_result(result)
+                        await self._store_result(file_path, result)
+                    except Exception as e:
+                        logger.error(f"Pricing failed for {file_path}: {e}")
+                        result = {"status": "error", "message": str(e)}
+                try:
+                    await on_result(index, result)
+                except Exception as e:
+                    logger.error(f"Batch result callback failed for {file_path}: {e}")
+        
+        await asyncio.gather(extract_all(), price_all())
+    
+    async def _run(self, executor: Optional[Executor], method_name: str, *args):
+        """Await one of this orchestrator's coroutine methods, on the executor if given"""
+        stage = method_name.replace("_stage", "")
+        with metrics.STAGE_SECONDS.labels(stage=stage).time():
+            if executor is None:
+                profile = active_profile.get()
+                if profile is not None:
+                    with profile.stage(stage):
+                        return await getattr(self, method_name)(*args)
+                return await getattr(self, method_name)(*args)
+            loop = asyncio.get_running_loop()
+            if isinstance(executor, ProcessPoolExecutor):
+                return await loop.run_in_executor(executor, run_in_worker, method_name, *args)
+            return await loop.run_in_executor(executor, self._run_sync, method_name, *args)
+    
+    def _run_sync(self, method_name: str, *args):
+        # Executor threads have no event loop of their own
+        return asyncio.run(getattr(self, method_name)(*args))
+    
+    async def extract_stage(self, file_path: str) -> dict:
+        return await self.sales_agent.extract_rfp_data_stream(
+            self.file_processor.iter_lines(file_path)
+        )
+    
+    async def extract_tracked_stage(self, file_path: str, lines_path: str) -> Tuple[dict, dict]:
+        """extract_stage plus the document's line index, for revising it later; line digests go to lines_path"""
+        with open(lines_path, "wb") as hash_sink:
+            scanner = RFPScanner(self.sales_agent, hash_sink)
+            extracted_data = await self.sales_agent.extract_rfp_data_stream(
+                self.file_processor.iter_lines(file_path), scanner
+            )
+        return extracted_data, scanner.line_index()
+    
+    async def extract_revision_stage(self, file_path: str, base: dict,
+                                     lines_path: str) -> Tuple[dict, dict, Dict[int, int], List[int]]:
+        with open(lines_path, "wb") as hash_sink:
+            return await self.sales_agent.extract_revision_stream(self.file_processor.iter_lines(file_path),
+                                                                  base, hash_sink)
+    
+    async def extract_text_stage(self, text: str) -> dict:
+        return await self.sales_agent.extract_rfp_data(text)
+    
+    async def price_stage(self, extracted_data: dict) -> dict:
+        entries = await self.match_stage(extracted_data['items'])
+        return await self.quote_stage(extracted_data, [entry for entry in entries if entry is not None])
+    
+    async def match_stage(self, items: List[dict]) -> List[Optional[dict]]:
+        """Each item with its best catalog match, or None where nothing matched"""
+        entries = []
+        all_matches = await self.technical_agent.find_product_matches_batch(items)
+        for item, matches in zip(items, all_matches):
+            if not matches:
+                entries.append(None)
+                continue
+            best_match = matches[0]
+            entries.append({
+                **item,
+                "matched_product": best_match['product'],
+                "match_score": best_match['match_score'],
+                "reasoning": best_match['reasoning']
+            })
+        return entries
+    
+    async def quote_stage(self, extracted_data: dict, matched_items: List[dict]) -> dict:
+        quotation = await self.pricing_agent.generate_quotation(
+            extracted_data['company_info'], matched_items
+        )
+        
+        return {
+            "status": "success",
+            "extracted_data": extracted_data,
+            "quotation": quotation
+        }
+    
+    async def _store_result(self, source: str, result: dict, is_text: bool = False, document_hash: str = None):
+        try:
+            document_hash = document_hash or await self._document_hash(source, is_text)
+            key, catalog_version, pricing_version = await self._cache_key(document_hash)
+            await self.result_cache.set(key, result, catalog_version, pricing_version)
+        except Exception as e:
+            logger.warning(f"Result cache store failed: {e}")
+    
+    async def _store_revision_base(self, document_hash: str, request_id: Optional[str], result: dict,
+                                   index: dict, entries: List[Optional[dict]], lines_path: str):
+        try:
+            await self.revision_store.put(document_hash, {
+                **index,
+                "items": result["extracted_data"]["items"],
+                "entries": entries,
+                "line_items": result["quotation"]["line_items"],
+                "company_info": result["extracted_data"]["company_info"],
+                "project_details": result["extracted_data"]["project_details"],
+                "catalog_version": self.technical_agent.catalog.version,
+                "final_amount": result["quotation"]["pricing_summary"]["final_amount"]
+            }, lines_path)
+            if request_id is not None:
+                await self.revision_store.link(request_id, document_hash)
+        except Exception as e:
+            logger.warning(f"Revision base store failed: {e}")
+
+
+_worker_orchestrator: Optional[Orchestrator] = None
+
+def run_in_worker(method_name: str, *args):
+    """Entry point for process-pool workers; each process loads its own agents once"""
+    global _worker_orchestrator
+    if _worker_orchestrator is None:
+        use_inline_extraction()
+        _worker_orchestrator = Orchestrator()
+    return _worker_orchestrator._run_sync(method_name, *args)
@@ -0,0 +1,320 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import uuid
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import aiofiles
+
+from backend.config import settings
+from backend.services import metrics
+from backend.services.file_processor import get_extraction_pool
+
+logger = logging.getLogger(__name__)
+
+# reportlab lays out one huge Paragraph in roughly quadratic time; long blocks are split
+MAX_PARAGRAPH_CHARS = 2000
+MAX_CODE_LINES = 60
+LINK_PATTERN = re.compile(r"\[([^\]]*)\]\(([^)\s]+)\)")
+HEADING_PATTERN = re.compile(r"(#{1,6}) (.*)")
+
+
+@functools.lru_cache(maxsize=None)
+def _styles() -> Dict[str, Any]:
+    """Paragraph and table styles, built once per process"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    sheet = getSampleStyleSheet()
+    styles = {name: sheet[name] for name in ("Title", "Normal", "Code", "Bullet",
+                                             "Heading1", "Heading2", "Heading3",
+                                             "Heading4", "Heading5", "Heading6")}
+    styles["Cell"] = ParagraphStyle("Cell", parent=sheet["Normal"], fontSize=8, leading=10)
+    styles["table"] = TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ])
+    styles["header_table"] = TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ])
+    return styles
+
+
+def _inline(text: str) -> str:
+    """Escape text for reportlab's mini-markup, keeping markdown links clickable"""
+    parts = []
+    position = 0
+    for match in LINK_PATTERN.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        url = escape(match.group(2), {'"': "&quot;"})
+        parts.append(f'<link href="{url}" color="blue">{escape(match.group(1)) or url}</link>')
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return "".join(parts)
+
+
+def _chunks(text: str, size: int) -> Iterator[str]:
+    while len(text) > size:
+        cut = text.rfind(" ", 0, size)
+        cut = cut if cut > 0 else size
+        yield text[:cut]
+        text = text[cut:].lstrip()
+    if text:
+        yield text
+
+
+def _iter_blocks(lines: Iterable[str]) -> Iterator[tuple]:
+    """Group markdown lines into ("text"|"code"|"table", lines) blocks as they arrive"""
+    kind, block = None, []
+    for line in lines:
+        line = line.rstrip("\n")
+        if kind == "code":
+            if line.startswith("```"):
+                yield kind, block
+                kind, block = None, []
+            else:
+                block.append(line)
+            continue
+
+        if line.startswith("```"):
+            if block:
+                yield kind, block
+            kind, block = "code", []
+        elif line.startswith("|"):
+            if kind != "table" and block:
+                yield kind, block
+                block = []
+            kind = "table"
+            block.append(line)
+        elif not line.strip():
+            if block:
+                yield kind, block
+            kind, block = None, []
+        else:
+            if kind == "table":
+                yield kind, block
+                block = []
+            kind = "text"
+            block.append(line)
+    if block:
+        yield kind, block
+
+
+def _text_flowables(block: List[str]) -> Iterator[Any]:
+    from reportlab.platypus import Paragraph
+
+    styles = _styles()
+    text = " ".join(line.strip() for line in block)
+    heading = HEADING_PATTERN.match(text)
+    if heading:
+        yield Paragraph(_inline(heading.group(2)), styles[f"Heading{len(heading.group(1))}"])
+    elif text.startswith("* "):
+        for number, chunk in enumerate(_chunks(text[2:], MAX_PARAGRAPH_CHARS)):
+            yield Paragraph(_inline(chunk), styles["Bullet"], bulletText=None if number else "•")
+    else:
+        for chunk in _chunks(text, MAX_PARAGRAPH_CHARS):
+            yield Paragraph(_inline(chunk), styles["Normal"])
+
+
+def _table(rows: List[List[str]], style: str = "table", col_widths: Optional[List[float]] = None):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Table
+
+    styles = _styles()
+    columns = max(len(row) for row in rows)
+    width = letter[0] - 2 * inch
+    cells = [[Paragraph(_inline(cell), styles["Cell"]) for cell in row + [""] * (columns - len(row))]
+             for row in rows]
+    table = Table(cells, colWidths=col_widths or [width / columns] * columns,
+                  repeatRows=1 if style == "header_table" else 0)
+    table.setStyle(styles[style])
+    return table
+
+
+def iter_content_flowables(title: str, lines: Iterable[str]) -> Iterator[Any]:
+    """Flowables for a scraped page (the markdown produced by html_extractor)"""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Preformatted, Spacer
+
+    styles = _styles()
+    yield Paragraph(_inline(title), styles["Title"])
+    yield Spacer(1, 0.2 * inch)
+
+    for kind, block in _iter_blocks(lines):
+        if kind == "code":
+            for start in range(0, max(len(block), 1), MAX_CODE_LINES):
+                yield Preformatted("\n".join(block[start:start + MAX_CODE_LINES]), styles["Code"])
+        elif kind == "table":
+            yield _table([[cell.strip() for cell in row.strip().strip("|").split("|")] for row in block])
+            yield Spacer(1, 0.1 * inch)
+        else:
+            yield from _text_flowables(block)
+
+
+def iter_quotation_flowables(quotation: Dict[str, Any]) -> Iterator[Any]:
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer
+
+    styles = _styles()
+    company = quotation.get("company_info", {})
+    summary = quotation["pricing_summary"]
+
+    yield Paragraph(f"Quotation {escape(quotation['quotation_id'])}", styles["Title"])
+    yield Paragraph(f"Prepared for: {escape(str(company.get('name', '')))}", styles["Normal"])
+    if company.get("project"):
+        yield Paragraph(f"Project: {escape(str(company['project']))}", styles["Normal"])
+    yield Paragraph(f"Valid until: {escape(str(quotation.get('validity', '')))}", styles["Normal"])
+    yield Spacer(1, 0.2 * inch)
+
+    rows = [["Product", "Qty", "Unit", "Unit price", "Testing", "Transport", "Line total"]]
+    for item in quotation["line_items"]:
+        rows.append([
+            f"{item['product_name']} ({item['product_id']})", str(item["quantity"]), item["unit"],
+            f"{item['unit_price']:,.2f}", f"{item['testing_charges']:,.2f}",
+            f"{item['transport_cost']:,.2f}", f"{item['line_total']:,.2f}"
+        ])
+    yield _table(rows, "header_table", [2.1 * inch, 0.5 * inch, 0.6 * inch, 0.8 * inch,
+                                        0.7 * inch, 0.8 * inch, 1.0 * inch])
+    yield Spacer(1, 0.2 * inch)
+
+    yield _table([
+        ["Subtotal", f"{summary['subtotal']:,.2f}"],
+        ["Discount", f"-{summary['discount_amount']:,.2f}"],
+        ["Taxable amount", f"{summary['taxable_amount']:,.2f}"],
+        [f"Tax ({summary['tax_rate']:g}%)", f"{summary['tax_amount']:,.2f}"],
+        ["Total", f"{summary['final_amount']:,.2f}"],
+    ], col_widths=[2.0 * inch, 1.5 * inch])
+    yield Spacer(1, 0.2 * inch)
+
+    yield Paragraph("Terms and conditions", styles["Heading3"])
+    for term in quotation.get("terms_conditions", []):
+        yield Paragraph(escape(term), styles["Bullet"], bulletText="•")
+
+
+def _build(path: str, title: str, flowables: Iterable[Any]):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        SimpleDocTemplate(tmp_path, pagesize=letter, title=title).build(list(flowables))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def render_content_pdf(title: str, content: str, path: str):
+    """Worker entry point: render scraped content to `path`"""
+    _build(path, title, iter_content_flowables(title, content.splitlines()))
+
+
+def render_quotation_pdf(quotation: Dict[str, Any], path: str):
+    """Worker entry point: render a PricingAgent quotation to `path`"""
+    _build(path, f"Quotation {quotation['quotation_id']}", iter_quotation_flowables(quotation))
+
+
+def warm_up_worker():
+    """Worker entry point: import reportlab and build the styles ahead of the first render"""
+    _styles()
+
+
+class PDFRenderer:
+    """Renders PDFs in the extraction process pool and keeps them in an on-disk cache.
+
+    Scraped content is keyed by a hash of title and content; quotations by
+    quotation id (plus a content digest, since ids have one-second resolution).
+    Concurrent requests for the same PDF share one render.
+    """
+
+    def __init__(self, cache_dir: str = None, max_files: int = None):
+        self.cache_dir = cache_dir or settings.PDF_CACHE_DIR
+        self.max_files = max_files or settings.PDF_CACHE_MAX_FILES
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._rendering: Dict[str, asyncio.Future] = {}
+
+    async def render_content(self, title: str, content: str) -> str:
+        digest = hashlib.sha256(f"{title}\0{content}".encode("utf-8")).hexdigest()[:32]
+        return await self._render("content", f"content-{digest}.pdf", render_content_pdf, title, content)
+
+    async def render_quotation(self, quotation: Dict[str, Any]) -> str:
+        digest = hashlib.sha256(json.dumps(quotation, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        name = re.sub(r"[^A-Za-z0-9_-]", "_", str(quotation["quotation_id"]))
+        return await self._render("quotation", f"{name}-{digest}.pdf", render_quotation_pdf, quotation)
+
+    async def warm_up(self):
+        """Start the extraction pool and load reportlab in a worker"""
+        await asyncio.get_running_loop().run_in_executor(get_extraction_pool(), warm_up_worker)
+
+    async def _render(self, kind: str, name: str, render, *args) -> str:
+        path = os.path.join(self.cache_dir, name)
+        if os.path.exists(path):
+            os.utime(path)
+            metrics.PDF_REQUESTS.labels(kind=kind, outcome="cached").inc()
+            return path
+        if name in self._rendering:
+            metrics.PDF_REQUESTS.labels(kind=kind, outcome="joined").inc()
+        else:
+            metrics.PDF_REQUESTS.labels(kind=kind, outcome="rendered").inc()
+            self._rendering[name] = asyncio.create_task(self._render_once(kind, name, path, render, *args))
+        # A disconnecting client must not cancel a render other requests are waiting on
+        await asyncio.shield(self._rendering[name])
+        return path
+
+    async def _render_once(self, kind: str, name: str, path: str, render, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            with metrics.PDF_RENDER_SECONDS.labels(kind=kind).time():
+                await loop.run_in_executor(get_extraction_pool(), render, *args, path)
+        finally:
+            del self._rendering[name]
+        await asyncio.to_thread(self._evict)
+
+    def _evict(self):
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pdf"):
+                    entries.append((entry.stat().st_mtime, entry.path))
+        if len(entries) <= self.max_files:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_files]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def open(self, render: Callable[[], Awaitable[str]]) -> Tuple[Any, int]:
+        """Run `render` (render_content/render_quotation) and open the PDF it returns, with its size.
+
+        The open handle keeps the bytes readable if eviction removes the file
+        while it streams; a file evicted between render and open is rendered again once.
+        """
+        for attempt in range(2):
+            path = await render()
+            try:
+                f = await aiofiles.open(path, "rb")
+            except FileNotFoundError:
+                if attempt:
+                    raise
+                logger.info(f"{path} was evicted before it could be opened, rendering again")
+                continue
+            return f, os.fstat(f.fileno()).st_size
+
+    async def stream(self, f, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """Stream and close a handle returned by open()"""
+        try:
+            while chunk := await f.read(chunk_size):
+                yield chunk
+        finally:
+            await f.close()
@@ -0,0 +1,106 @@
+import logging
+from typing import Dict, Any, List
+
+import numpy as np
+
+from backend.agents.pricing_agent import PricingAgent
+
+logger = logging.getLogger(__name__)
+
+
+class QuotationColumns:
+    """Line items of many quotations flattened into column arrays.
+
+    Lines of quotation i occupy rows starts[i] .. starts[i] + counts[i] - 1.
+    """
+
+    def __init__(self, quotations: List[Dict[str, Any]]):
+        self.counts = np.fromiter((len(q["line_items"]) for q in quotations), dtype=np.int64, count=len(quotations))
+        self.starts = np.zeros(len(quotations), dtype=np.int64)
+        np.cumsum(self.counts[:-1], out=self.starts[1:])
+
+        total = int(self.counts.sum())
+        self.unit_price = np.fromiter((item["unit_price"] for q in quotations for item in q["line_items"]),
+                                      dtype=np.float64, count=total)
+        self.quantity = np.fromiter((item["quantity"] for q in quotations for item in q["line_items"]),
+                                    dtype=np.float64, count=total)
+
+
+def price_columns(agent: PricingAgent, columns: QuotationColumns) -> Dict[str, np.ndarray]:
+    """Vectorized PricingAgent.generate_quotation arithmetic for every quotation at once.
+
+    Operations are applied in the same order as the scalar code, and subtotals
+    are accumulated line by line (not pairwise), so results are bit-identical.
+    """
+    base_cost = columns.unit_price * columns.quantity
+    testing_charges = base_cost * agent.testing_charge
+    transport_cost = agent.transport_rate * 100 * columns.quantity
+    line_total = base_cost + testing_charges + transport_cost
+
+    subtotal = np.zeros(len(columns.counts), dtype=np.float64)
+    for position in range(int(columns.counts.max(initial=0))):
+        active = columns.counts > position
+        subtotal[active] += line_total[columns.starts[active] + position]
+
+    conditions = [subtotal > threshold for threshold, _ in agent.discount_tiers]
+    conditions.append(columns.counts > agent.bulk_item_threshold)
+    rates = [subtotal * rate for _, rate in agent.discount_tiers]
+    rates.append(subtotal * agent.bulk_discount_rate)
+    discount = np.select(conditions, rates, default=0.0)
+
+    taxable_amount = subtotal - discount
+    tax_amount = taxable_amount * agent.tax_rate
+    return {
+        "base_cost": base_cost,
+        "testing_charges": testing_charges,
+        "transport_cost": transport_cost,
+        "line_total": line_total,
+        "subtotal": subtotal,
+        "discount_amount": discount,
+        "taxable_amount": taxable_amount,
+        "tax_amount": tax_amount,
+        "final_amount": taxable_amount + tax_amount
+    }
+
+
+def reprice(agent: PricingAgent, quotations: List[Dict[str, Any]], include_lines: bool = False) -> List[Dict[str, Any]]:
+    """Re-price stored quotations under `agent`'s parameters; one delta record per quotation"""
+    columns = QuotationColumns(quotations)
+    priced = price_columns(agent, columns)
+    # Python's round(), not np.round, so the figures match generate_quotation exactly
+    summary_columns = {key: priced[key].tolist() for key in
+                       ("subtotal", "discount_amount", "taxable_amount", "tax_amount", "final_amount")}
+    line_columns = {key: priced[key].tolist() for key in
+                    ("base_cost", "testing_charges", "transport_cost", "line_total")} if include_lines else None
+
+    results = []
+    for index, quotation in enumerate(quotations):
+        pricing_summary = {
+            "subtotal": round(summary_columns["subtotal"][index], 2),
+            "discount_amount": round(summary_columns["discount_amount"][index], 2),
+            "taxable_amount": round(summary_columns["taxable_amount"][index], 2),
+            "tax_rate": agent.tax_rate * 100,
+            "tax_amount": round(summary_columns["tax_amount"][index], 2),
+            "final_amount": round(summary_columns["final_amount"][index], 2)
+        }
+        previous = quotation["pricing_summary"]["final_amount"]
+        delta = round(pricing_summary["final_amount"] - previous, 2)
+        result = {
+            "quotation_id": quotation["quotation_id"],
+            "previous_final_amount": previous,
+            "final_amount": pricing_summary["final_amount"],
+            "delta": delta,
+            "delta_percent": round(delta / previous * 100, 2) if previous else None,
+            "pricing_summary": pricing_summary
+        }
+        if include_lines:
+            start = int(columns.starts[index])
+            result["line_items"] = [
+                {
+                    **item,
+                    **{key: round(values[start + offset], 2) for key, values in line_columns.items()}
+                }
+                for offset, item in enumerate(quotation["line_items"])
+            ]
+        results.append(result)
+    return results
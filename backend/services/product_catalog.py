@@ -0,0 +1,439 @@
+import csv
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from array import array
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from backend.services.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*")
+
+MATCH_STRATEGIES = ("keyword", "semantic")
+# Default min_score per strategy; semantic scores are cosine similarity x 100
+DEFAULT_MIN_SCORES = {"keyword": 60, "semantic": 35}
+
+# Bump when the snapshot layout changes so stale snapshots are rebuilt
+SNAPSHOT_FORMAT_VERSION = 1
+
+DEFAULT_PRODUCTS = [
+    {
+        "product_id": "CABLE-XLPE-1.5",
+        "name": "XLPE Insulated Copper Cable 1.5 sqmm",
+        "category": "Cables",
+        "specifications": {"voltage": "1100V", "current": "20A", "material": "Copper"},
+        "unit_price": 45.50,
+        "unit": "meter"
+    },
+    {
+        "product_id": "CABLE-PVC-2.5",
+        "name": "PVC Insulated Copper Cable 2.5 sqmm",
+        "category": "Cables",
+        "specifications": {"voltage": "1100V", "current": "27A", "material": "Copper"},
+        "unit_price": 68.75,
+        "unit": "meter"
+    },
+    {
+        "product_id": "TRANSFORMER-11KV-500",
+        "name": "11KV/433V Distribution Transformer 500KVA",
+        "category": "Transformers",
+        "specifications": {"primary": "11KV", "secondary": "433V", "capacity": "500KVA"},
+        "unit_price": 450000.00,
+        "unit": "unit"
+    },
+    {
+        "product_id": "LED-STREET-50W",
+        "name": "LED Street Light 50W",
+        "category": "Lighting",
+        "specifications": {"power": "50W", "lumen": "6000lm", "ip_rating": "IP65"},
+        "unit_price": 3200.00,
+        "unit": "unit"
+    }
+]
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class ProductRecord:
+    __slots__ = ("product_id", "name", "category", "specifications", "unit_price", "unit",
+                 "name_tokens", "spec_keys")
+
+    def __init__(self, product_id: str, name: str, category: str, specifications: Dict[str, str],
+                 unit_price: float, unit: str):
+        self.product_id = product_id
+        self.name = name
+        self.category = category
+        self.specifications = specifications
+        self.unit_price = unit_price
+        self.unit = unit
+        self.name_tokens = frozenset(tokenize(name))
+        self.spec_keys = tuple(" ".join(tokenize(str(value))) for value in specifications.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "product_id": self.product_id,
+            "name": self.name,
+            "category": self.category,
+            "specifications": dict(self.specifications),
+            "unit_price": self.unit_price,
+            "unit": self.unit
+        }
+
+    def to_row(self) -> list:
+        return [self.product_id, self.name, self.category, self.specifications, self.unit_price, self.unit]
+
+
+class RecordTable(Sequence):
+    """Products of a catalog snapshot: one JSON row per line of a memory-mapped file.
+
+    Rows are parsed on access, so opening a snapshot costs nothing per product.
+    """
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        self.offsets = np.load(os.path.join(path, "record_offsets.npy"), mmap_mode="r")
+        with open(os.path.join(path, "records.jsonl"), "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if len(self.offsets) > 1 else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        idx = int(idx)
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return ProductRecord(*json.loads(self._data[int(self.offsets[idx]):int(self.offsets[idx + 1])]))
+
+    def __iter__(self) -> Iterator[ProductRecord]:
+        return (self[idx] for idx in range(len(self)))
+
+
+class Postings:
+    """Read-only token -> product indexes mapping over one memory-mapped uint32 array"""
+
+    def __init__(self, data, spans: Dict[str, List[int]]):
+        self.data = data
+        self.spans = spans
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.spans
+
+    def __getitem__(self, key: str):
+        start, end = self.spans[key]
+        return self.data[start:end]
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self.spans else default
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+
+class CatalogIndex:
+    """Immutable snapshot of the catalog; swapped as a whole on reload."""
+
+    def __init__(self, records: List[ProductRecord], version: str):
+        self.records = records
+        self.version = version
+        self.max_spec_tokens = 1
+        # Set by ProductCatalog when the semantic strategy is active
+        self.vectors: Optional["VectorIndex"] = None
+
+        name_index = defaultdict(lambda: array("I"))
+        spec_index = defaultdict(lambda: array("I"))
+        for idx, record in enumerate(records):
+            for token in record.name_tokens:
+                name_index[token].append(idx)
+            for key in record.spec_keys:
+                if key:
+                    spec_index[key].append(idx)
+                    self.max_spec_tokens = max(self.max_spec_tokens, key.count(" ") + 1)
+        self.name_index: Dict[str, array] = dict(name_index)
+        self.spec_index: Dict[str, array] = dict(spec_index)
+
+    @classmethod
+    def open(cls, path: str) -> "CatalogIndex":
+        """Open a snapshot written by save(); records and postings stay memory-mapped"""
+        import numpy as np
+
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls.__new__(cls)
+        index.records = RecordTable(path)
+        index.version = meta["version"]
+        index.max_spec_tokens = meta["max_spec_tokens"]
+        index.vectors = None
+        index.name_index = Postings(np.load(os.path.join(path, "name_postings.npy"), mmap_mode="r"),
+                                    meta["name_spans"])
+        index.spec_index = Postings(np.load(os.path.join(path, "spec_postings.npy"), mmap_mode="r"),
+                                    meta["spec_spans"])
+        return index
+
+    def save(self, path: str):
+        """Write the index as a snapshot directory, published atomically by rename"""
+        import numpy as np
+
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp_path)
+        try:
+            offsets = array("q", [0])
+            with open(os.path.join(tmp_path, "records.jsonl"), "wb") as f:
+                for record in self.records:
+                    offsets.append(offsets[-1] + f.write(json.dumps(record.to_row()).encode() + b"\n"))
+            np.save(os.path.join(tmp_path, "record_offsets.npy"), np.frombuffer(offsets, dtype=np.int64))
+
+            meta = {"version": self.version, "max_spec_tokens": self.max_spec_tokens}
+            for name, postings in (("name", self.name_index), ("spec", self.spec_index)):
+                spans, chunks, position = {}, [], 0
+                for key, indexes in postings.items():
+                    spans[key] = [position, position + len(indexes)]
+                    chunks.append(np.frombuffer(indexes, dtype=np.uint32))
+                    position += len(indexes)
+                data = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint32)
+                np.save(os.path.join(tmp_path, f"{name}_postings.npy"), data)
+                meta[f"{name}_spans"] = spans
+            with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # Another process published the same snapshot first; theirs is identical
+                if not os.path.exists(os.path.join(path, "meta.json")):
+                    raise
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def spec_keys_in(self, spec_tokens: List[str]) -> set:
+        """Indexed spec values occurring as token n-grams of the requirement text."""
+        seen = set()
+        for size in range(1, self.max_spec_tokens + 1):
+            for start in range(len(spec_tokens) - size + 1):
+                key = " ".join(spec_tokens[start:start + size])
+                if key in self.spec_index:
+                    seen.add(key)
+        return seen
+
+    def spec_hits(self, spec_tokens: List[str]) -> Dict[int, int]:
+        """Count, per product, how many of its spec values occur in the token stream."""
+        hits: Dict[int, int] = defaultdict(int)
+        for key in self.spec_keys_in(spec_tokens):
+            for idx in self.spec_index[key]:
+                hits[idx] += 1
+        return hits
+
+    def name_hits(self, description_tokens: Iterable[str]) -> set:
+        candidates = set()
+        for token in set(description_tokens):
+            candidates.update(self.name_index.get(token, ()))
+        return candidates
+
+    def score_candidates(self, description: str, specs: str) -> List[Tuple[int, float]]:
+        spec_hits = self.spec_hits(tokenize(specs))
+        name_hits = self.name_hits(tokenize(description))
+
+        scored = []
+        for idx in name_hits.union(spec_hits):
+            score = (40 if idx in name_hits else 0) + spec_hits.get(idx, 0) * 20
+            scored.append((idx, min(score, 100)))
+        return scored
+
+
+class ProductCatalog:
+    def __init__(self, source: str = "", reload_check_seconds: float = 5.0, strategy: str = "keyword",
+                 vector_index_dir: str = "data/vector_index", semantic_min_score: float = None,
+                 snapshot_dir: str = ""):
+        if strategy not in MATCH_STRATEGIES:
+            raise ValueError(f"Unknown match strategy {strategy!r}, expected one of {MATCH_STRATEGIES}")
+        self.source = source
+        self.reload_check_seconds = reload_check_seconds
+        self.strategy = strategy
+        self.vector_index_dir = vector_index_dir
+        self.snapshot_dir = snapshot_dir
+        self.min_score = DEFAULT_MIN_SCORES[strategy]
+        if strategy == "semantic" and semantic_min_score is not None:
+            self.min_score = semantic_min_score
+        self._lock = threading.RLock()
+        self._last_check = 0.0
+        # (st_mtime_ns, st_size) of the source the index was built from
+        self._source_stamp: Optional[Tuple[int, int]] = None
+        self.index = self._build_index()
+
+    @property
+    def version(self) -> str:
+        return self.index.version
+
+    def _build_index(self) -> CatalogIndex:
+        started = time.perf_counter()
+        snapshot = None
+        if self.source:
+            stat = os.stat(self.source)
+            self._source_stamp = (stat.st_mtime_ns, stat.st_size)
+            # Whole seconds would give two edits within a second the same version, and caches keyed by it
+            version = f"{os.path.basename(self.source)}:{stat.st_mtime_ns}:{stat.st_size}"
+            if self.snapshot_dir:
+                snapshot = self._snapshot_path(stat)
+        else:
+            version = "builtin:1"
+        if self.strategy == "semantic":
+            # Different scores, so different cache keys for results matched with them
+            version = f"{version}:semantic"
+
+        if snapshot is not None and os.path.exists(os.path.join(snapshot, "meta.json")):
+            index = CatalogIndex.open(snapshot)
+            source = "snapshot"
+        else:
+            rows = self._read_source(self.source) if self.source else DEFAULT_PRODUCTS
+            index = CatalogIndex([self._to_record(row) for row in rows], version)
+            source = "source"
+            if snapshot is not None:
+                index.save(snapshot)
+                self._prune_snapshots(snapshot)
+        index.version = version
+        if self.strategy == "semantic":
+            from backend.services.vector_index import VectorIndex, index_text
+
+            records = index.records
+            index.vectors = VectorIndex.load_or_build(
+                lambda: [index_text(record.name, record.specifications) for record in records],
+                len(records), os.path.abspath(self.source) if self.source else "builtin", version,
+                self.vector_index_dir
+            )
+        logger.info(f"Catalog loaded from {source}: {len(index)} products, version {version} "
+                    f"in {time.perf_counter() - started:.2f}s")
+        return index
+
+    def _snapshot_path(self, stat: os.stat_result) -> str:
+        """Snapshot directory for this exact source file: <source digest>-<content digest>"""
+        source = hashlib.sha256(os.path.abspath(self.source).encode()).hexdigest()[:16]
+        content = hashlib.sha256(
+            f"{SNAPSHOT_FORMAT_VERSION}:{stat.st_mtime_ns}:{stat.st_size}".encode()
+        ).hexdigest()[:16]
+        return os.path.join(self.snapshot_dir, f"{source}-{content}")
+
+    def _prune_snapshots(self, current: str):
+        """Drop snapshots of earlier versions of the same source"""
+        prefix = os.path.basename(current).split("-")[0] + "-"
+        for name in os.listdir(self.snapshot_dir):
+            path = os.path.join(self.snapshot_dir, name)
+            if name.startswith(prefix) and path != current and not name.endswith(".tmp"):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _read_source(self, path: str) -> Iterable[Dict[str, Any]]:
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".csv":
+            return self._read_csv(path)
+        if ext in (".db", ".sqlite", ".sqlite3"):
+            return self._read_sqlite(path)
+        raise ValueError(f"Unsupported catalog source: {path}")
+
+    def _read_csv(self, path: str) -> List[Dict[str, Any]]:
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def _read_sqlite(self, path: str) -> List[Dict[str, Any]]:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute("SELECT * FROM products")]
+        finally:
+            conn.close()
+
+    def _to_record(self, row: Dict[str, Any]) -> ProductRecord:
+        specs = row.get("specifications") or {}
+        specs = json.loads(specs) if isinstance(specs, str) else dict(specs)
+        # Flat sources may carry specs as spec_<name> columns
+        for key, value in row.items():
+            if key.startswith("spec_") and value not in (None, ""):
+                specs[key[5:]] = value
+
+        return ProductRecord(
+            product_id=str(row["product_id"]),
+            name=str(row["name"]),
+            category=str(row.get("category") or ""),
+            specifications={k: str(v) for k, v in specs.items()},
+            unit_price=float(row["unit_price"]),
+            unit=str(row.get("unit") or "piece")
+        )
+
+    @property
+    def reload_check_due(self) -> bool:
+        """Whether maybe_reload would look at the source now rather than return straight away"""
+        return bool(self.source) and time.monotonic() - self._last_check >= self.reload_check_seconds
+
+    def maybe_reload(self) -> bool:
+        """Reload when the source file changed; checks are throttled.
+
+        A reload rebuilds the index, so async callers should run this off the event loop.
+        """
+        if not self.reload_check_due:
+            return False
+        self._last_check = time.monotonic()
+        if not self._source_changed():
+            return False
+        with self._lock:
+            # Another thread may have reloaded while this one waited for the lock
+            return self.reload() if self._source_changed() else False
+
+    def _source_changed(self) -> bool:
+        try:
+            stat = os.stat(self.source)
+        except OSError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) != self._source_stamp
+
+    def reload(self) -> bool:
+        with self._lock:
+            try:
+                self.index = self._build_index()
+                return True
+            except Exception as e:
+                logger.error(f"Catalog reload failed, keeping version {self.version}: {e}")
+                return False
+
+    def find_matches(self, description: str, specs: str, min_score: float = None,
+                     limit: int = 3) -> List[Tuple[ProductRecord, float]]:
+        if min_score is None:
+            min_score = self.min_score
+        index = self.index
+        if index.vectors is not None:
+            return [(index.records[idx], score)
+                    for idx, score in index.vectors.top_k(f"{description} {specs}", limit, min_score)]
+        scored = [(idx, score) for idx, score in index.score_candidates(description, specs)
+                  if score > min_score]
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        return [(index.records[idx], score) for idx, score in scored[:limit]]
+
+    def find_matches_batch(self, queries: List[Tuple[str, str]], min_score: float = None,
+                           limit: int = 3) -> List[List[Tuple[ProductRecord, float]]]:
+        from backend.services.batch_matcher import match_batch
+
+        if min_score is None:
+            min_score = self.min_score
+        index = self.index
+        if index.vectors is not None:
+            return [[(index.records[idx], score)
+                     for idx, score in index.vectors.top_k(f"{description} {specs}", limit, min_score)]
+                    for description, specs in queries]
+        return [[(index.records[idx], score) for idx, score in row]
+                for row in match_batch(index, queries, min_score, limit)]
@@ -0,0 +1,323 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional, Tuple
+
+from backend.config import settings
+
+if TYPE_CHECKING:
+    import cProfile
+
+logger = logging.getLogger(__name__)
+
+# The profile of the run in progress; Orchestrator._run records each stage into it
+active_profile: ContextVar[Optional["RunProfile"]] = ContextVar("active_profile", default=None)
+
+REQUEST_ID_RE = re.compile(r"[0-9A-Za-z-]{1,64}")
+# Frames of the profiler itself, left out of allocation sites
+IGNORED_FILES = (tracemalloc.__file__, __file__)
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts.
+
+    cProfile aggregates per function and loses the call paths a flame graph
+    needs; periodic stack samples keep them.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+        self.paused = False
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            if self.paused:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        """`frame;frame;frame count` lines, the input format of flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RunProfile:
+    """Wall time, peak traced memory and top allocation sites of each pipeline stage of one run.
+
+    Snapshots are compared while the profiler and sampler are paused, so the
+    analysis stays out of the profile; paused_seconds is excluded from timings.
+    """
+
+    def __init__(self, top: int = 10, profiler: "cProfile.Profile" = None, sampler: StackSampler = None):
+        self.top = top
+        self.profiler = profiler
+        self.sampler = sampler
+        self.stages: List[Dict[str, Any]] = []
+        self.paused_seconds = 0.0
+
+    @contextmanager
+    def _paused(self) -> Iterator[None]:
+        started = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.sampler is not None:
+            self.sampler.paused = True
+        try:
+            yield
+        finally:
+            if self.sampler is not None:
+                self.sampler.paused = False
+            if self.profiler is not None:
+                self.profiler.enable()
+            self.paused_seconds += time.perf_counter() - started
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        with self._paused():
+            before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+            tracemalloc.reset_peak()
+            started_bytes = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            current, peak = tracemalloc.get_traced_memory()
+            entry = {
+                "stage": name,
+                "seconds": round(seconds, 6),
+                "peak_bytes": max(peak - started_bytes, 0),
+                "net_bytes": current - started_bytes,
+                "allocation_sites": []
+            }
+            if before is not None:
+                with self._paused():
+                    entry["allocation_sites"] = self._allocation_sites(before, tracemalloc.take_snapshot())
+                    before = None
+            self.stages.append(entry)
+
+    def _allocation_sites(self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        """Lines whose allocations grew most during the stage (memory still held when it ended)"""
+        sites = []
+        for stat in after.compare_to(before, "lineno"):
+            if len(sites) == self.top or stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            if frame.filename in IGNORED_FILES:
+                continue
+            sites.append({
+                "site": f"{frame.filename}:{frame.lineno}",
+                "size_bytes": stat.size_diff,
+                "count": stat.count_diff
+            })
+        return sites
+
+
+def top_functions(profiler: "cProfile.Profile", top: int) -> List[Dict[str, Any]]:
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, lineno, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{name} ({filename}:{lineno})",
+            "calls": calls,
+            "own_seconds": round(own, 6),
+            "cumulative_seconds": round(cumulative, 6)
+        })
+    rows.sort(key=lambda row: -row["own_seconds"])
+    return rows[:top]
+
+
+_worker_orchestrator = None
+
+def profile_rfp(file_path: str, request_id: str, revision_of: Optional[str], top: int,
+                interval: float) -> Tuple[dict, Dict[str, Any], str]:
+    """Worker entry point: process one RFP under cProfile, a stack sampler and tracemalloc.
+
+    Runs in its own process, so neither the tracing overhead nor the traced
+    allocations of other requests mix with the app's. Returns the result, the
+    profile report and the collapsed stacks.
+    """
+    global _worker_orchestrator
+    import cProfile
+    from backend.services.orchestrator import Orchestrator
+
+    if _worker_orchestrator is None:
+        # Load the catalog and numpy outside the profile; they are a one-off per worker
+        import backend.services.batch_matcher
+        from backend.services.file_processor import use_inline_extraction
+
+        # Extraction shows up in the profile instead of in a pool process
+        use_inline_extraction()
+        _worker_orchestrator = Orchestrator()
+        _worker_orchestrator.technical_agent.catalog
+
+    sampler = StackSampler(threading.get_ident(), interval)
+    profiler = cProfile.Profile()
+    profile = RunProfile(top, profiler, sampler)
+    token = active_profile.set(profile)
+    switch_interval = sys.getswitchinterval()
+    # The sampler needs the GIL at least as often as it wants to sample
+    sys.setswitchinterval(min(switch_interval, interval))
+    tracemalloc.start()
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            result = asyncio.run(_worker_orchestrator.process_rfp(
+                file_path, check_cache=False, request_id=request_id, revision_of=revision_of
+            ))
+        finally:
+            profiler.disable()
+        seconds = time.perf_counter() - started - profile.paused_seconds
+        peak = max([stage["peak_bytes"] for stage in profile.stages] + [0])
+    finally:
+        sampler.stop()
+        tracemalloc.stop()
+        sys.setswitchinterval(switch_interval)
+        active_profile.reset(token)
+        # aiosqlite connections run on their own threads; leaving them open would keep the worker from exiting
+        asyncio.run(_close_stores(_worker_orchestrator))
+
+    report = {
+        "request_id": request_id,
+        "status": result.get("status"),
+        "seconds": round(seconds, 6),
+        "peak_stage_bytes": peak,
+        "samples": sum(sampler.stacks.values()),
+        "sample_interval_seconds": interval,
+        "stages": profile.stages,
+        "top_functions": top_functions(profiler, top),
+        "created": time.time()
+    }
+    return result, report, sampler.collapsed()
+
+
+async def _close_stores(orchestrator):
+    await orchestrator.result_cache.close()
+    await orchestrator.revision_store.close()
+
+
+class Profiler:
+    """Gates, runs and stores per-request profiles.
+
+    Profiles run one at a time in a dedicated worker process. Requests ask for
+    one explicitly (only when PROFILING_ENABLED, and with PROFILING_TOKEN if
+    set) or are sampled at PROFILE_SAMPLE_RATE; a sample is skipped while
+    another profile is running.
+    """
+
+    def __init__(self, directory: str = None, max_profiles: int = None):
+        self.directory = directory or settings.PROFILE_DIR
+        self.max_profiles = max_profiles or settings.PROFILE_MAX_FILES
+        self.enabled = settings.PROFILING_ENABLED
+        self.token = settings.PROFILING_TOKEN
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.running = 0
+
+    def check_request(self, token: Optional[str]):
+        """Raise PermissionError unless an explicit profile request is allowed"""
+        if not self.enabled:
+            raise PermissionError("Profiling is disabled on this server")
+        if self.token and token != self.token:
+            raise PermissionError("Invalid profiling token")
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and not self.running and random.random() < self.sample_rate
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def process_rfp(self, file_path: str, request_id: str, revision_of: str = None) -> dict:
+        """Orchestrator.process_rfp in the profiling worker; the profile is stored under request_id"""
+        loop = asyncio.get_running_loop()
+        self.running += 1
+        try:
+            result, report, collapsed = await loop.run_in_executor(
+                self._executor(), profile_rfp, file_path, request_id, revision_of,
+                settings.PROFILE_TOP_ENTRIES, settings.PROFILE_STACK_INTERVAL_SECONDS
+            )
+        finally:
+            self.running -= 1
+        await asyncio.to_thread(self._store, request_id, report, collapsed)
+        logger.info(f"Profiled {request_id}: {report['seconds']:.2f}s, {report['samples']} samples, "
+                    f"peak stage allocation {report['peak_stage_bytes'] / 1024 / 1024:.1f} MB")
+        return result
+
+    def _path(self, request_id: str, ext: str) -> str:
+        if not REQUEST_ID_RE.fullmatch(request_id):
+            raise ValueError(f"Invalid request id {request_id!r}")
+        return os.path.join(self.directory, f"{request_id}.{ext}")
+
+    def _store(self, request_id: str, report: Dict[str, Any], collapsed: str):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(request_id, "folded"), "w", encoding="utf-8") as f:
+            f.write(collapsed)
+        # The report goes last: its presence marks the profile complete
+        with open(self._path(request_id, "json"), "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        self._evict()
+
+    def _evict(self):
+        reports = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    reports.append((entry.stat().st_mtime, entry.name[:-len(".json")]))
+        reports.sort()
+        for _, request_id in reports[:max(len(reports) - self.max_profiles, 0)]:
+            for ext in ("json", "folded"):
+                try:
+                    os.remove(self._path(request_id, ext))
+                except FileNotFoundError:
+                    pass
+
+    def report(self, request_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(request_id, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def collapsed_path(self, request_id: str) -> Optional[str]:
+        try:
+            path = self._path(request_id, "folded")
+        except ValueError:
+            return None
+        return path if os.path.exists(self._path(request_id, "json")) else None
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STAGES = ("done", "error")
+
+
+class ProgressHub:
+    """In-process publish/subscribe of job progress events, keyed by request or batch id.
+
+    Each channel keeps its events until `retention_seconds` after its terminal
+    event, so a subscriber that connects late still sees the whole history.
+    """
+
+    def __init__(self, retention_seconds: float = 300, max_events: int = 100):
+        self.retention_seconds = retention_seconds
+        self.max_events = max_events
+        self._history: Dict[str, List[Dict[str, Any]]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def publish(self, channel: str, stage: str, **data):
+        event = {"id": channel, "stage": stage, "timestamp": time.time(), **data}
+        history = self._history.setdefault(channel, [])
+        if len(history) < self.max_events or stage in TERMINAL_STAGES:
+            history.append(event)
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(event)
+        if stage in TERMINAL_STAGES:
+            asyncio.get_running_loop().call_later(self.retention_seconds, self._history.pop, channel, None)
+
+    def publisher(self, channel: str) -> Callable[[str, Dict[str, Any]], None]:
+        """Callback in the form the Orchestrator takes as `progress`"""
+        return lambda stage, data: self.publish(channel, stage, **data)
+
+    async def follow(self, channel: str, fallback: Callable[[], Awaitable[Optional[Dict[str, Any]]]] = None,
+                     timeout: float = None, poll_interval: float = 2.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield the channel's past and live events until a terminal one or `timeout`.
+
+        Yields None after every idle `poll_interval` so streaming callers can send
+        keep-alives. `fallback` is awaited when idle and may return a terminal event
+        for jobs finished elsewhere, e.g. by another worker sharing the job store.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[channel].add(queue)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            for event in list(self._history.get(channel, ())):
+                yield event
+                if event["stage"] in TERMINAL_STAGES:
+                    return
+
+            while True:
+                wait = poll_interval
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return
+                try:
+                    event = await asyncio.wait_for(queue.get(), wait)
+                except asyncio.TimeoutError:
+                    event = await fallback() if fallback is not None else None
+                yield event
+                if event is not None and event["stage"] in TERMINAL_STAGES:
+                    return
+        finally:
+            self._subscribers[channel].discard(queue)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
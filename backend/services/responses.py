@@ -0,0 +1,93 @@
+import base64
+import binascii
+import json
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    # Same output through the standard library, just slower
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when available.
+
+    Returning one of these from an endpoint also skips FastAPI's
+    jsonable_encoder pass, which costs more than the encoding itself on
+    large results.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Dict[str, Any]]:
+    """"a.b,a.c,d" -> {"a": {"b": {}, "c": {}}, "d": {}}; None or empty selects everything"""
+    if not fields:
+        return None
+    tree: Dict[str, Any] = {}
+    for path in fields.split(","):
+        node = tree
+        for part in filter(None, path.strip().split(".")):
+            node = node.setdefault(part, {})
+    return tree or None
+
+
+def select_fields(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """Keep only the selected keys; a selection under a list applies to each of its elements"""
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [select_fields(element, tree) for element in value]
+    if isinstance(value, dict):
+        return {key: select_fields(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        kind, offset = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split(":")
+        if kind == "o" and int(offset) >= 0:
+            return int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        pass
+    raise ValueError("Invalid cursor")
+
+
+def paginate(records: Sequence[Any], cursor: Optional[str], limit: int,
+             fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """One page of `records` from an opaque cursor; next_cursor is None on the last page"""
+    offset = decode_cursor(cursor)
+    end = offset + limit
+    return {
+        "items": select_fields(list(records[offset:end]), fields),
+        "total": len(records),
+        "next_cursor": encode_cursor(end) if end < len(records) else None
+    }
+
+
+def ndjson_chunks(records: Iterable[Any], batch: int = 256) -> Iterator[bytes]:
+    """One JSON document per line, yielded a few hundred lines at a time"""
+    lines: List[bytes] = []
+    for record in records:
+        lines.append(dumps(record))
+        if len(lines) == batch:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
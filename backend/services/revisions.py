@@ -0,0 +1,189 @@
+import hashlib
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+HASH_SIZE = 8
+
+# (old start, old end, new start, new end) of a run of changed lines
+Change = Tuple[int, int, int, int]
+
+
+def line_hash(line: str) -> bytes:
+    return hashlib.blake2b(line.encode("utf-8", "surrogatepass"), digest_size=HASH_SIZE).digest()
+
+
+def split_hashes(blob: bytes) -> List[bytes]:
+    return [blob[start:start + HASH_SIZE] for start in range(0, len(blob), HASH_SIZE)]
+
+
+class RevisionLines:
+    """One streaming pass over a revised document.
+
+    Each line's digest is written to hash_sink as it is read and kept for the
+    diff (HASH_SIZE bytes a line); the text goes to a temporary file, from
+    which only the ranges the diff points at are read back.
+    """
+
+    READ_BLOCK = 4096
+
+    def __init__(self, hash_sink: BinaryIO = None):
+        self.hash_sink = hash_sink
+        self.hashes = bytearray()
+        self._spill = tempfile.TemporaryFile()
+        self._offsets = array("q", [0])
+
+    def append(self, line: str):
+        line = line.rstrip("\r\n")
+        digest = line_hash(line)
+        self.hashes += digest
+        if self.hash_sink is not None:
+            self.hash_sink.write(digest)
+        data = line.encode("utf-8", "surrogatepass")
+        self._spill.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def read(self, start: int, end: int) -> List[str]:
+        """Lines [start, end), clipped to the document"""
+        start, end = max(start, 0), min(end, len(self))
+        if start >= end:
+            return []
+        first = self._offsets[start]
+        self._spill.seek(first)
+        data = self._spill.read(self._offsets[end] - first)
+        return [data[self._offsets[k] - first:self._offsets[k + 1] - first].decode("utf-8", "surrogatepass")
+                for k in range(start, end)]
+
+    def __iter__(self) -> Iterator[str]:
+        for start in range(0, len(self), self.READ_BLOCK):
+            yield from self.read(start, start + self.READ_BLOCK)
+
+    def close(self):
+        self._spill.close()
+
+    def __enter__(self) -> "RevisionLines":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def line_mapping(old: Sequence[bytes], new: Sequence[bytes]) -> Tuple[List[Optional[int]], List[Optional[int]], List[Change]]:
+    """Align two documents by line digest.
+
+    Returns new line -> old line and old line -> new line for unchanged lines
+    (None for changed ones) and the changed runs.
+    """
+    new_to_old: List[Optional[int]] = [None] * len(new)
+    _align(old, new, 0, len(old), 0, len(new), new_to_old)
+
+    old_to_new: List[Optional[int]] = [None] * len(old)
+    changes: List[Change] = []
+    i = j = 0
+    for j_, i_ in enumerate(new_to_old + [len(old)]):
+        if i_ is None:
+            continue
+        if i_ > i or j_ > j:
+            changes.append((i, i_, j, j_))
+        if j_ < len(new):
+            old_to_new[i_] = j_
+        i, j = i_ + 1, j_ + 1
+    return new_to_old, old_to_new, changes
+
+
+def _align(old: Sequence[bytes], new: Sequence[bytes], o_lo: int, o_hi: int, n_lo: int, n_hi: int,
+           new_to_old: List[Optional[int]]):
+    """Patience-style diff: lines unique to both sides anchor the alignment, the gaps recurse.
+
+    A plain longest-match diff happily aligns blank lines and shifts whole item
+    blocks; unique lines (item headings, spec lines) keep blocks together.
+    """
+    while o_lo < o_hi and n_lo < n_hi and old[o_lo] == new[n_lo]:
+        new_to_old[n_lo] = o_lo
+        o_lo, n_lo = o_lo + 1, n_lo + 1
+    while o_lo < o_hi and n_lo < n_hi and old[o_hi - 1] == new[n_hi - 1]:
+        o_hi, n_hi = o_hi - 1, n_hi - 1
+        new_to_old[n_hi] = o_hi
+    if o_lo == o_hi or n_lo == n_hi:
+        return
+
+    anchors = _unique_anchors(old, new, o_lo, o_hi, n_lo, n_hi)
+    if not anchors:
+        matcher = SequenceMatcher(None, old[o_lo:o_hi], new[n_lo:n_hi], autojunk=False)
+        for i, j, size in matcher.get_matching_blocks():
+            new_to_old[n_lo + j:n_lo + j + size] = range(o_lo + i, o_lo + i + size)
+        return
+
+    for i, j in anchors:
+        _align(old, new, o_lo, i, n_lo, j, new_to_old)
+        new_to_old[j] = i
+        o_lo, n_lo = i + 1, j + 1
+    _align(old, new, o_lo, o_hi, n_lo, n_hi, new_to_old)
+
+
+def _unique_anchors(old: Sequence[bytes], new: Sequence[bytes], o_lo: int, o_hi: int, n_lo: int,
+                    n_hi: int) -> List[Tuple[int, int]]:
+    """(old, new) positions of lines occurring once on each side, longest run in order on both"""
+    old_counts = Counter(old[o_lo:o_hi])
+    new_counts = Counter(new[n_lo:n_hi])
+    old_at = {old[i]: i for i in range(o_lo, o_hi) if old_counts[old[i]] == 1}
+    candidates = [(old_at[new[j]], j) for j in range(n_lo, n_hi)
+                  if new_counts[new[j]] == 1 and new[j] in old_at]
+
+    # Longest increasing subsequence of old positions (candidates are in new order)
+    tails: List[int] = []
+    tail_at: List[int] = []
+    previous: List[Optional[int]] = [None] * len(candidates)
+    for index, (i, _) in enumerate(candidates):
+        k = bisect_left(tails, i)
+        previous[index] = tail_at[k - 1] if k else None
+        if k == len(tails):
+            tails.append(i)
+            tail_at.append(index)
+        else:
+            tails[k] = i
+            tail_at[k] = index
+
+    chain = []
+    index = tail_at[-1] if tail_at else None
+    while index is not None:
+        chain.append(candidates[index])
+        index = previous[index]
+    return chain[::-1]
+
+
+def priced_items(items: List[Dict[str, Any]], entries: List[Optional[Dict[str, Any]]],
+                 line_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Each extracted item with its quotation line (None if unmatched); line_items follow the matched entries"""
+    priced = iter(line_items)
+    return [{
+        "item_name": item["item_name"],
+        "quantity": item["quantity"],
+        "specifications": item["specifications"],
+        "line_item": next(priced) if entry is not None else None
+    } for item, entry in zip(items, entries)]
+
+
+def line_item_delta(before: List[Dict[str, Any]], after: List[Dict[str, Any]],
+                    pairs: Dict[int, int]) -> Dict[str, Any]:
+    """Added, removed and modified items between two priced_items lists; pairs maps after -> before"""
+    paired = set(pairs.values())
+    modified = []
+    unchanged = 0
+    for new_index, old_index in sorted(pairs.items()):
+        if before[old_index] == after[new_index]:
+            unchanged += 1
+        else:
+            modified.append({"before": before[old_index], "after": after[new_index]})
+    return {
+        "added": [item for index, item in enumerate(after) if index not in pairs],
+        "removed": [item for index, item in enumerate(before) if index not in paired],
+        "modified": modified,
+        "unchanged": unchanged
+    }
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from backend.config import settings
+
+if TYPE_CHECKING:
+    from backend.services.orchestrator import Orchestrator
+    from backend.services.pdf_renderer import PDFRenderer
+    from backend.services.web_scraper import WebScraper
+
+logger = logging.getLogger(__name__)
+
+# Loaded on first use; importing this module pulls in none of their dependencies
+SUBSYSTEMS = ("matching", "pdf", "scraping")
+
+_lock = threading.Lock()
+_web_scraper: Optional["WebScraper"] = None
+_pdf_renderer: Optional["PDFRenderer"] = None
+_warm_seconds: Dict[str, float] = {}
+
+
+def get_web_scraper() -> "WebScraper":
+    """The shared scraper; aiohttp and lxml are imported on the first call"""
+    global _web_scraper
+    if _web_scraper is None:
+        with _lock:
+            if _web_scraper is None:
+                from backend.database.scrape_cache import ScrapeCache
+                from backend.services.web_scraper import WebScraper
+
+                _web_scraper = WebScraper(ScrapeCache(
+                    settings.SCRAPE_CACHE_PATH,
+                    ttl_seconds=settings.SCRAPE_CACHE_TTL_SECONDS,
+                    max_bytes=settings.SCRAPE_CACHE_MAX_BYTES
+                ))
+    return _web_scraper
+
+
+def get_pdf_renderer() -> "PDFRenderer":
+    global _pdf_renderer
+    if _pdf_renderer is None:
+        with _lock:
+            if _pdf_renderer is None:
+                from backend.services.pdf_renderer import PDFRenderer
+
+                _pdf_renderer = PDFRenderer()
+    return _pdf_renderer
+
+
+def parse_warm_up(value: str) -> List[str]:
+    """Subsystem names from a WARM_UP value: comma separated, "all", or empty for none"""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    if "all" in names:
+        return list(SUBSYSTEMS)
+    unknown = [name for name in names if name not in SUBSYSTEMS]
+    if unknown:
+        raise ValueError(f"Unknown subsystems {unknown}, expected some of {list(SUBSYSTEMS)}")
+    return names
+
+
+async def warm_up(orchestrator: "Orchestrator", names: List[str]) -> Dict[str, float]:
+    """Load the named subsystems now instead of on their first request; returns seconds per subsystem"""
+    timings = {}
+    for name in names:
+        started = time.perf_counter()
+        if name == "matching":
+            await asyncio.to_thread(_warm_matching, orchestrator)
+        elif name == "pdf":
+            await get_pdf_renderer().warm_up()
+        elif name == "scraping":
+            await asyncio.to_thread(_warm_scraping)
+        else:
+            raise ValueError(f"Unknown subsystem {name!r}, expected one of {list(SUBSYSTEMS)}")
+        timings[name] = round(time.perf_counter() - started, 3)
+        _warm_seconds[name] = timings[name]
+        logger.info(f"Warmed up {name} in {timings[name]:.2f}s")
+    return timings
+
+
+def _warm_matching(orchestrator: "Orchestrator"):
+    # numpy comes in with the batch matcher, which every upload goes through
+    import backend.services.batch_matcher
+
+    orchestrator.technical_agent.catalog.maybe_reload()
+
+
+def _warm_scraping():
+    # Small pages are parsed inline, so lxml is needed in this process too
+    import backend.services.html_extractor
+
+    get_web_scraper()
+
+
+def status(orchestrator: "Orchestrator") -> Dict[str, Dict[str, object]]:
+    """Which subsystems this process has loaded, and how long their warm-up took"""
+    loaded = {
+        "matching": orchestrator.technical_agent.catalog_loaded,
+        "pdf": _pdf_renderer is not None,
+        "scraping": _web_scraper is not None
+    }
+    return {name: {"loaded": loaded[name], "warm_up_seconds": _warm_seconds.get(name)} for name in SUBSYSTEMS}
+
+
+async def close():
+    global _web_scraper
+    if _web_scraper is not None:
+        await _web_scraper.close()
+        _web_scraper = None
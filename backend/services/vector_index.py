@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import uuid
+import zlib
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when features or weighting change so stale on-disk indexes are rebuilt
+INDEX_FORMAT_VERSION = 1
+FEATURE_BITS = 20
+CHAR_NGRAMS = (3, 4)
+
+WORD_RE = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*")
+# "1.5mm2" -> "1.5 sqmm", "500kva" -> "500 kva": numbers and units become separate words
+NUMBER_UNIT_RE = re.compile(r"(\d+(?:\.\d+)?)([a-z]+\d?)")
+ALIASES = {
+    "cu": "copper", "al": "aluminium", "aluminum": "aluminium", "alu": "aluminium",
+    "mm2": "sqmm", "sq": "sqmm", "sqm": "sqmm", "xlpe": "xlpe", "pvc": "pvc",
+    "kv": "kv", "kva": "kva", "w": "watt", "watts": "watt", "lm": "lumen", "lumens": "lumen",
+    "tx": "transformer", "trafo": "transformer", "xfmr": "transformer",
+    "luminaire": "light", "lamp": "light", "lighting": "light", "lights": "light",
+    "cables": "cable", "transformers": "transformer",
+}
+
+
+def normalize(text: str) -> List[str]:
+    """Lower-case words with units split off numbers and common abbreviations expanded"""
+    words = []
+    for word in WORD_RE.findall(text.lower().replace("sq.mm", "sqmm")):
+        match = NUMBER_UNIT_RE.fullmatch(word)
+        parts = [match.group(1), match.group(2)] if match else [word]
+        words.extend(ALIASES.get(part, part) for part in parts)
+    return words
+
+
+def features(text: str) -> Counter:
+    """Hashed word and padded character n-gram counts"""
+    mask = (1 << FEATURE_BITS) - 1
+    counts: Counter = Counter()
+    for word in normalize(text):
+        counts[zlib.crc32(b"w:" + word.encode()) & mask] += 1
+        padded = f" {word} "
+        for n in CHAR_NGRAMS:
+            for start in range(len(padded) - n + 1):
+                counts[zlib.crc32(padded[start:start + n].encode()) & mask] += 1
+    return counts
+
+
+class VectorIndex:
+    """TF-IDF vectors of every product, stored feature-major (inverted) in .npy files.
+
+    The arrays are memory-mapped read-only, so every worker process that opens
+    the same index shares one copy in the OS page cache. A query's cosine score
+    against all products is a sparse dot product: gather the postings of the
+    query's features and sum them per product with one np.bincount.
+    """
+
+    FILES = ("indptr", "indices", "data", "idf")
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in self.FILES}
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.data = arrays["data"]
+        self.idf = arrays["idf"]
+
+    @classmethod
+    def load_or_build(cls, texts: Callable[[], Sequence[str]], size: int, source: str, version: str,
+                      root: str) -> "VectorIndex":
+        """Open the index for `version` of catalog `source` under `root`, building it first if no process has yet.
+
+        `texts` is only called to build, so opening an existing index never touches the products.
+        Indexes live in <source digest>-<version digest> directories; building one drops
+        those of other versions of the same source.
+        """
+        source_digest = hashlib.sha256(source.encode()).hexdigest()[:16]
+        version_digest = hashlib.sha256(
+            f"{INDEX_FORMAT_VERSION}:{FEATURE_BITS}:{version}:{size}".encode()
+        ).hexdigest()[:16]
+        path = os.path.join(root, f"{source_digest}-{version_digest}")
+        if not os.path.exists(os.path.join(path, "idf.npy")):
+            cls._build(texts(), path)
+            cls._prune(path)
+        return cls(path, size)
+
+    @staticmethod
+    def _prune(current: str):
+        """Drop indexes of other versions of the same source.
+
+        Processes still serving an old version keep their memory maps; the files
+        only disappear from the directory.
+        """
+        root = os.path.dirname(current)
+        prefix = os.path.basename(current).split("-")[0] + "-"
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name.startswith(prefix) and path != current and not name.endswith(".tmp"):
+                shutil.rmtree(path, ignore_errors=True)
+
+    @classmethod
+    def _build(cls, texts: Sequence[str], path: str):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp_path)
+        try:
+            arrays = cls._vectorize(texts)
+            for name in cls.FILES:
+                np.save(os.path.join(tmp_path, f"{name}.npy"), arrays[name])
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # Another process published the same index first; theirs is identical
+                if not os.path.exists(os.path.join(path, "idf.npy")):
+                    raise
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    @staticmethod
+    def _vectorize(texts: Sequence[str]) -> Dict[str, np.ndarray]:
+        dimensions = 1 << FEATURE_BITS
+        rows, columns, counts = [], [], []
+        # Catalogs repeat names and spec sets heavily; featurize each distinct text once
+        cache: Dict[str, Tuple[List[int], List[int]]] = {}
+        for row, text in enumerate(texts):
+            entry = cache.get(text)
+            if entry is None:
+                counted = features(text)
+                entry = cache[text] = (list(counted.keys()), list(counted.values()))
+            columns.extend(entry[0])
+            counts.extend(entry[1])
+            rows.extend([row] * len(entry[0]))
+
+        rows = np.asarray(rows, dtype=np.int32)
+        columns = np.asarray(columns, dtype=np.int32)
+        weights = np.asarray(counts, dtype=np.float32)
+
+        document_frequency = np.bincount(columns, minlength=dimensions)
+        idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        weights *= idf[columns]
+        norms = np.sqrt(np.bincount(rows, weights=weights.astype(np.float64) ** 2, minlength=len(texts)))
+        weights /= np.maximum(norms, 1e-12)[rows].astype(np.float32)
+
+        order = np.argsort(columns, kind="stable")
+        indptr = np.zeros(dimensions + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=indptr[1:])
+        return {
+            "indptr": indptr,
+            "indices": rows[order],
+            "data": weights[order],
+            "idf": idf
+        }
+
+    def scores(self, text: str) -> Optional[np.ndarray]:
+        """Cosine similarity of `text` against every product, or None if it shares no feature"""
+        counted = features(text)
+        if not counted:
+            return None
+        columns = np.fromiter(counted.keys(), dtype=np.int64, count=len(counted))
+        weights = np.fromiter(counted.values(), dtype=np.float32, count=len(counted)) * self.idf[columns]
+        weights /= max(float(np.sqrt(np.dot(weights, weights))), 1e-12)
+
+        starts, ends = self.indptr[columns], self.indptr[columns + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return None
+        # Positions of every posting of the query's features, without a Python loop per feature
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.bincount(self.indices[offsets], weights=self.data[offsets] * np.repeat(weights, lengths),
+                           minlength=self.size)
+
+    def top_k(self, text: str, limit: int, min_score: float) -> List[Tuple[int, float]]:
+        """Up to `limit` (product index, score 0-100) pairs with score > min_score, best first"""
+        similarity = self.scores(text)
+        if similarity is None:
+            return []
+        if limit < self.size:
+            # Everything tied with the k-th best stays in, so ties resolve to the lowest index
+            kth = np.partition(similarity, self.size - limit)[self.size - limit]
+            candidates = np.flatnonzero(similarity >= kth)
+        else:
+            candidates = np.arange(self.size)
+        order = np.lexsort((candidates, -similarity[candidates]))[:limit]
+
+        results = []
+        for idx in candidates[order].tolist():
+            score = round(float(similarity[idx]) * 100, 1)
+            if score > min_score:
+                results.append((idx, score))
+        return results
+
+
+def index_text(name: str, specifications: Dict[str, str]) -> str:
+    """What a product is matched on: its name followed by its specification values"""
+    return " ".join([name, *map(str, specifications.values())])
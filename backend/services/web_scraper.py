@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterator, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+
+from backend.config import settings
+from backend.database.scrape_cache import ScrapeCache
+from backend.services import metrics
+from backend.services.file_processor import get_extraction_pool
+from backend.services.html_extractor import EXTRACTOR_VERSION, extract_page
+
+logger = logging.getLogger(__name__)
+
+# The UI sends named depths; API callers may send a number of link hops
+DEPTH_NAMES = {"single": 0, "links": 1, "deep": 2}
+CACHE_MODES = ("prefer", "bypass", "only")
+
+
+class ScrapeCacheMiss(Exception):
+    pass
+
+
+def parse_depth(depth: Any) -> int:
+    if depth in DEPTH_NAMES:
+        return DEPTH_NAMES[depth]
+    try:
+        return max(0, int(depth))
+    except (TypeError, ValueError):
+        return 0
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used to de-duplicate visits: no fragment, lower-case host"""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1/rate seconds apart.
+
+    Only hosts whose next free slot is still in the future are remembered; the
+    rest are dropped as they go idle, so crawling many hosts does not grow the table.
+    """
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        # Least recently requested host first
+        self._next_slot: "OrderedDict[str, float]" = OrderedDict()
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        while self._next_slot and next(iter(self._next_slot.values())) <= now:
+            self._next_slot.popitem(last=False)
+        slot = max(now, self._next_slot.pop(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class WebScraper:
+    """Shared HTTP client for scraping; one pooled session for the app lifetime"""
+
+    def __init__(self, cache: ScrapeCache = None):
+        self.cache = cache
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.rate_limiter = HostRateLimiter(settings.SCRAPE_HOST_REQUESTS_PER_SECOND)
+        self.bytes_fetched = 0
+
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.SCRAPE_POOL_SIZE,
+                limit_per_host=settings.SCRAPE_POOL_SIZE_PER_HOST,
+                ttl_dns_cache=300,
+                keepalive_timeout=30
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.SCRAPE_TIMEOUT_SECONDS)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self.cache is not None:
+            await self.cache.close()
+
+    async def fetch(self, url: str, etag: str = None, last_modified: str = None) -> Dict[str, Any]:
+        """GET a page, reading at most SCRAPE_MAX_BYTES of the body.
+
+        With validators the request is conditional and a 304 comes back with html=None.
+        """
+        await self.rate_limiter.wait(urlsplit(url).netloc.lower())
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        async with self.session().get(url, headers=headers) as response:
+            if response.status == 304:
+                return {"url": str(response.url), "status": 304, "html": None}
+            response.raise_for_status()
+            body = bytearray()
+            truncated = False
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                body += chunk
+                if len(body) >= settings.SCRAPE_MAX_BYTES:
+                    del body[settings.SCRAPE_MAX_BYTES:]
+                    truncated = True
+                    break
+            self.bytes_fetched += len(body)
+            metrics.SCRAPE_BYTES.inc(len(body))
+
+            encoding = response.get_encoding() if response.charset else "utf-8"
+            return {
+                "url": str(response.url),
+                "status": response.status,
+                "html": body.decode(encoding, errors="replace"),
+                "truncated": truncated,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")
+            }
+
+    async def scrape_page(self, url: str, cache_mode: str = "prefer") -> Dict[str, Any]:
+        """Fetch and extract one page, going through the scrape cache unless bypassed.
+
+        prefer: fresh entries are served as-is, stale ones revalidated with a
+        conditional GET; bypass: always fetch (the result is still stored);
+        only: never touch the network.
+        """
+        page = await self._scrape_page(url, cache_mode)
+        metrics.SCRAPE_PAGES.labels(cache=page["cache"]).inc()
+        return page
+
+    async def _scrape_page(self, url: str, cache_mode: str) -> Dict[str, Any]:
+        key = normalize_url(url)
+        entry = None
+        if self.cache is not None and cache_mode != "bypass":
+            entry = await self.cache.get(key)
+
+        if cache_mode == "only":
+            if entry is None:
+                raise ScrapeCacheMiss(f"{url} is not in the scrape cache")
+            self.cache.hits += 1
+            return await self._cached_page(key, entry, "hit")
+
+        if entry is not None and entry["fresh"]:
+            self.cache.hits += 1
+            return await self._cached_page(key, entry, "hit")
+
+        if entry is not None:
+            fetched = await self.fetch(url, entry["etag"], entry["last_modified"])
+            if fetched["status"] == 304:
+                self.cache.revalidated += 1
+                await self.cache.touch(key)
+                return await self._cached_page(key, entry, "revalidated")
+        else:
+            fetched = await self.fetch(url)
+
+        page = await self.extract(fetched["html"], fetched["url"])
+        page["truncated"] = fetched["truncated"]
+        if self.cache is not None:
+            if cache_mode != "bypass":
+                self.cache.misses += 1
+            try:
+                await self.cache.put(key, fetched["html"], page, fetched["etag"], fetched["last_modified"],
+                                     EXTRACTOR_VERSION)
+            except Exception as e:
+                logger.warning(f"Scrape cache store failed for {url}: {e}")
+        return {**page, "cache": "bypass" if cache_mode == "bypass" else "miss"}
+
+    async def _cached_page(self, key: str, entry: Dict[str, Any], status: str) -> Dict[str, Any]:
+        page = entry["page"]
+        if entry["extractor_version"] != EXTRACTOR_VERSION:
+            # Extractor changed since this was stored: re-extract from the body, no refetch
+            page = {**await self.extract(await self.cache.get_body(key), page["url"]),
+                    "truncated": page.get("truncated", False)}
+            await self.cache.update_page(key, page, EXTRACTOR_VERSION)
+        return {**page, "cache": status}
+
+    async def extract(self, html: str, url: str) -> Dict[str, Any]:
+        """Parse small pages inline; larger ones in the worker pool so the loop stays free"""
+        if len(html) <= settings.SCRAPE_INLINE_PARSE_BYTES:
+            return extract_page(html, url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_extraction_pool(), extract_page, html, url)
+
+    async def crawl(self, url: str, depth: int = 0, max_pages: int = None,
+                    cache_mode: str = "prefer") -> AsyncIterator[Dict[str, Any]]:
+        """Yield pages as they complete, following same-host links up to `depth` hops.
+
+        The start page's errors propagate; errors on linked pages are yielded
+        as {"url", "error"} entries so one dead link does not fail the crawl.
+        """
+        max_pages = max_pages or settings.SCRAPE_MAX_PAGES
+        host = urlsplit(url).netloc.lower()
+        visited = {normalize_url(url)}
+        semaphore = asyncio.Semaphore(settings.SCRAPE_CONCURRENCY)
+
+        async def visit(page_url: str, level: int):
+            async with semaphore:
+                return level, await self.scrape_page(page_url, cache_mode)
+
+        start = asyncio.create_task(visit(url, 0))
+        pending = {start}
+        links: Dict[asyncio.Task, str] = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task is not start and task.exception() is not None:
+                        yield {"url": links[task], "error": str(task.exception())}
+                        continue
+                    level, page = task.result()
+                    yield page
+
+                    if level >= depth:
+                        continue
+                    for link in self._follow(page["link_urls"], host, visited, max_pages):
+                        child = asyncio.create_task(visit(link, level + 1))
+                        links[child] = link
+                        pending.add(child)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _follow(self, link_urls: List[str], host: str, visited: set, max_pages: int) -> List[str]:
+        follow = []
+        for link in link_urls:
+            parts = urlsplit(link)
+            if parts.scheme not in ("http", "https") or parts.netloc.lower() != host:
+                continue
+            key = normalize_url(link)
+            if key in visited or len(visited) >= max_pages:
+                continue
+            visited.add(key)
+            follow.append(link)
+        return follow
@@ -0,0 +1,22 @@
+import math
+from typing import Any
+
+
+def check_number(name: str, value: Any, lower: float = 0, upper: float = math.inf) -> Any:
+    """Check value is a number in [lower, upper]; strings and booleans are rejected rather than guessed at.
+
+    The value is returned as given, so 5 stays an int and anything hashed from it keeps its digest.
+    Raises ValueError naming the field, which endpoints report as a 400.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number, got {type(value).__name__}")
+    if not lower <= value <= upper:
+        raise ValueError(f"{name} must be between {lower} and {upper}, got {value}")
+    return value
+
+
+def check_integer(name: str, value: Any, lower: int = 0, upper: float = math.inf) -> int:
+    """check_number for whole numbers"""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{name} must be an integer, got {type(value).__name__}")
+    return check_number(name, value, lower, upper)
@@ -0,0 +1,78 @@
+"""Compare the single-pass lxml extractor with the original BeautifulSoup + html2text path.
+
+    python -m benchmarks.bench_html_extraction --sizes 10 100 1000 --repeat 5
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, Dict, Any
+
+from backend.services.html_extractor import extract_page
+
+WORDS = ["tender", "supply", "cable", "xlpe", "transformer", "led", "street", "light", "bid",
+         "specification", "delivery", "warranty", "copper", "1100V", "IP65", "500KVA", "sqmm"]
+
+
+def legacy_extract(html: str, url: str) -> Dict[str, Any]:
+    """The scrape-web extraction as it was before html_extractor: parse, serialize, re-parse"""
+    import html2text
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text_maker = html2text.HTML2Text()
+    text_maker.ignore_links = False
+    text_maker.ignore_images = False
+    content = text_maker.handle(str(soup))
+    return {
+        "title": soup.title.string if soup.title else "Scraped Document",
+        "content": content,
+        "wordCount": len(content.split()),
+        "links": len(soup.find_all('a'))
+    }
+
+
+def synthetic_page(sections: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    sentence = lambda n: " ".join(rng.choice(WORDS) for _ in range(n))
+    parts = ["<html><head><title>Procurement Portal</title><style>body{}</style>"
+             "<script>var tracking = 1;</script></head><body>"]
+    for index in range(sections):
+        parts.append(f"<h2>Section {index}: {sentence(4)}</h2>")
+        parts.append(f"<p>{sentence(40)} <a href='/tender/{index}'>{sentence(3)}</a> {sentence(20)}</p>")
+        parts.append("<ul>" + "".join(f"<li>{sentence(8)}</li>" for _ in range(5)) + "</ul>")
+        parts.append("<table>" + "".join(
+            f"<tr><td>{sentence(2)}</td><td>{rng.randint(1, 500)}</td></tr>" for _ in range(4)
+        ) + "</table>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def measure(extract: Callable, html: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extract(html, "https://portal.example/tenders/")
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="sections per page")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'sections':>9} {'KB':>8} {'legacy ms':>10} {'lxml ms':>9} {'speedup':>8}")
+    for sections in args.sizes:
+        html = synthetic_page(sections)
+        legacy = measure(legacy_extract, html, args.repeat)
+        current = measure(extract_page, html, args.repeat)
+        print(f"{sections:>9} {len(html) / 1024:>8.0f} {legacy * 1000:>10.1f} {current * 1000:>9.1f} "
+              f"{legacy / current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Synthetic inputs for the benchmarks: RFP documents shaped like sample_rfp.txt and product catalogs."""
+import csv
+import random
+from typing import Dict, Any, Iterator, List
+
+COMPANIES = ["ABC Manufacturing Ltd.", "Northern Power Grid", "Metro Rail Corporation", "Sunrise Textiles",
+             "Coastal Water Board", "Apex Steel Works"]
+PROJECTS = ["Factory Electrical Upgrade", "Substation Expansion", "Depot Lighting Retrofit",
+            "Campus Power Distribution", "Pumping Station Refurbishment"]
+
+# Filler prose for non-item lines; no word may start with an item keyword (cable, led, light, ...)
+FILLER = ["bidder", "shall", "submit", "documents", "before", "closing", "date", "tender", "fee", "is",
+          "non", "refundable", "site", "visit", "mandatory", "technical", "evaluation", "criteria", "apply",
+          "earnest", "money", "deposit", "required", "quality", "inspection", "at", "works", "drawings",
+          "approval", "testing", "procedure", "installation", "commissioning", "scope", "includes"]
+
+
+def _cable(rng: random.Random) -> Dict[str, Any]:
+    size = rng.choice(["1.5", "2.5", "4", "6", "10", "16", "25", "35", "50", "70", "95"])
+    insulation = rng.choice(["XLPE", "PVC"])
+    voltage = rng.choice(["1100V", "3.3KV", "11KV"])
+    return {
+        "name": f"{insulation} Insulated Copper Cable {size} sqmm",
+        "category": "Cables",
+        "specifications": {"voltage": voltage, "material": rng.choice(["Copper", "Aluminium"]),
+                           "cores": f"{rng.randint(1, 4)} core"},
+        "unit_price": round(rng.uniform(20, 900), 2),
+        "unit": "meter"
+    }
+
+
+def _transformer(rng: random.Random) -> Dict[str, Any]:
+    capacity = rng.choice(["100KVA", "250KVA", "500KVA", "630KVA", "1000KVA", "1600KVA"])
+    primary = rng.choice(["11KV", "22KV", "33KV"])
+    return {
+        "name": f"{primary}/433V Distribution Transformer {capacity}",
+        "category": "Transformers",
+        "specifications": {"primary": primary, "secondary": "433V", "capacity": capacity,
+                           "cooling": rng.choice(["ONAN", "oil cooled", "dry type"])},
+        "unit_price": round(rng.uniform(150000, 2500000), 2),
+        "unit": "unit"
+    }
+
+
+def _light(rng: random.Random) -> Dict[str, Any]:
+    power = rng.choice(["20W", "30W", "50W", "75W", "100W", "150W", "200W"])
+    kind = rng.choice(["Street", "Flood", "High Bay", "Panel"])
+    return {
+        "name": f"LED {kind} Light {power}",
+        "category": "Lighting",
+        "specifications": {"power": power, "ip_rating": rng.choice(["IP65", "IP66", "IP54"]),
+                           "color": rng.choice(["3000K", "4000K", "5000K", "6500K"])},
+        "unit_price": round(rng.uniform(400, 15000), 2),
+        "unit": "unit"
+    }
+
+
+def _switchgear(rng: random.Random) -> Dict[str, Any]:
+    rating = rng.choice(["63A", "100A", "250A", "400A", "630A", "800A", "1250A"])
+    kind = rng.choice(["MCCB", "ACB", "RMU", "VCB"])
+    return {
+        "name": f"{kind} Switchgear Panel {rating}",
+        "category": "Switchgear",
+        "specifications": {"rating": rating, "poles": rng.choice(["3 pole", "4 pole"]),
+                           "breaking": rng.choice(["25KA", "36KA", "50KA"])},
+        "unit_price": round(rng.uniform(8000, 900000), 2),
+        "unit": "unit"
+    }
+
+
+PRODUCT_FAMILIES = [_cable, _transformer, _light, _switchgear]
+
+
+def synthetic_products(count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Products in the TechnicalAgent catalog schema; names repeat across ids like a real catalog"""
+    rng = random.Random(seed)
+    for index in range(count):
+        product = rng.choice(PRODUCT_FAMILIES)(rng)
+        product["product_id"] = f"{product['category'][:4].upper()}-{index:07d}"
+        yield product
+
+
+def write_catalog_csv(path: str, count: int, seed: int = 0) -> str:
+    """Write a catalog CSV with spec_<name> columns, the flat format ProductCatalog reads"""
+    columns = ["product_id", "name", "category", "unit_price", "unit"]
+    spec_columns = sorted({f"spec_{key}" for family in PRODUCT_FAMILIES
+                           for key in family(random.Random(0))["specifications"]})
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns + spec_columns)
+        writer.writeheader()
+        for product in synthetic_products(count, seed):
+            row = {key: product[key] for key in columns}
+            row.update({f"spec_{key}": value for key, value in product["specifications"].items()})
+            writer.writerow(row)
+    return path
+
+
+def _item_lines(number: int, rng: random.Random) -> List[str]:
+    product = rng.choice(PRODUCT_FAMILIES)(rng)
+    quantity = rng.randint(1, 2000)
+    specs = ", ".join(f"{value}" for value in product["specifications"].values())
+    return [
+        f"{number}. {product['name']} - {quantity} {product['unit']}s",
+        f"   Specifications: {specs}, IS standards",
+        f"   Delivery: {rng.randint(1, 12)} weeks",
+    ]
+
+
+def synthetic_rfp(lines: int, keyword_density: float = 0.3, seed: int = 0) -> str:
+    """An RFP with sample_rfp.txt's layout and roughly `lines` lines.
+
+    keyword_density is the share of lines belonging to item blocks (three lines
+    and a blank per item); the rest is filler prose the agents have to scan past.
+    """
+    rng = random.Random(seed)
+    out = [f"COMPANY: {rng.choice(COMPANIES)}", f"PROJECT: {rng.choice(PROJECTS)}", "", "REQUIRED ITEMS:"]
+    number = 1
+    body_lines = max(lines - 9, 1)
+    # An item block is 4 lines (3 + blank), filler is 1: pick items so their share of lines is the density
+    item_probability = keyword_density / (4 - 3 * keyword_density)
+    while len(out) < body_lines:
+        if rng.random() < item_probability:
+            out.extend(_item_lines(number, rng))
+            out.append("")
+            number += 1
+        else:
+            out.append(" ".join(rng.choice(FILLER) for _ in range(rng.randint(6, 16))).capitalize() + ".")
+    out.extend([
+        "",
+        "PROJECT DETAILS:",
+        f"Delivery Timeline: {rng.randint(4, 20)} weeks total",
+        "Payment Terms: 50% advance, 50% on delivery",
+        "Warranty Requirements: 2 years comprehensive",
+        "Quality Standards: IS/IEC standards required",
+    ])
+    return "\n".join(out) + "\n"
@@ -0,0 +1,89 @@
+"""Import-time budget for the app entry points, measured with python -X importtime.
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --module backend.main --budget-ms 1200 --top 15
+
+Each module is imported in a fresh interpreter (best of --repeat runs). The
+report lists the slowest modules by self time and the cumulative cost per
+top-level package; with --budget-ms the exit status is 1 when any entry point
+takes longer. Module-level work (building services at import) is included.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, Any, List
+
+ENTRY_POINTS = ["backend.main", "backend.main_simple"]
+
+
+def import_profile(module: str) -> Dict[str, Any]:
+    """One cold import of `module`: total microseconds and (self us, cumulative us, name) per module"""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us), int(cumulative_us), name.strip()))
+    total = next((cumulative for _, cumulative, name in reversed(modules) if name == module), 0)
+    return {"module": module, "total_us": total, "modules": modules}
+
+
+def measure(module: str, repeat: int) -> Dict[str, Any]:
+    """Fastest of `repeat` cold imports; the first run also warms the OS file cache"""
+    return min((import_profile(module) for _ in range(repeat)), key=lambda profile: profile["total_us"])
+
+
+def by_package(modules: List[tuple]) -> Dict[str, int]:
+    """Self time summed per top-level package ("backend.services" stays split out)"""
+    totals: Dict[str, int] = defaultdict(int)
+    for self_us, _, name in modules:
+        parts = name.split(".")
+        package = ".".join(parts[:2]) if parts[0] == "backend" else parts[0]
+        totals[package] += self_us
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def report(profile: Dict[str, Any], top: int):
+    print(f"\n{profile['module']}: {profile['total_us'] / 1000:.1f} ms")
+    print(f"  {'package':<40} {'self ms':>10}")
+    for package, self_us in list(by_package(profile["modules"]).items())[:top]:
+        print(f"  {package:<40} {self_us / 1000:>10.1f}")
+    print(f"  {'module':<40} {'self ms':>10} {'cumulative ms':>14}")
+    for self_us, cumulative_us, name in sorted(profile["modules"], reverse=True)[:top]:
+        print(f"  {name:<40} {self_us / 1000:>10.1f} {cumulative_us / 1000:>14.1f}")
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", nargs="+", default=ENTRY_POINTS)
+    parser.add_argument("--budget-ms", type=float, help="fail when an entry point imports slower than this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="rows per table")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    over = []
+    for module in args.module:
+        profile = measure(module, args.repeat)
+        report(profile, args.top)
+        if args.budget_ms is not None and profile["total_us"] / 1000 > args.budget_ms:
+            over.append(module)
+
+    if over:
+        print(f"\nOver the {args.budget_ms:.0f} ms import budget: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""Load test: weighted traffic mixes against the app, with latency percentiles and event-loop lag per route.
+
+    python -m benchmarks.load_test --duration 30 --concurrency 16
+    python -m benchmarks.load_test --mix upload=1,poll=8,scrape=2,pdf=1 --rate 40 --output load.json
+    python -m benchmarks.load_test --uvicorn --output new.json --compare load.json --threshold 0.2
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --mix poll=1,health=1
+
+By default the app runs in this process behind httpx.ASGITransport, on the
+same event loop as the load generator; --uvicorn serves it from a local
+uvicorn subprocess and --url targets a server that is already running.
+Scrapes and PDFs use pages from a local fixture server. Without --rate,
+--concurrency clients send requests back to back (closed loop); with --rate,
+requests are issued on a fixed schedule and timed from when they were due, so
+a stalled server shows up as latency instead of as fewer requests.
+
+Event-loop lag comes from a task sleeping --lag-interval at a time. In process,
+each route gets the lag observed while its requests were in flight; over HTTP
+only the server-wide distribution from /metrics is available. With --compare,
+routes whose p95 or p99 latency grew by more than --threshold are reported and
+the exit status is 1.
+"""
+import argparse
+import asyncio
+import bisect
+import importlib
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.generators import synthetic_rfp
+from benchmarks.run import fixture_server, git_commit, scratch_environment
+
+SCENARIOS = ["upload", "poll", "line_items", "quotation_pdf", "scrape", "pdf", "health"]
+DEFAULT_MIX = "upload=1,poll=6,line_items=2,quotation_pdf=1,scrape=2,pdf=1,health=2"
+
+LAG_BUCKET_RE = re.compile(r'^event_loop_lag_seconds_bucket\{le="([^"]+)"\} (\S+)$', re.MULTILINE)
+
+# (route, status, started, finished); status 0 means the request failed without a response
+Record = Tuple[str, int, float, float]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """"upload=1,poll=6" -> {"upload": 1.0, "poll": 6.0}; weights are relative, a bare name weighs 1"""
+    mix = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}, expected some of {SCENARIOS}")
+        mix[name] = float(weight or 1)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("The mix needs at least one scenario with a positive weight")
+    return mix
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(math.ceil(q / 100 * len(values)) - 1, 0))]
+
+
+class LoadTest:
+    """Sends the traffic mix through one client and records every request"""
+
+    def __init__(self, args: argparse.Namespace, client: httpx.AsyncClient, page_urls: List[str]):
+        self.args = args
+        self.client = client
+        self.page_urls = page_urls
+        self.page_content = ""
+        self.rng = random.Random(args.seed)
+        self.scenarios = [name for name, weight in args.mix.items() if weight > 0]
+        self.weights = [args.mix[name] for name in self.scenarios]
+        self.records: List[Record] = []
+        # Uploads still processing, and those with a quotation to read
+        self.pending: List[str] = []
+        self.completed: List[str] = []
+        self._uploads = itertools.count()
+        self._titles = itertools.count()
+
+    async def request(self, method: str, route: str, url: str, due: Optional[float],
+                      **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        self.records.append((f"{method} {route}", status, started if due is None else due, time.perf_counter()))
+        return response
+
+    async def upload(self, due: Optional[float] = None):
+        number = next(self._uploads)
+        # A different document every time, so it is processed instead of answered from the result cache
+        text = synthetic_rfp(self.args.rfp_lines, seed=self.args.seed * 1000003 + number)
+        response = await self.request("POST", "/api/v1/upload-rfp", "/api/v1/upload-rfp", due,
+                                      files={"file": (f"load-{number}.txt", text.encode(), "text/plain")})
+        if response is not None and response.status_code == 200:
+            body = response.json()
+            (self.completed if body["status"] == "completed" else self.pending).append(body["request_id"])
+
+    async def poll(self, due: Optional[float] = None):
+        # Clients poll their own uploads until they finish; once none are pending, finished ones get re-read
+        request_id = self.rng.choice(self.pending or self.completed)
+        response = await self.request("GET", "/api/v1/quotation/{request_id}", f"/api/v1/quotation/{request_id}",
+                                      due, params={"wait": self.args.poll_wait})
+        if response is not None and response.status_code != 425 and request_id in self.pending:
+            self.pending.remove(request_id)
+            if response.status_code == 200:
+                self.completed.append(request_id)
+
+    async def line_items(self, due: Optional[float] = None):
+        request_id = self.rng.choice(self.completed)
+        await self.request("GET", "/api/v1/quotation/{request_id}/line-items",
+                           f"/api/v1/quotation/{request_id}/line-items", due, params={"limit": self.args.page_size})
+
+    async def quotation_pdf(self, due: Optional[float] = None):
+        request_id = self.rng.choice(self.completed)
+        await self.request("GET", "/api/v1/quotation/{request_id}/pdf", f"/api/v1/quotation/{request_id}/pdf", due)
+
+    async def scrape(self, due: Optional[float] = None):
+        response = await self.request("POST", "/api/v1/scrape-web", "/api/v1/scrape-web", due, json={
+            "url": self.rng.choice(self.page_urls), "cache": self.args.scrape_cache
+        })
+        if not self.page_content and response is not None and response.status_code == 200:
+            self.page_content = response.json().get("content", "")
+
+    async def pdf(self, due: Optional[float] = None):
+        # A fresh title per call so the PDF cache does not short-circuit the render
+        await self.request("POST", "/api/v1/generate-pdf", "/api/v1/generate-pdf", due, json={
+            "title": f"Load test {next(self._titles)}", "content": self.page_content
+        })
+
+    async def health(self, due: Optional[float] = None):
+        await self.request("GET", "/api/v1/health", "/api/v1/health", due)
+
+    async def prepare(self):
+        """One request per scenario to load lazy subsystems, and finished uploads for the read scenarios.
+
+        Nothing sent here is part of the results.
+        """
+        await self.scrape()
+        for _ in range(self.args.warm_uploads):
+            await self.upload()
+        for name in self.scenarios:
+            if name in ("poll", "line_items", "quotation_pdf"):
+                await self.settle()
+            await getattr(self, name)()
+        await self.settle()
+        if not self.completed and any(name in self.scenarios for name in ("poll", "line_items", "quotation_pdf")):
+            raise RuntimeError("No upload finished during warm-up, so there are no quotations to read")
+        self.records.clear()
+
+    async def settle(self):
+        """Wait for pending uploads to finish"""
+        for request_id in list(self.pending):
+            response = await self.client.get(f"/api/v1/quotation/{request_id}", params={"wait": self.args.timeout})
+            self.pending.remove(request_id)
+            if response.status_code == 200:
+                self.completed.append(request_id)
+
+    async def issue(self, due: Optional[float], slots: asyncio.Semaphore = None):
+        name = self.rng.choices(self.scenarios, self.weights)[0]
+        if slots is None:
+            await getattr(self, name)(due)
+            return
+        async with slots:
+            await getattr(self, name)(due)
+
+    async def closed_loop(self, deadline: float, total: Optional[int]):
+        issued = itertools.count()
+
+        async def client():
+            while time.perf_counter() < deadline and (total is None or next(issued) < total):
+                await self.issue(None)
+
+        await asyncio.gather(*(client() for _ in range(self.args.concurrency)))
+
+    async def open_loop(self, deadline: float, total: Optional[int]):
+        """Requests due every 1/rate seconds; past --concurrency in flight they queue here, still timed from due"""
+        slots = asyncio.Semaphore(self.args.concurrency)
+        tasks = []
+        started = time.perf_counter()
+        for number in itertools.count():
+            due = started + number / self.args.rate
+            if due >= deadline or (total is not None and number >= total):
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self.issue(due, slots)))
+        await asyncio.gather(*tasks)
+
+
+def summarize(records: List[Record], seconds: float,
+              lag_samples: Optional[List[Tuple[float, float]]] = None) -> Dict[str, Any]:
+    """Latency percentiles, throughput and statuses per route and overall; with lag samples, the
+    p95 and max of the worst lag seen during each request of a route"""
+    times = [sample[0] for sample in lag_samples or []]
+    by_route: Dict[str, List[Record]] = defaultdict(list)
+    for record in records:
+        by_route[record[0]].append(record)
+
+    def stats(route_records: List[Record]) -> Dict[str, Any]:
+        latencies = sorted(finished - started for _, _, started, finished in route_records)
+        statuses = Counter(status for _, status, _, _ in route_records)
+        entry = {
+            "requests": len(route_records),
+            "errors": sum(count for status, count in statuses.items() if status == 0 or status >= 500),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "throughput": round(len(route_records) / seconds, 2) if seconds else None,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3)
+        }
+        if lag_samples is not None:
+            worst = sorted(
+                max((lag for _, lag in lag_samples[bisect.bisect_left(times, started):
+                                                   bisect.bisect_right(times, finished)]), default=0.0)
+                for _, _, started, finished in route_records
+            )
+            entry["lag_p95_ms"] = round(percentile(worst, 95) * 1000, 3)
+            entry["lag_max_ms"] = round(worst[-1] * 1000, 3)
+        return entry
+
+    summary = {
+        "seconds": round(seconds, 3),
+        "routes": {route: stats(by_route[route]) for route in sorted(by_route)},
+        "total": stats(records) if records else None
+    }
+    if lag_samples:
+        lags = sorted(lag for _, lag in lag_samples)
+        summary["loop_lag"] = {
+            "samples": len(lags),
+            "p50_ms": round(percentile(lags, 50) * 1000, 3),
+            "p99_ms": round(percentile(lags, 99) * 1000, 3),
+            "max_ms": round(lags[-1] * 1000, 3)
+        }
+    return summary
+
+
+def lag_buckets(metrics_text: str) -> Dict[float, float]:
+    """Cumulative event_loop_lag_seconds bucket counts from a /metrics page"""
+    return {float(le): float(count) for le, count in LAG_BUCKET_RE.findall(metrics_text)}
+
+
+def server_lag(before: Dict[float, float], after: Dict[float, float]) -> Optional[Dict[str, Any]]:
+    """Server-wide lag during the run from two bucket readings; percentiles are bucket upper bounds"""
+    counts = sorted((le, after[le] - before.get(le, 0.0)) for le in after)
+    total = counts[-1][1] if counts else 0
+    if not total:
+        return None
+
+    def upper_bound(q: float) -> float:
+        return next(le for le, count in counts if count >= q / 100 * total)
+
+    return {
+        "samples": int(total),
+        "p50_ms_at_most": upper_bound(50) * 1000,
+        "p99_ms_at_most": upper_bound(99) * 1000
+    }
+
+
+def report(summary: Dict[str, Any]):
+    lag = "lag_p95_ms" in (summary["total"] or {})
+    print(f"\n{'route':<48} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9}" + (f" {'lag p95':>9} {'lag max':>9}" if lag else ""))
+    rows = list(summary["routes"].items())
+    if summary["total"]:
+        rows.append(("total", summary["total"]))
+    for route, entry in rows:
+        line = (f"{route:<48} {entry['requests']:>6} {entry['errors']:>6} {entry['throughput']:>8.1f} "
+                f"{entry['p50_ms']:>9.1f} {entry['p95_ms']:>9.1f} {entry['p99_ms']:>9.1f} {entry['max_ms']:>9.1f}")
+        if lag:
+            line += f" {entry['lag_p95_ms']:>9.1f} {entry['lag_max_ms']:>9.1f}"
+        print(line)
+    if "loop_lag" in summary:
+        loop_lag = summary["loop_lag"]
+        print(f"\nEvent-loop lag: p50 {loop_lag['p50_ms']:.1f} ms, p99 {loop_lag['p99_ms']:.1f} ms, "
+              f"max {loop_lag['max_ms']:.1f} ms over {loop_lag['samples']} samples")
+    if summary.get("server_loop_lag"):
+        loop_lag = summary["server_loop_lag"]
+        print(f"\nServer event-loop lag: p50 <= {loop_lag['p50_ms_at_most']:g} ms, "
+              f"p99 <= {loop_lag['p99_ms_at_most']:g} ms over {loop_lag['samples']} samples")
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print p95/p99 side by side; return the routes whose tail latency regressed"""
+    regressions = []
+    print(f"\n{'route':<48} {'base p95':>9} {'new p95':>9} {'base p99':>9} {'new p99':>9}")
+    for route, new in current["results"]["routes"].items():
+        old = baseline["results"]["routes"].get(route)
+        if old is None:
+            continue
+        regressed = any(old[key] and new[key] / old[key] > 1 + threshold for key in ("p95_ms", "p99_ms"))
+        if regressed:
+            regressions.append(route)
+        print(f"{route:<48} {old['p95_ms']:>9.1f} {new['p95_ms']:>9.1f} {old['p99_ms']:>9.1f} "
+              f"{new['p99_ms']:>9.1f}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(app: str, workers: int, timeout: float) -> Tuple[subprocess.Popen, str]:
+    """Serve `app` from a uvicorn subprocess on a free local port, once its health check answers"""
+    port = _free_port()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", f"{app}:app", "--host", "127.0.0.1",
+                                "--port", str(port), "--workers", str(workers), "--log-level", "warning"])
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+        try:
+            if httpx.get(f"{url}/api/v1/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"uvicorn did not answer on {url} within {timeout:.0f}s")
+
+
+async def run_load(args: argparse.Namespace, client: httpx.AsyncClient, page_urls: List[str],
+                   in_process: bool) -> Dict[str, Any]:
+    from backend.services.metrics import LoopLagMonitor
+
+    load = LoadTest(args, client, page_urls)
+    await load.prepare()
+
+    monitor = LoopLagMonitor(args.lag_interval, history=10 ** 7) if in_process else None
+    metrics_before = None
+    if not in_process:
+        metrics_before = lag_buckets((await client.get("/metrics")).text)
+    total = args.requests
+    started = time.perf_counter()
+    deadline = math.inf if total is not None else started + args.duration
+    if monitor is not None:
+        monitor.start()
+    try:
+        if args.rate:
+            await load.open_loop(deadline, total)
+        else:
+            await load.closed_loop(deadline, total)
+    finally:
+        if monitor is not None:
+            await monitor.stop()
+    seconds = time.perf_counter() - started
+
+    summary = summarize(load.records, seconds, list(monitor.samples) if monitor is not None else None)
+    if metrics_before is not None:
+        summary["server_loop_lag"] = server_lag(metrics_before, lag_buckets((await client.get("/metrics")).text))
+    return summary
+
+
+async def run_in_process(args: argparse.Namespace, page_urls: List[str]) -> Dict[str, Any]:
+    app = importlib.import_module(args.app).app
+    # App errors come back as 500 responses, as they would from a server
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=args.timeout) as client:
+            return await run_load(args, client, page_urls, in_process=True)
+    finally:
+        await app.router.shutdown()
+
+
+async def run_over_http(args: argparse.Namespace, url: str, page_urls: List[str]) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        return await run_load(args, client, page_urls, in_process=False)
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="base URL of a running server instead of the in-process app")
+    target.add_argument("--uvicorn", action="store_true", help="serve the app from a local uvicorn subprocess")
+    parser.add_argument("--app", default="backend.main", help="module with the FastAPI app")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --uvicorn")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights, from {SCENARIOS}")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--requests", type=int, help="stop after this many requests instead of --duration")
+    parser.add_argument("--concurrency", type=int, default=16, help="clients, or most requests in flight with --rate")
+    parser.add_argument("--rate", type=float, default=0, help="requests per second (open loop); 0 = closed loop")
+    parser.add_argument("--rfp-lines", type=int, default=200, help="lines per uploaded RFP")
+    parser.add_argument("--page-sections", type=int, nargs="+", default=[10, 200], help="fixture page sizes")
+    parser.add_argument("--scrape-cache", default="bypass", help="scrape-web cache mode")
+    parser.add_argument("--poll-wait", type=float, default=0, help="?wait= of quotation polls")
+    parser.add_argument("--page-size", type=int, default=50, help="?limit= of line-item pages")
+    parser.add_argument("--warm-uploads", type=int, default=2, help="uploads finished before the run starts")
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="event-loop lag sampling interval")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed p95/p99 growth, 0.10 = 10%%")
+    args = parser.parse_args(argv)
+    try:
+        args.mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def main(argv: List[str] = None) -> int:
+    from benchmarks.bench_html_extraction import synthetic_page
+
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="rfp-load-")
+    # Inherited by the uvicorn subprocess too
+    os.environ.update(scratch_environment(workdir))
+
+    pages = {f"/page-{sections}.html": synthetic_page(sections, seed=args.seed).encode()
+             for sections in args.page_sections}
+    server = fixture_server(pages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    page_urls = [f"http://127.0.0.1:{server.server_address[1]}{path}" for path in pages]
+
+    process = None
+    try:
+        if args.url:
+            summary = asyncio.run(run_over_http(args, args.url.rstrip("/"), page_urls))
+        elif args.uvicorn:
+            process, url = start_uvicorn(args.app, args.workers, args.timeout)
+            summary = asyncio.run(run_over_http(args, url, page_urls))
+        else:
+            summary = asyncio.run(run_in_process(args, page_urls))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report(summary)
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "target": args.url or ("uvicorn" if args.uvicorn else "in-process"),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+        },
+        "results": summary
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} route(s) with p95/p99 latency up more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
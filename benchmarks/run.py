@@ -0,0 +1,355 @@
+"""Reproducible benchmark suite: agents, the full pipeline and HTTP endpoints on synthetic inputs.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --rfp-lines 10 1000 100000 --catalog-sizes 10 100000 1000000
+    python -m benchmarks.run --output new.json --compare bench.json --threshold 0.15
+
+Times are medians over --repeat runs after one warm-up; peak memory comes from a
+separate tracemalloc run (Python allocations in this process only). With
+--compare, every benchmark slower (or heavier) than the baseline by more than
+--threshold is reported and the exit status is 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, List, Optional
+
+from benchmarks.generators import synthetic_rfp, write_catalog_csv
+
+GROUPS = ["startup", "sales", "catalog", "match", "pricing", "pipeline", "endpoints"]
+
+
+async def _call(fn: Callable[[], Any]):
+    result = fn()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+async def measure(fn: Callable[[], Any], repeat: int, units: float, unit: str) -> Dict[str, Any]:
+    """Median wall time of `fn` (sync or async) plus the peak traced memory of one extra run"""
+    await _call(fn)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await _call(fn)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        await _call(fn)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "seconds": round(median, 6),
+        "min_seconds": round(min(timings), 6),
+        "throughput": round(units / median, 2) if median else None,
+        "unit": unit,
+        "peak_mb": round(peak / (1024 * 1024), 3),
+        "repeat": repeat
+    }
+
+
+class Suite:
+    def __init__(self, args: argparse.Namespace, workdir: str):
+        self.args = args
+        self.workdir = workdir
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._catalogs: Dict[int, str] = {}
+
+    async def record(self, name: str, fn: Callable[[], Any], units: float, unit: str, repeat: int = None):
+        repeat = repeat or self.args.repeat
+        try:
+            self.results[name] = await measure(fn, repeat, units, unit)
+        except Exception as e:
+            self.results[name] = {"error": f"{type(e).__name__}: {e}"}
+        result = self.results[name]
+        if "error" in result:
+            print(f"{name:<64} ERROR {result['error']}")
+        else:
+            print(f"{name:<64} {result['seconds'] * 1000:>11.2f} ms {result['throughput']:>14,.1f} "
+                  f"{result['unit']:<12} {result['peak_mb']:>9.2f} MB")
+
+    def catalog_path(self, products: int) -> str:
+        if products not in self._catalogs:
+            path = os.path.join(self.workdir, f"catalog-{products}.csv")
+            self._catalogs[products] = write_catalog_csv(path, products, seed=self.args.seed)
+        return self._catalogs[products]
+
+    def rfp_text(self, lines: int) -> str:
+        return synthetic_rfp(lines, keyword_density=self.args.keyword_density, seed=self.args.seed)
+
+    def repeat_for(self, size: int) -> int:
+        # Keep the largest inputs from dominating the run time
+        return 1 if size >= 100000 else self.args.repeat
+
+    async def startup(self):
+        from benchmarks.import_budget import ENTRY_POINTS, import_profile
+
+        # A fresh interpreter per run: interpreter start plus a cold import of the app
+        for module in ENTRY_POINTS:
+            await self.record(f"startup.import[{module}]", lambda: import_profile(module), 1, "imports/s",
+                              min(self.args.repeat, 3))
+
+    async def sales(self):
+        from backend.agents.sales_agent import SalesAgent
+
+        agent = SalesAgent()
+        for lines in self.args.rfp_lines:
+            text = self.rfp_text(lines)
+            await self.record(f"sales.extract_rfp_data[lines={lines}]",
+                              lambda: agent.extract_rfp_data(text), lines, "lines/s", self.repeat_for(lines))
+
+    async def catalog(self):
+        from backend.services.product_catalog import ProductCatalog
+
+        for products in self.args.catalog_sizes:
+            path = self.catalog_path(products)
+            await self.record(f"catalog.load[products={products}]",
+                              lambda: ProductCatalog(path, reload_check_seconds=3600), products, "products/s",
+                              self.repeat_for(products))
+            # The first (warm-up) call writes the snapshot, timed calls open it
+            snapshots = os.path.join(self.workdir, "catalog_snapshots")
+            await self.record(f"catalog.open_snapshot[products={products}]",
+                              lambda: ProductCatalog(path, reload_check_seconds=3600, snapshot_dir=snapshots),
+                              products, "products/s", self.repeat_for(products))
+
+    async def match(self):
+        from backend.agents.sales_agent import SalesAgent
+        from backend.agents.technical_agent import TechnicalAgent
+        from backend.services.product_catalog import ProductCatalog
+
+        extracted = await SalesAgent().extract_rfp_data(synthetic_rfp(2000, keyword_density=0.5, seed=self.args.seed))
+        items = extracted["items"]
+        for products in self.args.catalog_sizes:
+            agent = TechnicalAgent(catalog=ProductCatalog(self.catalog_path(products), reload_check_seconds=3600))
+            await self.record(f"technical.find_product_matches_batch[products={products},items={len(items)}]",
+                              lambda: agent.find_product_matches_batch(items), len(items), "items/s")
+            item = items[0]
+            await self.record(f"technical.find_product_matches[products={products}]",
+                              lambda: agent.find_product_matches(item["item_name"], item["specifications"]),
+                              1, "items/s")
+
+    async def pricing(self):
+        from backend.agents.pricing_agent import PricingAgent
+        from benchmarks.generators import synthetic_products
+
+        agent = PricingAgent()
+        company = {"name": "Benchmark Ltd.", "project": "Benchmark"}
+        for count in self.args.quotation_items:
+            matched = [{"matched_product": product, "quantity": index % 500 + 1, "match_score": 80}
+                       for index, product in enumerate(synthetic_products(count, seed=self.args.seed))]
+            await self.record(f"pricing.generate_quotation[items={count}]",
+                              lambda: agent.generate_quotation(company, matched), count, "items/s")
+
+    async def pipeline(self):
+        from backend.agents.technical_agent import TechnicalAgent
+        from backend.database.result_cache import ResultCache
+        from backend.services.orchestrator import Orchestrator
+        from backend.services.product_catalog import ProductCatalog
+
+        products = self.args.pipeline_catalog
+        orchestrator = Orchestrator(result_cache=ResultCache(os.path.join(self.workdir, "result_cache.db")))
+        orchestrator.technical_agent = TechnicalAgent(
+            catalog=ProductCatalog(self.catalog_path(products), reload_check_seconds=3600)
+        )
+
+        async def process(path: str):
+            result = await orchestrator.process_rfp(path, check_cache=False)
+            if result["status"] != "success":
+                raise RuntimeError(result.get("message"))
+
+        try:
+            for lines in self.args.rfp_lines:
+                path = os.path.join(self.workdir, f"rfp-{lines}.txt")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(self.rfp_text(lines))
+                await self.record(f"orchestrator.process_rfp[lines={lines},products={products}]",
+                                  lambda: process(path), lines, "lines/s", self.repeat_for(lines))
+        finally:
+            await orchestrator.result_cache.close()
+
+    async def endpoints(self):
+        import httpx
+        from benchmarks.bench_html_extraction import synthetic_page
+
+        pages = {f"/page-{sections}.html": synthetic_page(sections, seed=self.args.seed).encode()
+                 for sections in self.args.page_sections}
+        server = fixture_server(pages)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        from backend import main
+        transport = httpx.ASGITransport(app=main.app)
+        counter = iter(range(10 ** 9))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+                for sections in self.args.page_sections:
+                    url = f"{base}/page-{sections}.html"
+
+                    async def scrape():
+                        response = await client.post("/api/v1/scrape-web", json={"url": url, "cache": "bypass"})
+                        response.raise_for_status()
+                        return response.json()
+
+                    page = await scrape()
+                    await self.record(f"endpoint.scrape-web[sections={sections}]", scrape,
+                                      len(pages[f"/page-{sections}.html"]) / 1024, "KB/s")
+
+                    async def render():
+                        # A fresh title per call so the PDF cache does not short-circuit the render
+                        response = await client.post("/api/v1/generate-pdf", json={
+                            "title": f"{page['title']} {next(counter)}", "content": page["content"]
+                        })
+                        response.raise_for_status()
+                        return response.content
+
+                    await self.record(f"endpoint.generate-pdf[sections={sections}]", render,
+                                      len(page["content"]) / 1024, "KB/s")
+        finally:
+            server.shutdown()
+            await main.subsystems.close()
+            main.shutdown_extraction_pool()
+
+
+def fixture_server(pages: Dict[str, bytes]) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = pages.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+
+
+def scratch_environment(workdir: str) -> Dict[str, str]:
+    """Settings that keep every store the app touches inside `workdir`; settings read these at import"""
+    return {
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "RESULT_CACHE_PATH": os.path.join(workdir, "app_result_cache.db"),
+        "JOB_STORE_URL": "memory://",
+        "SCRAPE_CACHE_PATH": os.path.join(workdir, "scrape_cache.db"),
+        "PDF_CACHE_DIR": os.path.join(workdir, "pdf_cache"),
+        "CATALOG_SNAPSHOT_DIR": os.path.join(workdir, "catalog_snapshots"),
+        "VECTOR_INDEX_DIR": os.path.join(workdir, "vector_index"),
+        "MATCH_CACHE_PATH": os.path.join(workdir, "match_cache.db"),
+        "REVISION_STORE_PATH": os.path.join(workdir, "revisions.db"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+        "SCRAPE_HOST_REQUESTS_PER_SECOND": "0",
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print a side-by-side table; return the names of regressed benchmarks"""
+    regressions = []
+    print(f"\n{'benchmark':<64} {'base ms':>10} {'new ms':>10} {'time':>8} {'memory':>8}")
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None or "error" in old or "error" in new:
+            continue
+        time_ratio = new["seconds"] / old["seconds"] if old["seconds"] else 1.0
+        memory_ratio = new["peak_mb"] / old["peak_mb"] if old["peak_mb"] else 1.0
+        regressed = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<64} {old['seconds'] * 1000:>10.2f} {new['seconds'] * 1000:>10.2f} "
+              f"{time_ratio:>7.2f}x {memory_ratio:>7.2f}x{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=GROUPS)
+    parser.add_argument("--rfp-lines", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--keyword-density", type=float, default=0.3,
+                        help="share of RFP lines that belong to item blocks")
+    parser.add_argument("--catalog-sizes", type=int, nargs="+", default=[10, 10000, 100000])
+    parser.add_argument("--pipeline-catalog", type=int, default=10000, help="catalog size for process_rfp")
+    parser.add_argument("--quotation-items", type=int, nargs="+", default=[10, 1000])
+    parser.add_argument("--page-sections", type=int, nargs="+", default=[10, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before flagging, 0.10 = 10%%")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="rfp-bench-")
+    os.environ.update(scratch_environment(workdir))
+
+    suite = Suite(args, workdir)
+    print(f"{'benchmark':<64} {'median':>14} {'throughput':>14} {'':<12} {'peak':>12}")
+
+    async def run():
+        for group in GROUPS:
+            if group in args.only:
+                await getattr(suite, group)()
+
+    try:
+        asyncio.run(run())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+        },
+        "results": suite.results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The app mounts static/ and templates relative to the working directory
+os.chdir(ROOT)
+
+# Settings are read at import; keep every store the app touches out of data/
+_workdir = tempfile.mkdtemp(prefix="rfp-tests-")
+for name, value in {
+    "UPLOAD_DIR": "uploads",
+    "RESULT_CACHE_PATH": "result_cache.db",
+    "MATCH_CACHE_PATH": "",
+    "REVISION_STORE_PATH": "revisions.db",
+    "SCRAPE_CACHE_PATH": "scrape_cache.db",
+    "PDF_CACHE_DIR": "pdf_cache",
+    "CATALOG_SNAPSHOT_DIR": "",
+    "VECTOR_INDEX_DIR": "vector_index",
+    "PROFILE_DIR": "profiles",
+}.items():
+    os.environ[name] = os.path.join(_workdir, value) if value else ""
+os.environ["JOB_STORE_URL"] = "memory://"
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from backend import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    """Writes a synthetic catalog CSV under tmp_path; returns its path"""
+    from benchmarks.generators import write_catalog_csv
+
+    def write(count: int = 50, seed: int = 0, name: str = "catalog.csv") -> str:
+        return write_catalog_csv(str(tmp_path / name), count, seed=seed)
+
+    return write
+
+
+@pytest.fixture
+async def orchestrator(tmp_path):
+    from backend.agents.technical_agent import TechnicalAgent
+    from backend.database.match_cache import MatchCache
+    from backend.database.result_cache import ResultCache
+    from backend.database.revision_store import RevisionStore
+    from backend.services.orchestrator import Orchestrator
+
+    orchestrator = Orchestrator(
+        result_cache=ResultCache(str(tmp_path / "result_cache.db")),
+        revision_store=RevisionStore(str(tmp_path / "revisions.db"))
+    )
+    orchestrator.technical_agent = TechnicalAgent(match_cache=MatchCache(""))
+    yield orchestrator
+    await orchestrator.result_cache.close()
+    await orchestrator.revision_store.close()
@@ -0,0 +1,44 @@
+import pytest
+
+from backend.agents.sales_agent import SalesAgent
+from backend.agents.technical_agent import TechnicalAgent
+from backend.database.match_cache import MatchCache
+from backend.services.batch_matcher import match_batch
+from backend.services.product_catalog import ProductCatalog
+from benchmarks.generators import synthetic_rfp
+
+
+def rfp_queries(lines: int = 400, seed: int = 3):
+    items = list(SalesAgent().iter_items(synthetic_rfp(lines, seed=seed).splitlines()))
+    return [(item["item_name"], item["specifications"]) for item in items]
+
+
+@pytest.fixture
+def catalog(catalog_csv):
+    # Names repeat across product ids, so many candidates tie on score
+    return ProductCatalog(catalog_csv(500, seed=5), reload_check_seconds=3600)
+
+
+@pytest.mark.parametrize("min_score", [0, 30, 60])
+def test_batch_matches_scalar_including_ties(catalog, min_score):
+    queries = rfp_queries() + [("", ""), ("XLPE cable", ""), ("unrelated words", "nothing here")]
+    batch = match_batch(catalog.index, queries, min_score=min_score, limit=3, block_size=16)
+    scalar = [[(record.product_id, score) for record, score in catalog.find_matches(d, s, min_score=min_score)]
+              for d, s in queries]
+
+    assert [[(catalog.index.records[idx].product_id, score) for idx, score in row] for row in batch] == scalar
+    ties = [row for row in catalog.find_matches_batch(queries, min_score=min_score, limit=50)
+            if len({score for _, score in row}) < len(row)]
+    assert ties, "fixture should produce tied scores"
+
+
+@pytest.mark.anyio
+async def test_agent_batch_matches_scalar(catalog):
+    items = list(SalesAgent().iter_items(synthetic_rfp(200, seed=7).splitlines()))
+    scalar_agent = TechnicalAgent(catalog=catalog, match_cache=MatchCache(""))
+    batch_agent = TechnicalAgent(catalog=catalog, match_cache=MatchCache(""))
+
+    batch = await batch_agent.find_product_matches_batch(items)
+    scalar = [await scalar_agent.find_product_matches(item["item_name"], item["specifications"]) for item in items]
+    assert any(batch)
+    assert batch == scalar
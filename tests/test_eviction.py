@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from backend.database.result_cache import ResultCache
+from backend.database.scrape_cache import ScrapeCache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_result_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.db"), max_db_bytes=1000)
+    try:
+        for key in ("a", "b", "c"):
+            await cache.set(key, {"payload": key * 400}, "c", "p")
+
+        assert cache.evictions == 1
+        # Gone from both tiers
+        assert list(cache._memory) == ["b", "c"]
+        assert await cache.get("a") is None
+        assert await cache.get("b") is not None
+    finally:
+        await cache.close()
+
+
+async def test_scrape_cache_evicts_oldest_pages(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "scrape.db"), max_bytes=2000)
+    try:
+        for url in ("a", "b", "c"):
+            await cache.put(url, f"<p>{os.urandom(800).hex()}</p>", {"url": url}, None, None, 1)
+        assert cache.evictions == 1
+        assert await cache.get("a") is None
+        assert await cache.get("c") is not None
+    finally:
+        await cache.close()
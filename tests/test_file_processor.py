@@ -0,0 +1,59 @@
+import pytest
+
+from backend.services import file_processor
+from backend.services.file_processor import FileProcessor, shutdown_extraction_pool
+from benchmarks.generators import synthetic_rfp
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def rfp_pdf(tmp_path):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    path = str(tmp_path / "rfp.pdf")
+    pdf = canvas.Canvas(path, pagesize=A4)
+    lines = synthetic_rfp(120, seed=9).splitlines()
+    for start in range(0, len(lines), 40):
+        text = pdf.beginText(40, 800)
+        for line in lines[start:start + 40]:
+            text.textLine(line)
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+async def test_inline_pdf_extraction_matches_the_pool(rfp_pdf, tmp_path, monkeypatch):
+    processor = FileProcessor(upload_dir=str(tmp_path / "uploads"))
+    try:
+        pooled = [line async for line in processor.iter_lines(rfp_pdf)]
+    finally:
+        shutdown_extraction_pool()
+
+    monkeypatch.setattr(file_processor, "_extract_inline", True)
+    monkeypatch.setattr(file_processor, "get_extraction_pool", lambda: pytest.fail("worker started a pool"))
+    inline = [line async for line in processor.iter_lines(rfp_pdf)]
+
+    assert inline == pooled
+    assert any("COMPANY:" in line for line in inline)
+
+
+def test_docx_tables_stay_in_body_order(tmp_path):
+    import docx
+
+    from backend.services.document_extractors import extract_docx_lines
+
+    document = docx.Document()
+    document.add_paragraph("Section 1: Lighting")
+    table = document.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text, table.rows[0].cells[1].text = "LED panel light", "40 units"
+    document.add_paragraph("Section 2: Cabling")
+    table = document.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text, table.rows[0].cells[1].text = "Copper cable 4 sq mm", "500 meters"
+    path = str(tmp_path / "rfp.docx")
+    document.save(path)
+
+    assert extract_docx_lines(path) == ["Section 1: Lighting", "LED panel light | 40 units",
+                                        "Section 2: Cabling", "Copper cable 4 sq mm | 500 meters"]
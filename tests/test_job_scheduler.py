@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from backend.services.job_scheduler import JobScheduler, QueueFullError
+
+
+@pytest.mark.anyio
+async def test_queued_jobs_run_and_overflow_is_rejected():
+    scheduler = JobScheduler(workers=1, max_queue=2, tenant_limit=1)
+    await scheduler.start()
+    done = []
+    release = asyncio.Event()
+
+    async def job(name):
+        await release.wait()
+        done.append(name)
+
+    try:
+        scheduler.submit("a", lambda: job("a"))
+        await asyncio.sleep(0)
+        scheduler.submit("b", lambda: job("b"))
+        scheduler.submit("c", lambda: job("c"))
+        # Notifications are held until they have run
+        assert scheduler._notifications
+        with pytest.raises(QueueFullError):
+            scheduler.submit("d", lambda: job("d"))
+
+        release.set()
+        for _ in range(100):
+            if len(done) == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert done == ["a", "b", "c"]
+        assert not scheduler._notifications
+        assert scheduler.stats()["rejected"] == 1
+    finally:
+        await scheduler.stop()
+
+
+def test_rejected_upload_leaves_no_job(client, monkeypatch):
+    from backend import main
+
+    monkeypatch.setattr(main.scheduler, "max_queue", 0)
+    before = client.portal.call(main.job_store.count)
+    response = client.post("/api/v1/upload-rfp",
+                           files={"file": ("rfp.txt", b"COMPANY: Test\nLED light 10 units\n", "text/plain")})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert client.portal.call(main.job_store.count) == before
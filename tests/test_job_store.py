@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from backend.database.job_store import JobStore, MemoryJobStore, SQLiteJobStore
+
+pytestmark = pytest.mark.anyio
+
+JOB = {"status": "success", "quotation": {"line_items": []}}
+
+
+async def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore()
+
+
+@pytest.fixture
+async def sqlite_store(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"), ttl_seconds=0.2)
+    yield store
+    await store.close()
+
+
+async def test_expired_result_is_not_served_from_memory(sqlite_store):
+    await sqlite_store.put("a", JOB)
+    assert await sqlite_store.get_result("a") == JOB
+    assert "a" in sqlite_store._results
+
+    await asyncio.sleep(0.3)
+    assert await sqlite_store.get_result("a") is None
+    assert "a" not in sqlite_store._results
+    assert sqlite_store._results_size == 0
+
+
+@pytest.mark.parametrize("store", [lambda tmp_path: MemoryJobStore(),
+                                   lambda tmp_path: SQLiteJobStore(str(tmp_path / "jobs.db"))])
+async def test_round_trip(tmp_path, store):
+    store = store(tmp_path)
+    await store.put("a", {"status": "processing"})
+    await store.put("b", JOB)
+    assert await store.get("a") == {"status": "processing", "message": None}
+    assert [request_id async for request_id, _ in store.iter_results("success")] == ["b"]
+    assert await store.count() == 2
+    await store.close()
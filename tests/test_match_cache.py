@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from backend.agents.technical_agent import TechnicalAgent
+from backend.database.match_cache import MatchCache
+from backend.services.product_catalog import ProductCatalog
+from benchmarks.generators import write_catalog_csv
+
+MATCHES = [({"product_id": "CAB-1", "name": "XLPE Insulated Copper Cable 16 sqmm"}, 80)]
+
+
+@pytest.mark.parametrize("db", [False, True])
+def test_entries_belong_to_one_catalog_version(tmp_path, db):
+    path = str(tmp_path / "match_cache.db") if db else ""
+    cache = MatchCache(path)
+    cache.put("catalog:1", "xlpe cable|16 sqmm", MATCHES)
+    assert cache.get("catalog:1", "xlpe cable|16 sqmm") == MATCHES
+    assert cache.get("catalog:2", "xlpe cable|16 sqmm") is None
+    # Switching versions drops the old entries, they do not come back
+    assert cache.get("catalog:1", "xlpe cable|16 sqmm") is None
+    cache.close()
+
+
+def test_shared_database_is_keyed_by_version(tmp_path):
+    path = str(tmp_path / "match_cache.db")
+    writer = MatchCache(path)
+    writer.put("catalog:1", "key", MATCHES)
+    reader = MatchCache(path)
+    assert reader.get("catalog:1", "key") == MATCHES
+    assert MatchCache(path).get("catalog:2", "key") is None
+    writer.close()
+    reader.close()
+
+
+@pytest.mark.anyio
+async def test_catalog_edit_rematches(tmp_path):
+    path = write_catalog_csv(str(tmp_path / "catalog.csv"), 100, seed=1)
+    agent = TechnicalAgent(catalog=ProductCatalog(path, reload_check_seconds=0), match_cache=MatchCache(""))
+    first = await agent.find_product_matches("XLPE Insulated Copper Cable 16 sqmm", "voltage 1100V copper")
+    assert agent.match_cache.misses == 1
+    await agent.find_product_matches("XLPE Insulated Copper Cable 16 sqmm", "voltage 1100V copper")
+    assert agent.match_cache.memory_hits == 1
+
+    write_catalog_csv(path, 100, seed=2)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    second = await agent.find_product_matches("XLPE Insulated Copper Cable 16 sqmm", "voltage 1100V copper")
+    assert agent.match_cache.misses == 2
+    assert agent.match_cache.invalidations == 1
+    assert first != second
@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+import pytest
+
+from backend.services import metrics, pdf_renderer
+from backend.services.pdf_renderer import PDFRenderer
+
+pytestmark = pytest.mark.anyio
+
+
+def requests(outcome: str) -> float:
+    return metrics.PDF_REQUESTS.labels(kind="content", outcome=outcome)._value.get()
+
+
+@pytest.fixture
+def renderer(tmp_path, monkeypatch):
+    # The default thread pool keeps the test free of worker processes
+    monkeypatch.setattr(pdf_renderer, "get_extraction_pool", lambda: None)
+    return PDFRenderer(str(tmp_path / "pdfs"), max_files=10)
+
+
+async def test_joined_renders_are_not_counted_as_rendered(renderer):
+    rendered, joined = requests("rendered"), requests("joined")
+    paths = await asyncio.gather(*[renderer.render_content("Title", "Some content") for _ in range(5)])
+
+    assert len(set(paths)) == 1
+    assert requests("rendered") == rendered + 1
+    assert requests("joined") == joined + 4
+
+
+async def test_open_survives_eviction(renderer):
+    calls = []
+
+    async def render():
+        path = await renderer.render_content("Title", "Evicted " * 500)
+        if not calls:
+            os.remove(path)
+        calls.append(path)
+        return path
+
+    pdf, size = await renderer.open(render)
+    assert len(calls) == 2
+
+    # Evicted after opening: the handle still streams the whole file
+    os.remove(calls[-1])
+    body = b"".join([chunk async for chunk in renderer.stream(pdf, chunk_size=1024)])
+    assert len(body) == size
+    assert body.startswith(b"%PDF")
+
+
+def test_pdf_endpoint_reports_the_streamed_size(client):
+    response = client.post("/api/v1/generate-pdf", json={"title": "Title", "content": "Some content"})
+    assert response.status_code == 200
+    assert int(response.headers["Content-Length"]) == len(response.content)
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from backend.agents.pricing_agent import PricingAgent
+from backend.services.pricing_engine import reprice
+from benchmarks.generators import synthetic_products
+
+pytestmark = pytest.mark.anyio
+
+COMPANY = {"name": "ABC Manufacturing Ltd.", "project": "Factory Electrical Upgrade", "contact": "contact@company.com"}
+
+ALTERNATIVES = [
+    {},
+    {"tax_rate": 0.12, "transport_rate": 0.3},
+    {"testing_charge": 0.035, "discount_tiers": [[500000, 0.12], [20000, 0.04]]},
+    {"bulk_item_threshold": 2, "bulk_discount_rate": 0.08, "discount_tiers": []},
+]
+
+
+def matched_items(count: int, rng: random.Random):
+    products = synthetic_products(count, seed=rng.randint(0, 10 ** 6))
+    return [{"matched_product": product, "quantity": rng.randint(1, 3000), "match_score": 80}
+            for product in products]
+
+
+@pytest.fixture
+def orders():
+    rng = random.Random(11)
+    # Empty, single-line, around the bulk threshold and large enough for every discount tier
+    return [matched_items(count, rng) for count in (0, 1, 5, 6, 7, 20, 150)]
+
+
+@pytest.mark.parametrize("parameters", ALTERNATIVES)
+async def test_reprice_matches_generate_quotation(orders, parameters):
+    stored = [await PricingAgent().generate_quotation(COMPANY, items) for items in orders]
+    agent = PricingAgent({**PricingAgent().parameters, **parameters})
+    expected = [await agent.generate_quotation(COMPANY, items) for items in orders]
+
+    repriced = reprice(agent, stored, include_lines=True)
+
+    for quotation, fresh, entry in zip(stored, expected, repriced):
+        assert entry["pricing_summary"] == fresh["pricing_summary"]
+        assert entry["line_items"] == fresh["line_items"]
+        assert entry["previous_final_amount"] == quotation["pricing_summary"]["final_amount"]
+        assert entry["delta"] == round(fresh["pricing_summary"]["final_amount"]
+                                       - quotation["pricing_summary"]["final_amount"], 2)
+
+
+@pytest.mark.parametrize("parameters", [
+    {"tax_rate": "0.18"},
+    {"tax_rate": True},
+    {"tax_rate": 1.5},
+    {"transport_rate": -0.1},
+    {"testing_charge": None},
+    {"bulk_item_threshold": 2.5},
+    {"bulk_discount_rate": float("nan")},
+    {"discount_tiers": [[100000, "0.1"]]},
+    {"discount_tiers": [[100000]]},
+    {"discount_tiers": 0.1},
+])
+def test_invalid_parameters_are_rejected(parameters):
+    with pytest.raises(ValueError):
+        PricingAgent(parameters)
+
+
+def test_what_if_rejects_invalid_parameters(client):
+    response = client.post("/api/v1/pricing/what-if", json={"parameters": {"tax_rate": "0.18"}})
+    assert response.status_code == 400
+    assert "tax_rate" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("limit", ["abc", 0, -5, 1.5])
+def test_what_if_rejects_invalid_limit(client, limit):
+    response = client.post("/api/v1/pricing/what-if", json={"parameters": {}, "limit": limit})
+    assert response.status_code == 400
+    assert "limit" in response.json()["detail"]
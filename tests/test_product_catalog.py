@@ -0,0 +1,49 @@
+import os
+
+from backend.services.product_catalog import ProductCatalog
+
+
+def set_mtime_ns(path: str, mtime_ns: int):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_edits_within_one_second_change_the_version(catalog_csv):
+    path = catalog_csv(20)
+    second = 1_700_000_000 * 10 ** 9
+    set_mtime_ns(path, second + 1_000_000)
+    catalog = ProductCatalog(path, reload_check_seconds=0)
+    before = catalog.version
+
+    # Same size, same whole second
+    with open(path, "r+b") as f:
+        data = f.read()
+        f.seek(0)
+        f.write(data.replace(b"Copper", b"Cupric", 1) if b"Copper" in data else data.replace(b"PVC", b"CPV", 1))
+    set_mtime_ns(path, second + 2_000_000)
+
+    assert catalog.maybe_reload()
+    assert catalog.version != before
+
+
+def test_unchanged_source_is_not_reloaded(catalog_csv):
+    catalog = ProductCatalog(catalog_csv(20), reload_check_seconds=0)
+    version = catalog.version
+    assert not catalog.maybe_reload()
+    assert catalog.version == version
+
+
+def test_reload_drops_vector_indexes_of_earlier_versions(catalog_csv, tmp_path):
+    root = str(tmp_path / "vectors")
+    other = ProductCatalog(catalog_csv(10, name="other.csv"), strategy="semantic", vector_index_dir=root)
+    path = catalog_csv(20)
+    catalog = ProductCatalog(path, reload_check_seconds=0, strategy="semantic", vector_index_dir=root)
+    first = catalog.index.vectors.path
+
+    with open(path, "ab") as f:
+        f.write(b"\n")
+    set_mtime_ns(path, os.stat(path).st_mtime_ns + 1_000_000)
+    assert catalog.maybe_reload()
+
+    assert sorted(os.listdir(root)) == sorted([os.path.basename(catalog.index.vectors.path),
+                                               os.path.basename(other.index.vectors.path)])
+    assert not os.path.exists(first)
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from backend.agents.pricing_agent import PricingAgent
+from backend.agents.technical_agent import TechnicalAgent
+from backend.database.match_cache import MatchCache
+from backend.database.result_cache import make_cache_key
+from backend.services.product_catalog import ProductCatalog
+from benchmarks.generators import synthetic_rfp, write_catalog_csv
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def rfp(tmp_path):
+    path = tmp_path / "rfp.txt"
+    path.write_text(synthetic_rfp(80, seed=2), encoding="utf-8")
+    return str(path)
+
+
+def test_key_covers_document_catalog_and_pricing():
+    key = make_cache_key("doc", "catalog:1", "pricing:1")
+    assert key != make_cache_key("doc2", "catalog:1", "pricing:1")
+    assert key != make_cache_key("doc", "catalog:2", "pricing:1")
+    assert key != make_cache_key("doc", "catalog:1", "pricing:2")
+
+
+def test_pricing_version_follows_every_parameter():
+    default = PricingAgent()
+    versions = {default.parameters_version}
+    for name, value in [("tax_rate", 0.12), ("transport_rate", 0.2), ("testing_charge", 0.03),
+                        ("discount_tiers", [(100000, 0.1)]), ("bulk_item_threshold", 9),
+                        ("bulk_discount_rate", 0.06)]:
+        versions.add(PricingAgent({**default.parameters, name: value}).parameters_version)
+    assert len(versions) == 7
+    assert PricingAgent(default.parameters).parameters_version == default.parameters_version
+
+
+async def test_pricing_change_misses_the_cache(orchestrator, rfp):
+    await orchestrator.process_rfp(rfp)
+    assert await orchestrator.get_cached_result(rfp) is not None
+
+    orchestrator.pricing_agent = PricingAgent({"tax_rate": 0.12})
+    assert await orchestrator.get_cached_result(rfp) is None
+
+
+async def test_catalog_change_misses_the_cache(orchestrator, rfp, tmp_path):
+    path = write_catalog_csv(str(tmp_path / "catalog.csv"), 200, seed=1)
+    orchestrator.technical_agent = TechnicalAgent(catalog=ProductCatalog(path, reload_check_seconds=0),
+                                                  match_cache=MatchCache(""))
+    await orchestrator.process_rfp(rfp)
+    assert await orchestrator.get_cached_result(rfp) is not None
+
+    write_catalog_csv(path, 200, seed=2)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert await orchestrator.get_cached_result(rfp) is None
+
+
+async def test_catalog_reload_does_not_block_the_event_loop(orchestrator, rfp, tmp_path, monkeypatch):
+    path = write_catalog_csv(str(tmp_path / "catalog.csv"), 200, seed=1)
+    catalog = ProductCatalog(path, reload_check_seconds=0)
+    orchestrator.technical_agent = TechnicalAgent(catalog=catalog, match_cache=MatchCache(""))
+    build_index = catalog._build_index
+
+    def slow_build_index():
+        time.sleep(0.5)
+        return build_index()
+
+    monkeypatch.setattr(catalog, "_build_index", slow_build_index)
+    before = catalog.version
+    write_catalog_csv(path, 200, seed=2)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    try:
+        await orchestrator.get_cached_result(rfp)
+    finally:
+        ticker.cancel()
+    assert catalog.version != before
+    assert ticks >= 20
+
+
+async def test_workers_only_purge_older_versions(tmp_path):
+    from backend.database.result_cache import ResultCache
+
+    path = str(tmp_path / "shared.db")
+    old_worker, new_worker = ResultCache(path), ResultCache(path)
+    try:
+        await old_worker.purge_stale("catalog:1", "p")
+        await old_worker.set(make_cache_key("a", "catalog:1", "p"), {"v": 1}, "catalog:1", "p")
+
+        await new_worker.purge_stale("catalog:2", "p")
+        await new_worker.set(make_cache_key("a", "catalog:2", "p"), {"v": 2}, "catalog:2", "p")
+        assert await new_worker.get(make_cache_key("a", "catalog:1", "p")) is None
+
+        # A worker that has not reloaded yet must leave the newer entries alone
+        assert await old_worker.purge_stale("catalog:1", "p") == 0
+        assert (await old_worker.stats())["disk_entries"] == 1
+        assert await new_worker.get(make_cache_key("a", "catalog:2", "p")) == {"v": 2}
+    finally:
+        await old_worker.close()
+        await new_worker.close()
+
+
+async def test_memory_tier_is_bounded_by_size(tmp_path):
+    from backend.database.result_cache import ResultCache
+
+    cache = ResultCache(str(tmp_path / "cache.db"), memory_bytes=1000)
+    try:
+        for key in ("a", "b", "c"):
+            await cache.set(key, {"payload": key * 400}, "c", "p")
+        assert list(cache._memory) == ["b", "c"]
+        assert cache._memory_size <= 1000
+
+        await cache.set("big", {"payload": "x" * 2000}, "c", "p")
+        assert "big" not in cache._memory
+        assert await cache.get("big") == {"payload": "x" * 2000}
+        assert cache._memory_size == sum(size for size, _ in cache._memory.values())
+    finally:
+        await cache.close()
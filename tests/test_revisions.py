@@ -0,0 +1,179 @@
+import io
+import re
+
+import pytest
+
+from backend.agents.sales_agent import SPEC_WINDOW, RFPScanner, SalesAgent
+from backend.services.revisions import RevisionLines, line_item_delta
+from benchmarks.generators import synthetic_rfp
+
+ITEM_LINE = re.compile(r"^\d+\. ")
+
+
+def write(tmp_path, name: str, text: str) -> str:
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def revise(text: str) -> str:
+    """The same document with one item's quantity line edited"""
+    lines = text.splitlines()
+    index = next(i for i, line in enumerate(lines) if "cable" in line.lower())
+    lines[index] = lines[index] + " 999"
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.anyio
+async def test_plain_upload_of_a_revision_has_no_delta(orchestrator, tmp_path):
+    original = synthetic_rfp(60, seed=1)
+    first = write(tmp_path, "a.txt", original)
+    second = write(tmp_path, "b.txt", revise(original))
+
+    result = await orchestrator.process_rfp(first, request_id="a")
+    assert result["status"] == "success"
+    revised = await orchestrator.process_rfp(second, request_id="b", revision_of="a")
+    assert revised["status"] == "success"
+    assert revised["revision"]["revision_of"] == "a"
+
+    again = await orchestrator.process_rfp(second, request_id="c")
+    assert again.get("cached") is True
+    assert "revision" not in again
+    assert again["quotation"]["line_items"] == revised["quotation"]["line_items"]
+
+
+def extract(agent, lines, hash_sink=None):
+    scanner = RFPScanner(agent, hash_sink)
+    items = list(agent.iter_items(lines, scanner))
+    return agent._build_result(scanner, items), scanner
+
+
+def base_for(agent, lines):
+    sink = io.BytesIO()
+    extracted, scanner = extract(agent, lines, sink)
+    return {**scanner.line_index(), **extracted, "line_hashes": sink.getvalue()}
+
+
+def item_starts(lines):
+    return [i for i, line in enumerate(lines) if ITEM_LINE.match(line)]
+
+
+@pytest.fixture
+def document():
+    return synthetic_rfp(150, seed=4).splitlines()
+
+
+NEW_BLOCK = ["9. XLPE Insulated Copper Cable 95 sqmm - 70 meters",
+             "   Specifications: 3.3KV, Copper, 3 core, IS standards",
+             "   Delivery: 2 weeks"]
+
+
+def edited(lines):
+    lines = list(lines)
+    start = item_starts(lines)[1]
+    lines[start] = lines[start].replace(" - ", " - 1", 1)
+    return lines, range(start, start + 1)
+
+
+def inserted(lines):
+    start = item_starts(lines)[2]
+    return lines[:start] + NEW_BLOCK + lines[start:], range(start, start + len(NEW_BLOCK))
+
+
+def deleted(lines):
+    start = item_starts(lines)[1]
+    return lines[:start] + lines[start + 3:], range(start, start + 3)
+
+
+def renamed(lines):
+    lines = list(lines)
+    lines[0] = "COMPANY: Southern Power Grid"
+    return lines, range(0, 1)
+
+
+def touches(line: int, changed: range) -> bool:
+    """Whether the specification window of an item on `line` overlaps the changed lines"""
+    return line < changed.stop and changed.start < line + SPEC_WINDOW
+
+
+@pytest.mark.parametrize("change", [edited, inserted, deleted, renamed])
+def test_extract_revision_equals_full_extraction(document, change):
+    agent = SalesAgent()
+    base = base_for(agent, document)
+    revised, changed = change(document)
+
+    sink = io.BytesIO()
+    extracted, index, pairs, reused = agent.extract_revision(revised, base, sink)
+    fresh = base_for(agent, revised)
+
+    assert extracted == {key: fresh[key] for key in ("company_info", "items", "project_details")}
+    assert index == {"item_lines": fresh["item_lines"], "header_lines": fresh["header_lines"]}
+    assert sink.getvalue() == fresh["line_hashes"]
+
+    new_lines, old_lines = fresh["item_lines"], base["item_lines"]
+    if change is deleted:
+        gone = [i for i, line in enumerate(old_lines) if line in changed]
+        assert gone and not set(gone) & set(pairs.values())
+        assert len(new_lines) == len(old_lines) - len(gone)
+        assert sorted(pairs.values()) == [i for i in range(len(old_lines)) if i not in gone]
+        # Items before the cut whose window reached into it now see different lines
+        assert reused == [i for i, line in enumerate(new_lines)
+                          if line + SPEC_WINDOW <= changed.start or line >= changed.start]
+    elif change is inserted:
+        added = [i for i, line in enumerate(new_lines) if line in changed]
+        assert added and not set(added) & set(pairs)
+        assert sorted(pairs.values()) == list(range(len(old_lines)))
+        assert reused == [i for i, line in enumerate(new_lines) if not touches(line, changed)]
+    else:
+        assert pairs == {i: i for i in range(len(new_lines))}
+        assert reused == [i for i, line in enumerate(new_lines) if not touches(line, changed)]
+    if change is renamed:
+        assert extracted["company_info"]["name"] == "Southern Power Grid"
+
+
+def test_extract_revision_reads_back_only_changed_runs(document, monkeypatch):
+    agent = SalesAgent()
+    base = base_for(agent, document)
+    revised, changed = edited(document)
+
+    read = []
+    original_read = RevisionLines.read
+
+    def recording_read(self, start, end):
+        lines = original_read(self, start, end)
+        read.extend(lines)
+        return lines
+
+    monkeypatch.setattr(RevisionLines, "read", recording_read)
+    # A generator: the document is streamed once, never indexed
+    agent.extract_revision((line for line in revised), base)
+
+    assert len(read) <= len(changed) + 2 * (SPEC_WINDOW - 1)
+
+
+def priced(name, quantity, total):
+    return {"item_name": name, "quantity": quantity, "specifications": "",
+            "line_item": None if total is None else {"line_total": total}}
+
+
+BEFORE = [priced("cable", 10, 100.0), priced("light", 5, 50.0), priced("switchgear", 1, None)]
+
+
+def test_line_item_delta_edit():
+    after = [BEFORE[0], priced("light", 6, 60.0), BEFORE[2]]
+    delta = line_item_delta(BEFORE, after, {0: 0, 1: 1, 2: 2})
+    assert delta == {"added": [], "removed": [], "modified": [{"before": BEFORE[1], "after": after[1]}],
+                     "unchanged": 2}
+
+
+def test_line_item_delta_insert():
+    new = priced("transformer", 1, 900.0)
+    after = [BEFORE[0], new, BEFORE[1], BEFORE[2]]
+    delta = line_item_delta(BEFORE, after, {0: 0, 2: 1, 3: 2})
+    assert delta == {"added": [new], "removed": [], "modified": [], "unchanged": 3}
+
+
+def test_line_item_delta_delete():
+    after = [BEFORE[0], BEFORE[2]]
+    delta = line_item_delta(BEFORE, after, {0: 0, 1: 2})
+    assert delta == {"added": [], "removed": [BEFORE[1]], "modified": [], "unchanged": 2}
@@ -0,0 +1,46 @@
+import pytest
+
+from backend.agents.sales_agent import ITEM_KEYWORDS, ITEM_STOP_WORDS, RFPScanner, SalesAgent
+
+COMPOUND_ITEMS = [
+    "1. Streetlight 60W - 40 units",
+    "2. Floodlight 200W - 12 units",
+    "3. Highmast-light fittings - 6 units",
+    "4. Switchgear panel - 1 unit",
+    "5. LED Street Light 50W - 25 units",
+]
+
+
+def is_item(line: str) -> bool:
+    return RFPScanner(SalesAgent()).scan(line)[0]
+
+
+@pytest.mark.parametrize("line", COMPOUND_ITEMS)
+def test_compound_item_terms_start_items(line):
+    assert is_item(line)
+
+
+@pytest.mark.parametrize("line", [
+    "   Specifications: 11KV/433V, oil cooled, 500KVA capacity",
+    "   Motor controlled dampers, detailed drawings to be submitted",
+    "   Installed and sealed by the supplier",
+])
+def test_stop_words_do_not_start_items(line):
+    assert not is_item(line)
+
+
+def test_stop_words_leave_real_keywords_on_the_line():
+    assert is_item("Oil cooled transformer 500KVA - 2 units")
+    assert is_item("Controlled LED driver - 10 units")
+
+
+def test_stop_words_only_hide_led():
+    for word in ITEM_STOP_WORDS:
+        assert "led" in word
+        assert not [keyword for keyword in ITEM_KEYWORDS if keyword != "led" and keyword in word]
+
+
+@pytest.mark.anyio
+async def test_compound_item_terms_are_extracted():
+    extracted = await SalesAgent().extract_rfp_data("\n\n\n".join(COMPOUND_ITEMS))
+    assert [item["item_name"] for item in extracted["items"]] == COMPOUND_ITEMS
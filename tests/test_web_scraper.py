@@ -0,0 +1,75 @@
+import pytest
+
+from backend.services import web_scraper
+from backend.services.web_scraper import HostRateLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(web_scraper.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(web_scraper.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+async def test_same_host_requests_are_spaced(clock):
+    limiter = HostRateLimiter(2)
+    for _ in range(3):
+        await limiter.wait("example.com")
+    await limiter.wait("other.example.com")
+    assert clock.sleeps == [0.5, 1.0]
+
+
+async def test_idle_hosts_are_forgotten(clock):
+    limiter = HostRateLimiter(10)
+    for number in range(1000):
+        await limiter.wait(f"host{number}.example.com")
+        clock.now += 0.01
+    # Only hosts requested within the last interval can still delay a request
+    assert len(limiter._next_slot) <= 11
+
+    clock.now += 1
+    await limiter.wait("host0.example.com")
+    assert list(limiter._next_slot) == ["host0.example.com"]
+    assert clock.sleeps == []
+
+
+@pytest.mark.parametrize("route", ["/api/v1/scrape-web", "/api/v1/scrape-rfp"])
+@pytest.mark.parametrize("max_pages", ["x", "5", 0, -1, 2.5, True])
+def test_scrape_rejects_invalid_max_pages(client, route, max_pages):
+    response = client.post(route, json={"url": "http://example.invalid/", "maxPages": max_pages})
+    assert response.status_code == 400
+    assert "maxPages" in response.json()["detail"]
+
+
+def test_scrape_rfp_with_no_fetched_page_is_a_502(client, monkeypatch):
+    from backend import main
+
+    async def crawl(self, url, **kwargs):
+        raise RuntimeError(f"Cannot connect to {url}")
+        yield
+
+    monkeypatch.setattr(web_scraper.WebScraper, "crawl", crawl)
+    before = client.portal.call(main.job_store.count)
+    response = client.post("/api/v1/scrape-rfp", json={"urls": ["http://a.invalid/", "http://b.invalid/"]})
+
+    assert response.status_code == 502
+    assert response.json()["detail"]["errors"] == [
+        {"url": "http://a.invalid/", "error": "Cannot connect to http://a.invalid/"},
+        {"url": "http://b.invalid/", "error": "Cannot connect to http://b.invalid/"},
+    ]
+    assert client.portal.call(main.job_store.count) == before